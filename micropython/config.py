@@ -32,6 +32,12 @@ DEFAULT_CONFIG: Dict[str, Any] = {
     "syslog_port": 514,
     "wdt_enabled": False,
     "log_level": 1,  # 0=Debug, 1=Info, 2=Warn, 3=Error, 4=Crit
+    "sector_cache_kb": 24,  # Shared sector cache budget for all drives (4-96 KB)
+    "journal_writes": True,  # Crash-safe write-ahead journal (<image>.dsk.jnl) for local drives
+    "skip_free_sectors": True,  # Answer reads of RBF-unallocated sectors with zeros, no SD/network I/O
+    "hydrate_remote": False,  # Copy remote drives to /sd in the background, then serve them locally
+    "remote_writes": False,  # Allow writes to remote drives (buffered, flushed by bulk PUT)
+    "remote_compress": False,  # Ask the sector server for run-length encoded bulk reads
     "remote_servers": []  # [{"name": "Dev", "url": "http://192.168.1.100:8080"}, ...]
 }
 
@@ -161,6 +167,32 @@ class Config:
             resilience.log("Warning: Invalid remote_servers config, using defaults", level=2)
             self.config['remote_servers'] = []
 
+        # Validate shared sector cache budget (KB)
+        sc = self.config.get('sector_cache_kb', 24)
+        if not isinstance(sc, int) or sc < 4 or sc > 96:
+            resilience.log(f"Warning: Invalid sector_cache_kb {sc}, using 24", level=2)
+            self.config['sector_cache_kb'] = 24
+
+        if not isinstance(self.config.get('journal_writes', True), bool):
+            resilience.log("Warning: Invalid journal_writes, using True", level=2)
+            self.config['journal_writes'] = True
+
+        if not isinstance(self.config.get('skip_free_sectors', True), bool):
+            resilience.log("Warning: Invalid skip_free_sectors, using True", level=2)
+            self.config['skip_free_sectors'] = True
+
+        if not isinstance(self.config.get('hydrate_remote', False), bool):
+            resilience.log("Warning: Invalid hydrate_remote, using False", level=2)
+            self.config['hydrate_remote'] = False
+
+        if not isinstance(self.config.get('remote_writes', False), bool):
+            resilience.log("Warning: Invalid remote_writes, using False", level=2)
+            self.config['remote_writes'] = False
+
+        if not isinstance(self.config.get('remote_compress', False), bool):
+            resilience.log("Warning: Invalid remote_compress, using False", level=2)
+            self.config['remote_compress'] = False
+
         # Validate log level and sync with resilience module
         ll = self.config.get('log_level', 1)
         if not isinstance(ll, int) or ll < 0 or ll > 4:
@@ -11,6 +11,7 @@ import activity_led
 import resilience
 import time_sync
 from collections import deque
+from array import array
 
 try:
     from typing import Optional, List, Dict, Any, Union, Tuple
@@ -69,8 +70,19 @@ OP_RFM_SETSTT = micropython.const(0x0C)
 OP_RFM_CLOSE = micropython.const(0x0D)
 
 # Constants for memory management
-MAX_READ_CACHE_ENTRIES = micropython.const(8)
-MAX_DIR_CACHE_ENTRIES = micropython.const(32)
+MAX_DIR_CACHE_ENTRIES = micropython.const(32)  # Per-drive cap on sticky directory sectors
+DEFAULT_SECTOR_CACHE_KB = micropython.const(24)  # Shared read/dir cache budget (config: sector_cache_kb)
+CACHE_REBALANCE_INSERTS = micropython.const(64)  # Recompute per-drive quotas every N cache inserts
+READAHEAD_MAX_SECTORS = micropython.const(16)    # Sequential read-ahead window cap (4KB)
+REMOTE_FETCH_MAX_SECTORS = micropython.const(32) # RemoteDrive fetch window cap (8KB per HTTP request)
+REMOTE_PUT_MAX_SECTORS = micropython.const(64)   # Sectors per bulk PUT (sector_server's limit)
+HYDRATE_CHUNK_SECTORS = micropython.const(16)    # Hydration unit: one present bit per 4KB chunk
+HYDRATE_SAVE_CHUNKS = micropython.const(64)      # Persist the present bitmap every N copied chunks
+JOURNAL_RECORD_SIZE = micropython.const(262)     # 'J' + 24-bit LSN + 256 data + 16-bit sum
+FLUSH_INTERVAL_MS = micropython.const(60000)     # Periodic checkpoint when no drive asks sooner
+WARM_MAX_READS = micropython.const(64)           # Sector reads allowed to the mount-time directory walk
+WARM_MAX_FDS = micropython.const(32)             # Entry FDs (files and directories) queued by the walk
+META_MAX_HOT = micropython.const(32)             # Hot (cached) LSNs remembered in the metadata sidecar
 MAX_DIRTY_CACHE_ENTRIES = micropython.const(8) # 2KB auto-flush threshold
 MAX_CHANNEL_BUFFER_SIZE = micropython.const(256)
 MAX_LOG_ENTRIES = micropython.const(20)
@@ -79,6 +91,10 @@ SECTOR_SIZE = micropython.const(256)
 NUM_DRIVES = micropython.const(4)
 NUM_CHANNELS = micropython.const(32)
 MAX_DIR_LSNS = micropython.const(256)  # ~7KB cap on dir_lsns set
+MAX_BITMAP_SUMMARY = micropython.const(512)  # Bytes per drive for the RBF free-cluster summary
+UART_RX_TIMEOUT_MS = micropython.const(5000)  # Abandon a transaction after 5s of silence
+UART_IDLE_WAIT_MS = micropython.const(100)    # Idle wake-up period while awaiting an opcode
+IDLE_GC_WAKEUPS = micropython.const(5)        # gc.collect() every N idle wake-ups (~500ms)
 RFM_BASE_DIR = '/sd'  # Sandbox for RFM file operations
 
 # OS-9 / DriveWire error codes sent to CoCo
@@ -97,6 +113,7 @@ _RESP_UNIT = bytes([E_UNIT])
 _RESP_NOTRDY = bytes([E_NOTRDY])
 _RESP_WP = bytes([E_WP])
 _RESP_2ZERO = bytes([0, 0])
+_ZERO_SECTOR = bytes(SECTOR_SIZE)
 _RESP_0xFF = bytes([0xFF])
 _PAD_256 = bytes(256)
 
@@ -109,6 +126,104 @@ _RFM_ERR_RESP = bytearray(1)      # RFM: 1-byte error response
 _RFM_READ_RESP = bytearray(3)     # RFM READ: [ec, len_hi, len_lo]
 _SER_WRITE_BUF = bytearray(1)     # SERWRITE: 1-byte TCP write buffer
 
+# Shared multi-sector staging buffer for VirtualDrive read-ahead. Only used
+# between an await-free readinto() and the copy into slab slots.
+_STAGE_BUF = bytearray(READAHEAD_MAX_SECTORS * SECTOR_SIZE)
+_STAGE_VIEW = memoryview(_STAGE_BUF)
+
+_JNL_MAGIC = micropython.const(0x4A)  # 'J'
+JOURNAL_SUFFIX = '.jnl'
+
+
+def _journal_sum(rec) -> int:
+    s = 0
+    for i in range(JOURNAL_RECORD_SIZE - 2): s += rec[i]
+    return s & 0xFFFF
+
+
+_META_MAGIC = b'DWM1'
+META_SUFFIX = '.dwc'
+REMOTE_META_DIR = RFM_BASE_DIR + '/.remote'
+_PRESENT_MAGIC = b'DWP1'
+PRESENT_SUFFIX = '.dwp'
+
+
+def drop_image_sidecars(path: str):
+    """Remove per-image side files so a new image at `path` starts clean."""
+    for suffix in (JOURNAL_SUFFIX, META_SUFFIX, PRESENT_SUFFIX):
+        try: os.remove(path + suffix)
+        except OSError: pass
+
+
+def load_image_meta(path: str, stamp: Tuple[int, int]):
+    """Read a cache-metadata sidecar: (dir_lsns, hot_lsns), or None if absent, torn or stale.
+
+    Layout: 'DWM1', two 32-bit stamp words, 16-bit dir and hot counts, then
+    24-bit LSNs. The stamp is the image generation (size+mtime for local
+    images, DD.TOT+LSN 0 sum for remote ones).
+    """
+    try:
+        with open(path, 'rb') as f:
+            hdr = f.read(16)
+            if len(hdr) < 16 or hdr[:4] != _META_MAGIC or struct.unpack_from('>II', hdr, 4) != stamp:
+                return None
+            nd, nh = struct.unpack_from('>HH', hdr, 12)
+            raw = f.read((nd + nh) * 3)
+    except OSError:
+        return None
+    if len(raw) != (nd + nh) * 3: return None
+    lsns = [(raw[i] << 16) | (raw[i + 1] << 8) | raw[i + 2] for i in range(0, len(raw), 3)]
+    return lsns[:nd], lsns[nd:]
+
+
+def save_image_meta(path: str, stamp: Tuple[int, int], dir_lsns, hot) -> bool:
+    """Write a cache-metadata sidecar (see load_image_meta); False on I/O error."""
+    dirs = list(dir_lsns)[:MAX_DIR_LSNS]
+    hot = list(hot)[:META_MAX_HOT]
+    buf = bytearray(16 + (len(dirs) + len(hot)) * 3)
+    buf[:4] = _META_MAGIC
+    struct.pack_into('>IIHH', buf, 4, stamp[0], stamp[1], len(dirs), len(hot))
+    off = 16
+    for lsn in dirs + hot:
+        buf[off] = (lsn >> 16) & 0xFF; buf[off + 1] = (lsn >> 8) & 0xFF; buf[off + 2] = lsn & 0xFF
+        off += 3
+    try:
+        with open(path, 'wb') as f:
+            f.write(buf)
+        return True
+    except OSError as e:
+        resilience.log(f"Cache metadata save failed '{path}': {e}", level=1)
+        return False
+
+
+def _track_dir(drive, lsn: int, data) -> bool:
+    """Learn directory LSNs from LSN 0 and directory FDs; True if `lsn` is a directory sector."""
+    if lsn == 0:
+        try:
+            root_lsn = RbfParser.get_root_dir_lsn(data)
+            if root_lsn and len(drive.dir_lsns) < MAX_DIR_LSNS:
+                drive.dir_lsns.add(root_lsn)
+        except Exception: pass
+        return True
+    if lsn not in drive.dir_lsns:
+        return False
+    try:
+        if RbfParser.is_directory_fd(data):
+            for seg_lsn, seg_size in RbfParser.get_segments(data):
+                for i in range(seg_size):
+                    if len(drive.dir_lsns) < MAX_DIR_LSNS: drive.dir_lsns.add(seg_lsn + i)
+    except Exception: pass
+    return True
+
+
+def _hot_lsns(drive) -> list:
+    """Directory sectors first, then read-cache sectors, capped at META_MAX_HOT."""
+    hot = list(drive.directory_cache.keys())
+    for lsn in drive.read_cache.keys():
+        if len(hot) >= META_MAX_HOT: break
+        hot.append(lsn)
+    return hot[:META_MAX_HOT]
+
 
 class RbfParser:
     """Helper for parsing OS-9 RBF file system metadata."""
@@ -123,8 +238,18 @@ class RbfParser:
 
     @staticmethod
     def get_root_dir_lsn(data: Union[bytes, bytearray, memoryview]) -> int:
-        """Extract DD.DIR (Root Directory FD LSN) from LSN 0 at offset 6."""
-        return (data[6] << 16) | (data[7] << 8) | data[8]
+        """Extract DD.DIR (Root Directory FD LSN) from LSN 0 at offset 8."""
+        return (data[8] << 16) | (data[9] << 8) | data[10]
+
+    @staticmethod
+    def get_map_bytes(data: Union[bytes, bytearray, memoryview]) -> int:
+        """Extract DD.MAP (allocation bitmap size in bytes) from LSN 0 at offset 4."""
+        return (data[4] << 8) | data[5]
+
+    @staticmethod
+    def get_cluster_size(data: Union[bytes, bytearray, memoryview]) -> int:
+        """Extract DD.BIT (sectors per allocation cluster) from LSN 0 at offset 6."""
+        return (data[6] << 8) | data[7]
 
     @staticmethod
     def is_file_descriptor(data: Union[bytes, bytearray, memoryview]) -> bool:
@@ -147,22 +272,485 @@ class RbfParser:
             yield (lsn, size)
 
 
+class RbfBitmap:
+    """Free-sector summary of an RBF allocation bitmap (DD.MAP bytes from LSN 1).
+
+    One summary bit covers `span` bitmap bytes (a power of two, so spans never
+    straddle a bitmap sector) and is set when any cluster in it is allocated,
+    keeping the summary within MAX_BITMAP_SUMMARY bytes for any disk size.
+    Every span starts out allocated; bitmap sectors replace that as they pass
+    through the drive, so a sector is only ever reported free on the disk's
+    own say-so.
+    """
+    def __init__(self, total: int, map_bytes: int, cluster: int, root_lsn: int):
+        self.total = total
+        self.map_bytes = map_bytes
+        self.root_lsn = root_lsn
+        self.shift = 0
+        while (1 << self.shift) < cluster: self.shift += 1
+        self.span_shift = 0
+        while (map_bytes >> self.span_shift) > MAX_BITMAP_SUMMARY * 8: self.span_shift += 1
+        nbits = ((map_bytes - 1) >> self.span_shift) + 1
+        self.summary = bytearray(b'\xff' * ((nbits + 7) >> 3))
+        self.nsec = (map_bytes + SECTOR_SIZE - 1) // SECTOR_SIZE
+        self.loaded = bytearray(self.nsec)
+
+    @staticmethod
+    def from_lsn0(data: Union[bytes, bytearray, memoryview]) -> Optional['RbfBitmap']:
+        """Build an empty summary from LSN 0, or None unless the geometry is self-consistent."""
+        if not RbfParser.is_lsn0(data): return None
+        total = (data[0] << 16) | (data[1] << 8) | data[2]
+        map_bytes = RbfParser.get_map_bytes(data)
+        cluster = RbfParser.get_cluster_size(data)
+        root_lsn = RbfParser.get_root_dir_lsn(data)
+        # DD.BIT is a power of two and DD.MAP holds exactly one bit per cluster;
+        # anything else is not an RBF disk and must never yield free sectors.
+        if not cluster or cluster & (cluster - 1) or not map_bytes: return None
+        clusters = (total + cluster - 1) // cluster
+        if map_bytes != (clusters + 7) >> 3: return None
+        if not 0 < root_lsn < total: return None
+        return RbfBitmap(total, map_bytes, cluster, root_lsn)
+
+    def wants(self, lsn: int) -> bool:
+        """True for a bitmap sector whose contents have not been seen yet."""
+        return 0 < lsn <= self.nsec and not self.loaded[lsn - 1]
+
+    def load(self, lsn: int, data) -> bool:
+        """Fold bitmap sector `lsn` into the summary; False if it contradicts LSN 0."""
+        idx = lsn - 1
+        self.loaded[idx] = 1
+        base = idx * SECTOR_SIZE
+        n = min(SECTOR_SIZE, self.map_bytes - base)
+        span = 1 << self.span_shift
+        for off in range(0, n, span):
+            used = 0
+            for k in range(off, min(off + span, n)):
+                if data[k]: used = 1; break
+            b = (base + off) >> self.span_shift
+            if used: self.summary[b >> 3] |= 0x80 >> (b & 7)
+            else: self.summary[b >> 3] &= ~(0x80 >> (b & 7)) & 0xFF
+        # LSN 0 and the root directory are always allocated on a real RBF disk
+        return bool(self.summary[0] & 0x80) and not self.is_free(self.root_lsn)
+
+    def mark_used(self, lsn: int):
+        """A data write landed on `lsn`: never report it free again.
+
+        Its bitmap sector also counts as seen, so a later read of a stale
+        on-disk copy cannot clear the bit. Only a bitmap write can.
+        """
+        if lsn >= self.total: return
+        byte = (lsn >> self.shift) >> 3
+        b = byte >> self.span_shift
+        self.summary[b >> 3] |= 0x80 >> (b & 7)
+        self.loaded[byte // SECTOR_SIZE] = 1
+
+    def is_free(self, lsn: int) -> bool:
+        """True if the cluster holding `lsn` is known to be unallocated."""
+        if lsn == 0 or lsn >= self.total: return False
+        b = ((lsn >> self.shift) >> 3) >> self.span_shift
+        return not (self.summary[b >> 3] & (0x80 >> (b & 7)))
+
+
+def rbf_format_sectors(total: int, name: str = ''):
+    """Yield (lsn, sector) for every non-zero sector of a freshly formatted RBF disk.
+
+    Same layout as tests/os9_disk_util.py: LSN 0, the allocation bitmap from
+    LSN 1, then the root directory FD and a one-sector directory body holding
+    '..' and '.'. Every other sector is free, so the caller may leave it
+    unwritten. One buffer is reused for every sector yielded.
+    """
+    cluster = 1
+    while (((total + cluster - 1) // cluster + 7) >> 3) > 0xFFFF: cluster <<= 1
+    clusters = (total + cluster - 1) // cluster
+    map_bytes = (clusters + 7) >> 3
+    root = 1 + (map_bytes + SECTOR_SIZE - 1) // SECTOR_SIZE
+    used = (root + 2 + cluster - 1) // cluster
+    t = utime.localtime()
+    date = bytes((t[0] - 1900, t[1], t[2], t[3], t[4]))
+    buf = bytearray(SECTOR_SIZE)
+
+    # LSN 0: DD.TOT, DD.TKS, DD.MAP, DD.BIT, DD.DIR, DD.ATT, DD.DSK, DD.SPT, DD.DAT, DD.NAM
+    buf[0:3] = bytes(((total >> 16) & 0xFF, (total >> 8) & 0xFF, total & 0xFF))
+    buf[3] = 18
+    buf[4:8] = struct.pack('>HH', map_bytes, cluster)
+    buf[8:11] = bytes((0, root >> 8, root & 0xFF))
+    buf[13] = 0xFF
+    buf[14:16] = struct.pack('>H', (total ^ utime.ticks_ms()) & 0xFFFF)
+    buf[17:19] = struct.pack('>H', 18)
+    buf[26:31] = date
+    label = (name or 'DriveWire').encode()[:32]
+    buf[31:31 + len(label)] = label
+    buf[30 + len(label)] |= 0x80
+    yield 0, buf
+
+    # Bitmap: clusters taken by the layout above plus the tail bits past the
+    # last cluster; all-zero bitmap sectors in between are skipped
+    bits = SECTOR_SIZE * 8
+    for lsn in range(1, root):
+        lo = (lsn - 1) * bits
+        hi = min(lo + bits, map_bytes * 8)
+        if lo >= used and hi <= clusters: continue
+        buf[:] = _ZERO_SECTOR
+        for c in range(lo, min(used, hi)):
+            buf[(c - lo) >> 3] |= 0x80 >> (c & 7)
+        for c in range(max(clusters, lo), hi):
+            buf[(c - lo) >> 3] |= 0x80 >> (c & 7)
+        yield lsn, buf
+
+    # Root directory FD: attributes, date, link count, size and one segment
+    buf[:] = _ZERO_SECTOR
+    buf[0] = 0xBF
+    buf[3:8] = date
+    buf[8] = 1
+    buf[9:13] = struct.pack('>I', 64)
+    buf[13:16] = date[:3]
+    buf[16:21] = bytes((0, (root + 1) >> 8, (root + 1) & 0xFF, 0, 1))
+    yield root, buf
+
+    # Root directory body: '..' and '.' both point back at the root FD
+    buf[:] = _ZERO_SECTOR
+    buf[0:2] = b'.\xae'
+    buf[32] = 0xAE
+    for off in (29, 61):
+        buf[off:off + 3] = bytes((0, root >> 8, root & 0xFF))
+    yield root + 1, buf
+
+
+def _observe_bitmap(drive, lsn: int, data, written: bool = False):
+    """Keep `drive.bitmap` in step with LSN 0 and bitmap sectors passing through."""
+    bm = drive.bitmap
+    if lsn == 0:
+        if bm is None or written:
+            drive.bitmap = RbfBitmap.from_lsn0(data) if shared_config.get('skip_free_sectors', True) else None
+    elif bm is not None and (written and lsn <= bm.nsec or bm.wants(lsn)):
+        if not bm.load(lsn, data):
+            resilience.log(f"'{drive.filename}': allocation bitmap disagrees with LSN 0, free-sector skip off", level=2)
+            drive.bitmap = None
+    elif bm is not None and written:
+        bm.mark_used(lsn)
+
+
+_WARM_UNCOUNTED = ('reads', 'read_hits', 'read_misses', 'dir_cache_hits', 'dir_cache_misses')
+
+async def warm_directory_tree(drive, hot=()):
+    """Walk the RBF tree breadth-first from DD.DIR, filling the directory cache.
+
+    `hot` LSNs (from the metadata sidecar) are read back into the cache first.
+    The walk is bounded by WARM_MAX_READS sector reads, MAX_DIR_CACHE_ENTRIES
+    and the drive's cache budget. Yields after every sector so the protocol loop is
+    never held up; progress is kept in stats['warm_*'] (warm_state 1 while
+    walking, 2 when done).
+    """
+    st = drive.stats
+    st['warm_state'] = 1
+    buf = bytearray(SECTOR_SIZE)
+
+    warm = getattr(drive, 'warm_sector', None)
+
+    async def fetch(lsn):
+        if warm is not None:
+            # A remote read awaits the network, so the CoCo's reads interleave:
+            # the drive's own warm path leaves its read-ahead state and counters alone
+            data = await warm(lsn)
+        else:
+            # Keep the CoCo's sequential-read detection intact across our reads
+            nl = getattr(drive, '_next_lsn', None); ra = getattr(drive, '_ra_window', None)
+            # ...and keep our reads out of the hit counts the cache quotas follow,
+            # or an idle drive warming up would take RAM from the busy one
+            counts = [st.get(k, 0) for k in _WARM_UNCOUNTED]; hits = drive.cache.hits
+            data = await drive.read_sector(lsn)
+            if nl is not None: drive._next_lsn = nl; drive._ra_window = ra
+            for i, k in enumerate(_WARM_UNCOUNTED):
+                if k in st: st[k] = counts[i]
+            drive.cache.hits = hits
+        st['warm_sectors'] += 1
+        if data is None: return None
+        buf[:] = data
+        resilience.feed_wdt()
+        await asyncio.sleep(0)
+        return buf
+
+    lsn0 = drive.directory_cache.get(0)
+    if lsn0 is None: lsn0 = await fetch(0)
+    if lsn0 is None or not RbfParser.is_lsn0(lsn0):
+        st['warm_state'] = 2; return
+    root = RbfParser.get_root_dir_lsn(lsn0)
+    queue = [root]; qi = 0
+    seen = {root}
+
+    for lsn in hot[:META_MAX_HOT]:
+        if lsn not in drive.directory_cache and lsn not in drive.read_cache:
+            await fetch(lsn)
+    limit = st['warm_sectors'] + WARM_MAX_READS
+    while qi < len(queue) and st['warm_sectors'] < limit:
+        if len(drive.directory_cache) >= MAX_DIR_CACHE_ENTRIES: break
+        fd_lsn = queue[qi]; qi += 1
+        fd = await fetch(fd_lsn)
+        if fd is None or not RbfParser.is_directory_fd(fd): continue
+        st['warm_dirs'] += 1
+        segs = list(RbfParser.get_segments(fd))
+        # A subdirectory FD was read as plain data: promote it to the sticky cache
+        if fd_lsn not in drive.directory_cache:
+            drive.read_cache.discard(fd_lsn)
+            if len(drive.directory_cache) < MAX_DIR_CACHE_ENTRIES and drive.cache.reserve():
+                drive.directory_cache.put(fd_lsn, fd)
+        if len(drive.dir_lsns) < MAX_DIR_LSNS: drive.dir_lsns.add(fd_lsn)
+        for seg_lsn, seg_size in segs:
+            for i in range(seg_size):
+                if len(drive.dir_lsns) < MAX_DIR_LSNS: drive.dir_lsns.add(seg_lsn + i)
+        for seg_lsn, seg_size in segs:
+            for i in range(seg_size):
+                if st['warm_sectors'] >= limit: break
+                body = await fetch(seg_lsn + i)
+                if body is None: break
+                # 32-byte entries: 29-byte name (0 = deleted), 24-bit FD LSN
+                for off in range(0, SECTOR_SIZE, 32):
+                    c = body[off]
+                    if c == 0 or c == 0xAE or (c == 0x2E and body[off + 1] == 0xAE): continue  # deleted, '.', '..'
+                    child = (body[off + 29] << 16) | (body[off + 30] << 8) | body[off + 31]
+                    if child and child not in seen and len(queue) < WARM_MAX_FDS:
+                        seen.add(child); queue.append(child)
+    st['warm_state'] = 2
+
+
+class SectorSlab:
+    """Preallocated 256-byte sector slots handed out as memoryviews.
+
+    `lsn` records the LSN held by each slot (-1 when free) and `free` is a
+    stack of free slot numbers, so taking and returning a slot never touches
+    the heap.
+    """
+    def __init__(self, nslots: int):
+        self.nslots = nslots
+        self.buf = bytearray(nslots * SECTOR_SIZE)
+        mv = memoryview(self.buf)
+        self.views = [mv[i * SECTOR_SIZE:(i + 1) * SECTOR_SIZE] for i in range(nslots)]
+        self.lsn = array('l', [-1] * nslots)
+        self.free = array('H', range(nslots))
+        self.nfree = nslots
+
+    def alloc(self, lsn: int) -> int:
+        """Take a free slot for `lsn`; -1 when the slab is exhausted."""
+        if not self.nfree: return -1
+        self.nfree -= 1
+        slot = self.free[self.nfree]
+        self.lsn[slot] = lsn
+        return slot
+
+    def release(self, slot: int):
+        self.lsn[slot] = -1
+        self.free[self.nfree] = slot
+        self.nfree += 1
+
+
+class SectorMap:
+    """LSN -> slab slot index with the dict subset the drives use.
+
+    Values are memoryviews into the slab; assigning copies the data into the
+    LSN's slot. A view is only valid until its LSN is discarded.
+    """
+    def __init__(self, slab: SectorSlab):
+        self.slab = slab
+        self._idx = {}
+
+    def __contains__(self, lsn: int) -> bool:
+        return lsn in self._idx
+
+    def __len__(self) -> int:
+        return len(self._idx)
+
+    def __iter__(self):
+        return iter(self._idx)
+
+    def keys(self):
+        return self._idx.keys()
+
+    def get(self, lsn: int, default=None):
+        slot = self._idx.get(lsn)
+        return default if slot is None else self.slab.views[slot]
+
+    def __getitem__(self, lsn: int) -> memoryview:
+        return self.slab.views[self._idx[lsn]]
+
+    def __setitem__(self, lsn: int, data):
+        if not self.put(lsn, data):
+            raise MemoryError("sector slab exhausted")
+
+    def put(self, lsn: int, data) -> Optional[memoryview]:
+        """Copy `data` into the slot for `lsn`; None if no slot is free."""
+        slot = self._idx.get(lsn)
+        if slot is None:
+            slot = self.slab.alloc(lsn)
+            if slot < 0: return None
+            self._idx[lsn] = slot
+        view = self.slab.views[slot]
+        view[:] = data
+        return view
+
+    def touch(self, lsn: int):
+        """Mark `lsn` most recently used (re-insert without copying)."""
+        self._idx[lsn] = self._idx.pop(lsn)
+
+    def discard(self, lsn: int):
+        slot = self._idx.pop(lsn, None)
+        if slot is not None: self.slab.release(slot)
+
+    def __delitem__(self, lsn: int):
+        self.slab.release(self._idx.pop(lsn))
+
+    def clear(self):
+        for slot in self._idx.values(): self.slab.release(slot)
+        self._idx.clear()
+
+    def move_to(self, other: 'SectorMap'):
+        """Hand every slot to `other` (same slab) without copying sector data."""
+        for lsn, slot in self._idx.items():
+            old = other._idx.get(lsn)
+            if old is not None: self.slab.release(old)
+            other._idx[lsn] = slot
+        self._idx.clear()
+
+
+class DriveCache:
+    """One drive's slice of the shared SectorCache: LSN -> slab slot maps."""
+    def __init__(self, pool):
+        self.pool = pool
+        self.read = SectorMap(pool.slab)
+        self.dir = SectorMap(pool.slab)
+        self.quota = 1
+        self.hits = 0
+
+    def used(self) -> int:
+        return len(self.read) + len(self.dir)
+
+    def reserve(self) -> bool:
+        return self.pool.reserve(self)
+
+    def evict_one(self) -> bool:
+        """Drop the oldest data sector, else a directory sector; LSN 0 is kept."""
+        if self.read:
+            self.read.discard(next(iter(self.read)))
+            return True
+        for lsn in self.dir:
+            if lsn != 0:
+                self.dir.discard(lsn)
+                return True
+        return False
+
+
+class SectorCache:
+    """Sector cache shared by all drives under one byte budget.
+
+    Entries are keyed by (drive, LSN): each drive registers a DriveCache and
+    indexes its `read` and `dir` maps by LSN. A drive may borrow free space
+    beyond its quota; once the budget is full the drive furthest over quota
+    gives up a sector. Quotas follow recent hit counts, so an idle drive's
+    share flows to the busy one.
+
+    All sector data lives in one SectorSlab sized at construction: the cache
+    budget plus MAX_DIRTY_CACHE_ENTRIES write-back slots per drive.
+    """
+    def __init__(self, budget_bytes: int):
+        self.drives = []
+        self.capacity = 1
+        self._inserts = 0
+        self.slab = SectorSlab(max(1, budget_bytes // SECTOR_SIZE) + NUM_DRIVES * MAX_DIRTY_CACHE_ENTRIES)
+        self.set_budget(budget_bytes)
+
+    def set_budget(self, budget_bytes: int):
+        limit = self.slab.nslots - NUM_DRIVES * MAX_DIRTY_CACHE_ENTRIES
+        self.capacity = max(1, min(budget_bytes // SECTOR_SIZE, limit))
+        if budget_bytes // SECTOR_SIZE > limit:
+            resilience.log(f"sector_cache_kb above {limit * SECTOR_SIZE // 1024}KB takes effect after restart", level=2)
+        self.rebalance()
+        while self.used() > self.capacity:
+            victim = self._most_over_quota()
+            if not victim or not victim.evict_one(): break
+
+    def register(self) -> DriveCache:
+        dc = DriveCache(self)
+        self.drives.append(dc)
+        self.rebalance()
+        return dc
+
+    def release(self, dc: DriveCache):
+        dc.read.clear(); dc.dir.clear()
+        if dc in self.drives:
+            self.drives.remove(dc)
+            self.rebalance()
+
+    def transfer(self, src: DriveCache, dst: DriveCache):
+        """Hand cached sectors to a drive reopening the same image (no copies)."""
+        src.read.move_to(dst.read); src.dir.move_to(dst.dir); dst.hits += src.hits
+
+    def used(self) -> int:
+        n = 0
+        for dc in self.drives: n += dc.used()
+        return n
+
+    def rebalance(self):
+        """Split capacity: a floor per drive, the rest in proportion to recent hits."""
+        self._inserts = 0
+        n = len(self.drives)
+        if not n: return
+        floor = max(1, self.capacity // (n * 4))
+        spare = max(0, self.capacity - floor * n)
+        total = 0
+        for dc in self.drives: total += dc.hits
+        for dc in self.drives:
+            dc.quota = floor + (spare * dc.hits // total if total else spare // n)
+            dc.hits >>= 1  # Decay so quotas track recent, not lifetime, activity
+
+    def _most_over_quota(self) -> Optional[DriveCache]:
+        victim, worst = None, 0
+        for dc in self.drives:
+            over = dc.used() - dc.quota
+            if over > worst: victim, worst = dc, over
+        return victim
+
+    def reserve(self, dc: DriveCache) -> bool:
+        """Make room for one more sector in `dc`. False if nothing is evictable."""
+        self._inserts += 1
+        if self._inserts >= CACHE_REBALANCE_INSERTS: self.rebalance()
+        if self.used() < self.capacity and self.slab.nfree: return True
+        victim = self._most_over_quota() or dc
+        return victim.evict_one() or (victim is not dc and dc.evict_one())
+
+
+sector_cache = SectorCache(shared_config.get('sector_cache_kb', DEFAULT_SECTOR_CACHE_KB) * 1024)
+
+
 class VirtualDrive:
-    def __init__(self, filename: str):
+    def __init__(self, filename: str, cache: Optional[SectorCache] = None):
         self.filename = filename
         self.file = None
         self.stats = {
             'reads': 0, 'writes': 0, 'errors': 0, 'latency_us': 0,
             'dir_cache_hits': 0, 'dir_cache_misses': 0,
-            'read_hits': 0, 'read_misses': 0
+            'read_hits': 0, 'read_misses': 0, 'readahead_sectors': 0, 'free_skips': 0,
+            'flushes': 0, 'flush_runs': 0, 'flush_bytes': 0, 'flush_us': 0,
+            'warm_state': 0, 'warm_dirs': 0, 'warm_sectors': 0
         }
-        self.dirty_sectors = {}
-        self.read_cache = {}
-        self.directory_cache = {}
+        self.cache = (sector_cache if cache is None else cache).register()
+        self.dirty_sectors = SectorMap(self.cache.pool.slab)
+        self.read_cache = self.cache.read
+        self.directory_cache = self.cache.dir
         self.dir_lsns = set()
+        self.bitmap = None    # RbfBitmap once LSN 0 has been seen
         self.last_error = 0
         self.read_only = False
         self._read_buf = bytearray(SECTOR_SIZE)
+        self._next_lsn = -1   # LSN that would continue the current sequential run
+        self._ra_window = 1   # Read-ahead window in sectors, doubled per sequential miss
+        self.journal_path = filename + JOURNAL_SUFFIX
+        self._journaled = bool(shared_config.get('journal_writes', True))
+        self._jnl = None
+        self._jrec = bytearray(JOURNAL_RECORD_SIZE)
+        self.checkpoint_due = False
+        self._warm_task = None
+        self.meta_path = filename + META_SUFFIX
+        self._hot = ()
+        self._meta_saved = 0  # len(dir_lsns) at the last sidecar load/save
         self._open()
 
     def _open(self):
@@ -170,10 +758,12 @@ class VirtualDrive:
             os.stat(self.filename)
             self.file = open(self.filename, "r+b")
             self.read_only = False
+            self._replay_journal()
+            self._load_meta()
             # Don't prime cache in test environment to keep stats deterministic
             if 'unittest' not in sys.modules:
                 try:
-                    asyncio.create_task(self._prime_cache())
+                    self._warm_task = asyncio.create_task(self._prime_cache())
                 except Exception:
                     pass
         except OSError as e:
@@ -184,14 +774,103 @@ class VirtualDrive:
                 # into dirty_sectors where flush() fails and the data is lost.
                 self.read_only = True
                 resilience.log(f"VirtualDrive '{self.filename}' is write-protected (read-only)", level=2)
+                self._load_meta()
                 if 'unittest' not in sys.modules:
                     try:
-                        asyncio.create_task(self._prime_cache())
+                        self._warm_task = asyncio.create_task(self._prime_cache())
                     except Exception:
                         pass
             except OSError:
                 self.file = None
 
+    def _stamp(self) -> Tuple[int, int]:
+        st = os.stat(self.filename)
+        return (st[6] & 0xFFFFFFFF, st[8] & 0xFFFFFFFF)
+
+    def _load_meta(self):
+        """Restore learned directory LSNs and the hot list if the image is unchanged."""
+        try: meta = load_image_meta(self.meta_path, self._stamp())
+        except OSError: meta = None
+        if meta:
+            for lsn in meta[0][:MAX_DIR_LSNS]: self.dir_lsns.add(lsn)
+            self._hot = meta[1]
+            self._meta_saved = len(self.dir_lsns)
+
+    def save_meta(self, force: bool = False):
+        """Persist cache metadata once the image on card matches memory.
+
+        Skipped while sectors are dirty (the image's mtime is about to move)
+        and, unless forced, when no directory LSNs were learned since last time.
+        """
+        if not self.dir_lsns or self.dirty_sectors: return
+        if not force and len(self.dir_lsns) == self._meta_saved: return
+        try: stamp = self._stamp()
+        except OSError: return
+        if save_image_meta(self.meta_path, stamp, self.dir_lsns, _hot_lsns(self)):
+            self._meta_saved = len(self.dir_lsns)
+
+    def _replay_journal(self):
+        """Apply journal records left by an unclean shutdown, then drop the journal.
+
+        Replay stops at the first short or corrupt record (a torn final append).
+        On an I/O error the journal is kept so the next open retries it.
+        """
+        try: os.stat(self.journal_path)
+        except OSError: return
+        rec = self._jrec; applied = 0
+        try:
+            with open(self.journal_path, 'rb') as j:
+                while j.readinto(rec) == JOURNAL_RECORD_SIZE:
+                    if rec[0] != _JNL_MAGIC or _journal_sum(rec) != ((rec[260] << 8) | rec[261]):
+                        break
+                    self.file.seek(((rec[1] << 16) | (rec[2] << 8) | rec[3]) * SECTOR_SIZE)
+                    self.file.write(memoryview(rec)[4:260])
+                    applied += 1
+                    resilience.feed_wdt()
+            self.file.flush()
+            try: os.sync()
+            except (AttributeError, OSError): pass
+            os.remove(self.journal_path)
+            if applied:
+                resilience.log(f"VirtualDrive '{self.filename}': replayed {applied} journaled writes", level=2)
+        except OSError as e:
+            resilience.log(f"Journal replay failed for '{self.filename}': {e}", level=3)
+
+    def _journal_append(self, lsn: int, data):
+        rec = self._jrec
+        rec[0] = _JNL_MAGIC
+        rec[1] = (lsn >> 16) & 0xFF; rec[2] = (lsn >> 8) & 0xFF; rec[3] = lsn & 0xFF
+        rec[4:260] = data
+        s = _journal_sum(rec)
+        rec[260] = s >> 8; rec[261] = s & 0xFF
+        try:
+            if self._jnl is None: self._jnl = open(self.journal_path, 'ab')
+            self._jnl.write(rec)
+            # WRITE is stop-and-wait: the CoCo sends nothing until it gets the
+            # ack, so there is no later record to group a sync with. Each
+            # record is synced before the ack, costing one flush + os.sync()
+            # per WRITE; the image itself is still checkpointed in batches.
+            self._jnl.flush()
+            try: os.sync()
+            except (AttributeError, OSError): pass
+        except OSError as e:
+            # Fall back to plain write-back rather than failing the CoCo's write
+            resilience.log(f"Journal disabled for '{self.filename}': {e}", level=3)
+            self._journaled = False
+            self._close_journal()
+
+    def _close_journal(self):
+        if self._jnl:
+            try: self._jnl.close()
+            except OSError: pass
+            self._jnl = None
+
+    def _discard_journal(self):
+        """Checkpoint complete: every journaled sector is now synced into the image."""
+        self._close_journal()
+        try: os.remove(self.journal_path)
+        except OSError: pass
+
     async def _prime_cache(self):
         lsn0 = await self.read_sector(0)
         if lsn0:
@@ -199,63 +878,84 @@ class VirtualDrive:
             if root_lsn:
                 self.dir_lsns.add(root_lsn)
                 self.dir_lsns.add(0)
+                try: await warm_directory_tree(self, self._hot)
+                except Exception as e: resilience.log(f"Directory warm-up failed for '{self.filename}': {e}", level=2)
 
     async def read_sector(self, lsn: int) -> Optional[Union[bytes, bytearray, memoryview]]:
         if not self.file:
             self.last_error = E_NOTRDY
             return None
         self.stats['reads'] += 1
-        
-        # Priority of truth: dirty > directory_cache > read_cache > physical media
-        if lsn in self.dirty_sectors: return self.dirty_sectors[lsn]
-        if lsn in self.directory_cache:
-            self.stats['dir_cache_hits'] += 1
-            return self.directory_cache[lsn]
-        if lsn in self.read_cache:
-            self.stats['read_hits'] += 1
-            data = self.read_cache.pop(lsn)
-            self.read_cache[lsn] = data
+        sequential = lsn == self._next_lsn
+        self._next_lsn = lsn + 1
+
+        # Priority of truth: dirty > free in bitmap > directory_cache > read_cache > physical media
+        data = self.dirty_sectors.get(lsn)
+        if data is not None: return data
+        if self.bitmap is not None and self.bitmap.is_free(lsn):
+            self.stats['free_skips'] += 1
+            return _PAD_256
+        data = self.directory_cache.get(lsn)
+        if data is not None:
+            self.stats['dir_cache_hits'] += 1; self.cache.hits += 1
+            return data
+        data = self.read_cache.get(lsn)
+        if data is not None:
+            self.stats['read_hits'] += 1; self.cache.hits += 1
+            self.read_cache.touch(lsn)
             return data
 
         try:
             self.stats['read_misses'] += 1
+            # Sequential miss (module load, copy, backup): double the window, up
+            # to half this drive's cache quota; any random access resets it.
+            if sequential:
+                self._ra_window = min(self._ra_window * 2, READAHEAD_MAX_SECTORS, max(1, self.cache.quota >> 1))
+            else:
+                self._ra_window = 1
             self.file.seek(lsn * SECTOR_SIZE)
-            n = self.file.readinto(self._read_buf)
+            if self._ra_window > 1:
+                n = self.file.readinto(_STAGE_VIEW[:self._ra_window * SECTOR_SIZE])
+                if n:
+                    self._stash_readahead(lsn, n)
+                    n = min(n, SECTOR_SIZE)
+                    self._read_buf[:n] = _STAGE_VIEW[:n]
+            else:
+                n = self.file.readinto(self._read_buf)
             if n is None or n == 0: return _PAD_256
             if n < SECTOR_SIZE:
                 for i in range(n, SECTOR_SIZE):
                     self._read_buf[i] = 0
             
-            is_dir = False
-            if lsn == 0:
-                is_dir = True
-                try:
-                    root_lsn = RbfParser.get_root_dir_lsn(self._read_buf)
-                    if root_lsn and len(self.dir_lsns) < MAX_DIR_LSNS:
-                        self.dir_lsns.add(root_lsn)
-                except Exception: pass
-            elif lsn in self.dir_lsns:
-                is_dir = True
-                if RbfParser.is_directory_fd(self._read_buf):
-                    for seg_lsn, seg_size in RbfParser.get_segments(self._read_buf):
-                        for i in range(seg_size):
-                            if len(self.dir_lsns) < MAX_DIR_LSNS: self.dir_lsns.add(seg_lsn + i)
-            
-            if is_dir:
+            _observe_bitmap(self, lsn, self._read_buf)
+            if _track_dir(self, lsn, self._read_buf):
                 self.stats['dir_cache_misses'] += 1
-                data = bytes(self._read_buf)
-                if len(self.directory_cache) < MAX_DIR_CACHE_ENTRIES:
-                    self.directory_cache[lsn] = data
-                return data
-
-            buf = bytearray(self._read_buf)
-            if len(self.read_cache) >= MAX_READ_CACHE_ENTRIES:
-                self.read_cache.pop(next(iter(self.read_cache)))
-            self.read_cache[lsn] = buf
-            return buf
+                if len(self.directory_cache) < MAX_DIR_CACHE_ENTRIES and self.cache.reserve():
+                    return self.directory_cache.put(lsn, self._read_buf) or self._read_buf
+                return self._read_buf
+
+            # Cached copy lives in a slab slot; without room the scratch buffer is
+            # returned, which the caller consumes before the next read.
+            if self.cache.reserve():
+                return self.read_cache.put(lsn, self._read_buf) or self._read_buf
+            return self._read_buf
         except OSError:
             self.stats['errors'] += 1; self.last_error = E_READ; return None
 
+    def _stash_readahead(self, lsn: int, n: int):
+        """Cache the whole sectors after `lsn` that a window read left in _STAGE_BUF."""
+        for i in range(1, n // SECTOR_SIZE):
+            ra = lsn + i
+            # Dirty data is newer than the disk; directory sectors take the
+            # RBF-aware path when actually requested.
+            if ra in self.dirty_sectors or ra in self.read_cache or ra in self.directory_cache or ra in self.dir_lsns:
+                continue
+            off = i * SECTOR_SIZE
+            if self.bitmap is not None: _observe_bitmap(self, ra, _STAGE_VIEW[off:off + SECTOR_SIZE])
+            if not self.cache.reserve(): break
+            self.read_cache.put(ra, _STAGE_VIEW[off:off + SECTOR_SIZE])
+            self.stats['readahead_sectors'] += 1
+
     async def write_sector(self, lsn: int, data: Union[bytes, bytearray, memoryview]) -> bool:
         if not self.file: self.last_error = E_NOTRDY; return False
         if self.read_only:
@@ -263,29 +963,66 @@ class VirtualDrive:
             # that flush() can never persist (silent data loss).
             self.stats['errors'] += 1; self.last_error = E_WP; return False
         self.stats['writes'] += 1
+        if self._journaled: self._journal_append(lsn, data)
+        _observe_bitmap(self, lsn, data, True)
+        self.read_cache.discard(lsn)
+        self.directory_cache.discard(lsn)
         # SAFETY: data may be an alias into _rx_buf which is reused by read_bytes().
-        # We MUST copy the data to avoid silent data corruption.
-        buf = bytearray(data)
-        self.dirty_sectors[lsn] = buf
-        self.read_cache.pop(lsn, None)
-        self.directory_cache.pop(lsn, None)
-        if len(self.dirty_sectors) >= MAX_DIRTY_CACHE_ENTRIES: await self.flush()
+        # put() copies it into a slab slot, so no alias survives.
+        if self.dirty_sectors.put(lsn, data) is None:
+            # Slab exhausted by other drives' dirty slots: write through instead
+            await self.flush()
+            if self.dirty_sectors.put(lsn, data) is None:
+                try:
+                    self.file.seek(lsn * SECTOR_SIZE); self.file.write(data)
+                except OSError as e:
+                    self.stats['errors'] += 1; self.last_error = E_READ
+                    resilience.log(f"Write-through error LSN {lsn}: {e}", level=3)
+                    return False
+                return True
+        n = len(self.dirty_sectors)
+        if n >= MAX_DIRTY_CACHE_ENTRIES:
+            await self.flush()
+        elif self._journaled and n >= MAX_DIRTY_CACHE_ENTRIES // 2:
+            # Journaled data is already durable: let flush_loop checkpoint it
+            # in the background instead of stalling this WRITE's ack.
+            self.checkpoint_due = True
         return True
 
     async def flush(self):
+        """Write dirty sectors in LSN order, one seek+write per contiguous run.
+
+        Runs of up to READAHEAD_MAX_SECTORS are staged through _STAGE_BUF (no
+        await between staging and write). Sectors are dropped from
+        dirty_sectors only once their run has been written.
+        """
         if not self.file or not self.dirty_sectors: return
-        flushed = []
+        t0 = utime.ticks_us()
+        lsns = sorted(self.dirty_sectors.keys())
+        total = len(lsns)
+        done = 0; runs = 0
         try:
-            for lsn in list(self.dirty_sectors.keys()):
+            while done < total:
+                start = lsns[done]; end = done + 1
+                while end < total and lsns[end] == lsns[end - 1] + 1 and end - done < READAHEAD_MAX_SECTORS:
+                    end += 1
+                count = end - done
                 try:
-                    self.file.seek(lsn * SECTOR_SIZE)
-                    self.file.write(self.dirty_sectors[lsn])
-                    flushed.append(lsn)
+                    if count == 1:
+                        buf = self.dirty_sectors[start]
+                    else:
+                        for k in range(count):
+                            off = k * SECTOR_SIZE
+                            _STAGE_VIEW[off:off + SECTOR_SIZE] = self.dirty_sectors[start + k]
+                        buf = _STAGE_VIEW[:count * SECTOR_SIZE]
+                    self.file.seek(start * SECTOR_SIZE)
+                    self.file.write(buf)
+                    done = end; runs += 1
                     resilience.feed_wdt()
                 except OSError as e:
                     self.stats['errors'] += 1
                     self.last_error = E_READ
-                    resilience.log(f"Flush error LSN {lsn}: {e}", level=3)
+                    resilience.log(f"Flush error LSN {start}+{count}: {e}", level=3)
                     break
             try: os.sync()
             except (AttributeError, OSError): pass
@@ -294,56 +1031,192 @@ class VirtualDrive:
             self.last_error = E_READ
             resilience.log(f"Flush outer error: {e}", level=3)
         finally:
-            for lsn in flushed:
-                del self.dirty_sectors[lsn]
+            for k in range(done):
+                del self.dirty_sectors[lsns[k]]
+            if not self.dirty_sectors:
+                self.checkpoint_due = False
+                self._discard_journal()
+            self.stats['flushes'] += 1
+            self.stats['flush_runs'] += runs
+            self.stats['flush_bytes'] += done * SECTOR_SIZE
+            self.stats['flush_us'] = utime.ticks_diff(utime.ticks_us(), t0)
 
     async def close(self):
+        if self._warm_task:
+            self._warm_task.cancel(); self._warm_task = None
         if self.file:
             await self.flush(); self.file.close(); self.file = None
+            self.save_meta(True)
+        self._close_journal()
+        if self.dirty_sectors:
+            resilience.log(f"VirtualDrive '{self.filename}' closed with {len(self.dirty_sectors)} unflushed sectors"
+                           f"{' (kept in journal)' if self._journaled else ''}", level=3)
+            self.dirty_sectors.clear()
+        self.cache.pool.release(self.cache)
 
 
 class RemoteDrive:
-    def __init__(self, url: str):
+    def __init__(self, url: str, cache: Optional[SectorCache] = None):
         self.url = url.rstrip('/')
         self.filename = f"REMOTE:{url}"
         self.stats = {
             'reads': 0, 'writes': 0, 'errors': 0, 'latency_us': 0,
             'dir_cache_hits': 0, 'dir_cache_misses': 0,
-            'read_hits': 0, 'read_misses': 0
+            'read_hits': 0, 'read_misses': 0, 'free_skips': 0,
+            'readahead_sectors': 0, 'readahead_hits': 0, 'readahead_waste': 0, 'fetch_window': 1,
+            'wire_bytes': 0,
+            'flushes': 0, 'flush_runs': 0, 'flush_bytes': 0, 'flush_us': 0,
+            'warm_state': 0, 'warm_dirs': 0, 'warm_sectors': 0
         }
-        self.read_cache = {}
-        self.directory_cache = {}
+        self.cache = (sector_cache if cache is None else cache).register()
+        self.read_cache = self.cache.read
+        self.directory_cache = self.cache.dir
         self.dir_lsns = set()
+        self.bitmap = None
         self.is_remote = True
         self.last_error = 0
-        self.dirty_sectors = {}  # Empty: remote drives are read-only
+        # Write-back buffer, flushed by bulk PUT; stays empty unless remote_writes is on
+        self.dirty_sectors = SectorMap(self.cache.pool.slab)
+        self.writable = bool(shared_config.get('remote_writes', False))
+        # Bulk reads come back run-length encoded: free space and format fill
+        # cross the WiFi link as a few bytes a run
+        self.compress = bool(shared_config.get('remote_compress', False))
+        self.checkpoint_due = False
+        self._flush_lock = asyncio.Lock()
+        self._flushing = False
+        self._rewritten = set()  # LSNs written again while their run was being PUT
         self._fetch_buf = bytearray(SECTOR_SIZE)
         self._fetch_view = memoryview(self._fetch_buf)
+        self._ret_buf = bytearray(SECTOR_SIZE)  # Requested sector, safe from batch eviction
+        self._fetch_lock = asyncio.Lock()
+        self._next_lsn = -1   # LSN that would continue the current sequential run
+        self._ra_window = 1   # Sectors per fetch: doubled per sequential miss, 1 after a random one
+        self._ra_base = -1    # First read-ahead LSN of the last fetch
+        self._ra_used = bytearray(REMOTE_FETCH_MAX_SECTORS)  # Read-ahead sectors requested since
+        self._ra_count = 0    # Read-ahead sectors the last fetch brought in
+        self._warm_task = None
+        safe = ''.join(c if c.isalpha() or c.isdigit() or c in '.-' else '_' for c in self.url.split('://')[-1])
+        self.meta_path = f"{REMOTE_META_DIR}/{safe}{META_SUFFIX}"
+        self._stamp = None    # (DD.TOT, LSN 0 byte sum): no size/mtime for a remote image
+        self._meta_saved = 0
         async def _safe_prime():
-            try: await self.read_sector(0)
+            try:
+                lsn0 = await self.read_sector(0)
+                hot = ()
+                if lsn0 is not None:
+                    s = 0
+                    for b in lsn0: s += b
+                    self._stamp = ((lsn0[0] << 16) | (lsn0[1] << 8) | lsn0[2], s)
+                    meta = load_image_meta(self.meta_path, self._stamp)
+                    if meta:
+                        for lsn in meta[0][:MAX_DIR_LSNS]: self.dir_lsns.add(lsn)
+                        hot = meta[1]
+                        self._meta_saved = len(self.dir_lsns)
+                # Every directory sector is a WiFi round-trip; warm them now
+                if 'unittest' not in sys.modules: await warm_directory_tree(self, hot)
             except Exception as e: resilience.log(f"RemoteDrive prime failed: {e}", level=2)
         try:
-            asyncio.create_task(_safe_prime())
+            self._warm_task = asyncio.create_task(_safe_prime())
         except Exception:
             pass
 
     async def read_sector(self, lsn: int) -> Optional[Union[bytes, bytearray, memoryview]]:
         self.last_error = 0
         self.stats['reads'] += 1
-        if lsn in self.directory_cache: self.stats['dir_cache_hits'] += 1; return self.directory_cache[lsn]
-        if lsn in self.read_cache:
-            self.stats['read_hits'] += 1
-            data = self.read_cache.pop(lsn); self.read_cache[lsn] = data; return data
-        fetch_count = 8
-        base_name = self.filename.split(':')[-1].split('/')[-1]
+        sequential = lsn == self._next_lsn
+        self._next_lsn = lsn + 1
+        data = self.dirty_sectors.get(lsn)
+        if data is not None: return data
+        bm = self.bitmap
+        if bm is not None and bm.is_free(lsn):
+            # Unallocated: the zero sector, without a round-trip over WiFi
+            self.stats['free_skips'] += 1
+            return _PAD_256
+        data = self.directory_cache.get(lsn)
+        if data is not None:
+            self.stats['dir_cache_hits'] += 1; self.cache.hits += 1
+            return data
+        data = self.read_cache.get(lsn)
+        if data is not None:
+            self.stats['read_hits'] += 1; self.cache.hits += 1
+            self.read_cache.touch(lsn)
+            i = lsn - self._ra_base
+            if 0 <= i < self._ra_count and not self._ra_used[i]:
+                self._ra_used[i] = 1
+                self.stats['readahead_hits'] += 1
+            return data
+        # One fetch at a time per drive: the protocol loop and the warm-up task
+        # share _fetch_buf, and the network awaits let them interleave.
+        async with self._fetch_lock:
+            data = self.directory_cache.get(lsn)
+            if data is None: data = self.read_cache.get(lsn)
+            if data is not None: return data  # Fetched by the other task meanwhile
+            return await self._fetch(lsn, bm, sequential)
+
+    async def warm_sector(self, lsn: int) -> Optional[Union[bytes, bytearray, memoryview]]:
+        """read_sector() for warm_directory_tree(): one sector, outside the CoCo's bookkeeping.
+
+        Sequential-run detection, the read-ahead window and its waste
+        accounting, and the hit/miss counters are left as the CoCo's reads
+        set them, even when those reads land while this one is on the wire.
+        """
+        data = self.dirty_sectors.get(lsn)
+        if data is None: data = self.directory_cache.get(lsn)
+        if data is None: data = self.read_cache.get(lsn)
+        if data is not None: return data
+        bm = self.bitmap
+        if bm is not None and bm.is_free(lsn): return _PAD_256
+        async with self._fetch_lock:
+            data = self.directory_cache.get(lsn)
+            if data is None: data = self.read_cache.get(lsn)
+            if data is not None: return data
+            return await self._fetch(lsn, bm, warm=True)
+
+    def _size_window(self, sequential: bool) -> int:
+        """Settle the last fetch's read-ahead accounting and size the next one."""
+        used = 0
+        for i in range(self._ra_count):
+            used += self._ra_used[i]; self._ra_used[i] = 0
+        self.stats['readahead_waste'] += self._ra_count - used
+        # Each fetched sector takes a cache slot, so half the drive's quota
+        # bounds the window as well as the 8KB transfer cap.
+        if sequential:
+            self._ra_window = min(self._ra_window * 2, REMOTE_FETCH_MAX_SECTORS, max(1, self.cache.quota >> 1))
+        else:
+            self._ra_window = 1
+        self.stats['fetch_window'] = self._ra_window
+        return self._ra_window
+
+    def _sector_url(self, lsn: int, count: int = 0) -> str:
+        base_name = self.url.split('/')[-1]
         base_url = self.url
         if '/disk/' in base_url:
-            base_url = base_url.split('/disk/')[0]
-        url = f"{base_url}/sectors/{base_name}/{lsn}?count={fetch_count}"
-        
+            # The image name may be a path on a --recursive server
+            base_url, base_name = base_url.split('/disk/', 1)
+        url = f"{base_url}/sectors/{base_name}/{lsn}"
+        if not count:
+            return url
+        return f"{url}?count={count}&enc=rle" if self.compress else f"{url}?count={count}"
+
+    async def _fetch(self, lsn: int, bm, sequential: bool = False, warm: bool = False) -> Optional[bytearray]:
+        # Sequential misses (module loads, copies) grow the window; a random
+        # FD lookup pulls just the one sector it needs.
+        if warm:
+            fetch_count = 1  # The last fetch's read-ahead stays the CoCo's to use
+        else:
+            fetch_count = self._size_window(sequential)
+            self._ra_base = lsn + 1; self._ra_count = 0
+        if bm is not None:
+            # Don't pull a free tail of the batch over the network
+            while fetch_count > 1 and bm.is_free(lsn + fetch_count - 1):
+                fetch_count -= 1
+        url = self._sector_url(lsn, fetch_count)
+
         sock = None
         for attempt in range(3):
-            sock = resilience.open_remote_stream(url)
+            # Pooled HTTP/1.1 connection, non-blocking: a slow server only
+            # stalls this coroutine, not the UART loop or local drives.
+            sock = await resilience.open_remote_stream_async(url, keep_alive=True)
             if sock:
                 break
             if attempt < 2:
@@ -355,57 +1228,45 @@ class RemoteDrive:
             return None
             
         try:
+            ret_data = None
             read_bytes = 0; expected = fetch_count * SECTOR_SIZE
+            if sock.length >= 0:
+                self.stats['wire_bytes'] += sock.length
+            if 0 <= sock.length < expected and not sock.rle:
+                # The server said up front how much is coming (past the end
+                # of the image): take the whole sectors, don't wait for more.
+                resilience.log(f"RemoteDrive LSN {lsn}: short body, {sock.length}/{expected} bytes", level=1)
+                expected = sock.length - sock.length % SECTOR_SIZE
             while read_bytes < expected:
                 curr_lsn = lsn + (read_bytes // SECTOR_SIZE)
-                is_dir = curr_lsn in self.dir_lsns or curr_lsn == 0
-                
-                # Fill one sector using recv(). The raw lwIP socket's readinto()
-                # did not deliver the response body on-device, while recv() (used
-                # by the working remote file-listing path) does. recv is capped to
-                # the bytes still needed for this sector so it never spans a
-                # boundary or overruns the 256-byte scratch buffer.
-                pos = 0
-                while pos < SECTOR_SIZE:
-                    chunk = sock.recv(SECTOR_SIZE - pos)
-                    if not chunk:
-                        break
-                    self._fetch_buf[pos:pos + len(chunk)] = chunk
-                    pos += len(chunk)
-                if pos < SECTOR_SIZE:
+
+                # Fill one sector with recv_into(), which is built on recv():
+                # the raw lwIP socket's readinto() did not deliver the response
+                # body on-device. It stops at the sector boundary, decoding
+                # run-length records in place when the server encoded the body.
+                if await sock.recv_into(self._fetch_view) < SECTOR_SIZE:
                     break
-                
-                if curr_lsn == 0:
-                    is_dir = True
-                    try:
-                        root_lsn = RbfParser.get_root_dir_lsn(self._fetch_buf)
-                        if root_lsn and len(self.dir_lsns) < MAX_DIR_LSNS:
-                            self.dir_lsns.add(root_lsn)
-                    except Exception: pass
-                elif curr_lsn in self.dir_lsns:
-                    is_dir = True
-                    try:
-                        if RbfParser.is_directory_fd(self._fetch_buf):
-                            for seg_lsn, seg_size in RbfParser.get_segments(self._fetch_buf):
-                                for i in range(seg_size):
-                                    if len(self.dir_lsns) < MAX_DIR_LSNS:
-                                        self.dir_lsns.add(seg_lsn + i)
-                    except Exception: pass
 
-                if is_dir:
-                    if len(self.directory_cache) < MAX_DIR_CACHE_ENTRIES:
-                        self.directory_cache[curr_lsn] = bytes(self._fetch_buf)
+                _observe_bitmap(self, curr_lsn, self._fetch_buf)
+                if curr_lsn in self.dirty_sectors:
+                    pass  # A newer local write is waiting for its PUT
+                elif _track_dir(self, curr_lsn, self._fetch_buf):
+                    if curr_lsn in self.directory_cache or (
+                            len(self.directory_cache) < MAX_DIR_CACHE_ENTRIES and self.cache.reserve()):
+                        self.directory_cache.put(curr_lsn, self._fetch_buf)
                 else:
-                    self.stats['read_misses'] += 1
-                    if len(self.read_cache) >= MAX_READ_CACHE_ENTRIES:
-                        self.read_cache.pop(next(iter(self.read_cache)))
-                    self.read_cache[curr_lsn] = bytearray(self._fetch_buf)
+                    if not warm: self.stats['read_misses'] += 1
+                    if curr_lsn in self.read_cache or self.cache.reserve():
+                        self.read_cache.put(curr_lsn, self._fetch_buf)
+                if curr_lsn != lsn:
+                    self._ra_count += 1; self.stats['readahead_sectors'] += 1
+                # Keep the requested sector aside: later sectors of this batch
+                # may evict (and reuse) its slab slot before we return.
+                if curr_lsn == lsn:
+                    self._ret_buf[:] = self._fetch_buf
+                    ret_data = self._ret_buf
                 read_bytes += SECTOR_SIZE; resilience.feed_wdt()
-            
-            # Use explicit None checks to avoid short-circuit issues with empty but valid byte buffers
-            ret_data = self.directory_cache.get(lsn)
-            if ret_data is None:
-                ret_data = self.read_cache.get(lsn)
+
             if ret_data is None:
                 # Socket opened but the server returned no usable data for this LSN
                 # (non-2xx, empty body, or truncated first sector). Report a real
@@ -420,9 +1281,342 @@ class RemoteDrive:
             self.stats['errors'] += 1; self.last_error = E_NOTRDY; return None
         finally: sock.close()
 
-    async def write_sector(self, lsn, data): self.last_error = E_WP; return False
-    async def flush(self): pass
-    async def close(self): pass
+    async def write_sector(self, lsn: int, data: Union[bytes, bytearray, memoryview]) -> bool:
+        if not self.writable:
+            self.last_error = E_WP; return False
+        self.stats['writes'] += 1
+        if self._flushing: self._rewritten.add(lsn)
+        _observe_bitmap(self, lsn, data, True)
+        self.read_cache.discard(lsn)
+        self.directory_cache.discard(lsn)
+        # put() copies out of _rx_buf into a slab slot
+        if self.dirty_sectors.put(lsn, data) is None:
+            await self.flush()
+            if self.dirty_sectors.put(lsn, data) is None:
+                self.stats['errors'] += 1; self.last_error = E_NOTRDY
+                return False
+        n = len(self.dirty_sectors)
+        if n >= MAX_DIRTY_CACHE_ENTRIES:
+            await self.flush()
+        elif n >= MAX_DIRTY_CACHE_ENTRIES // 2:
+            self.checkpoint_due = True  # Let flush_loop PUT it off the WRITE ack path
+        return True
+
+    def commit(self):
+        # Bus idle: ask flush_loop to PUT the writes of the burst that just ended
+        if self.dirty_sectors: self.checkpoint_due = True
+
+    async def flush(self):
+        """PUT dirty sectors in LSN order, one bulk request per contiguous run.
+
+        Slots are sent straight from the slab. A sector written again while
+        its run is in flight stays dirty and goes out with the next flush.
+        """
+        if not self.dirty_sectors: return
+        async with self._flush_lock:
+            t0 = utime.ticks_us()
+            lsns = sorted(self.dirty_sectors.keys())
+            total = len(lsns)
+            done = 0; runs = 0
+            self._flushing = True
+            try:
+                while done < total:
+                    end = done + 1
+                    while end < total and lsns[end] == lsns[end - 1] + 1 and end - done < REMOTE_PUT_MAX_SECTORS:
+                        end += 1
+                    body = [self.dirty_sectors[lsns[k]] for k in range(done, end)]
+                    sock = await resilience.open_remote_stream_async(
+                        self._sector_url(lsns[done]), keep_alive=True, method='PUT', body=body)
+                    if not sock:
+                        self.stats['errors'] += 1; self.last_error = E_NOTRDY
+                        resilience.log(f"RemoteDrive flush failed at LSN {lsns[done]}+{end - done}", level=3)
+                        break
+                    try:
+                        while await sock.recv(64): pass  # Drain the JSON ack for keep-alive
+                    finally:
+                        sock.close()
+                    done = end; runs += 1
+                    resilience.feed_wdt()
+            finally:
+                self._flushing = False
+                for k in range(done):
+                    if lsns[k] not in self._rewritten: self.dirty_sectors.discard(lsns[k])
+                self._rewritten.clear()
+                if not self.dirty_sectors: self.checkpoint_due = False
+                self.stats['flushes'] += 1
+                self.stats['flush_runs'] += runs
+                self.stats['flush_bytes'] += done * SECTOR_SIZE
+                self.stats['flush_us'] = utime.ticks_diff(utime.ticks_us(), t0)
+
+    def save_meta(self, force: bool = False):
+        """Persist cache metadata under REMOTE_META_DIR on the SD card."""
+        if self._stamp is None or not self.dir_lsns: return
+        if not force and len(self.dir_lsns) == self._meta_saved: return
+        try: os.mkdir(REMOTE_META_DIR)
+        except OSError: pass  # Exists, or no card: save_image_meta reports the latter
+        if save_image_meta(self.meta_path, self._stamp, self.dir_lsns, _hot_lsns(self)):
+            self._meta_saved = len(self.dir_lsns)
+
+    async def close(self):
+        if self._warm_task:
+            self._warm_task.cancel(); self._warm_task = None
+        await self.flush()
+        if self.dirty_sectors:
+            resilience.log(f"RemoteDrive '{self.url}' closed with {len(self.dirty_sectors)} unflushed sectors", level=3)
+            self.dirty_sectors.clear()
+        self.save_meta(True)
+        self.cache.pool.release(self.cache)
+
+
+class HydratingDrive(RemoteDrive):
+    """A RemoteDrive that copies its image to the SD card in the background.
+
+    It mounts at once and serves misses over the network while `_hydrate()`
+    copies the image to `local_path` chunk by chunk. A chunk the CoCo reads
+    or writes is copied first and then served from the SD card. One present
+    bit per HYDRATE_CHUNK_SECTORS chunk lives in a `.dwp` sidecar, so an
+    interrupted copy resumes after a reboot. An image without that sidecar
+    is complete. When the last chunk lands `hydrated` is set and the server
+    swaps in a VirtualDrive on the same slot.
+    """
+    def __init__(self, url: str, cache: Optional[SectorCache] = None):
+        super().__init__(url, cache)
+        self.local_path = f"{RFM_BASE_DIR}/{self.url.split('/')[-1]}"
+        self.stats['hydrate_state'] = 0  # 0 waiting, 1 copying, 2 complete, 3 off
+        self.stats['hydrate_chunks'] = 0
+        self.stats['hydrate_total'] = 0
+        self.stats['local_reads'] = 0
+        self.hydrated = asyncio.Event()
+        self.file = None
+        self._present = None  # Present bitmap, one bit per chunk, once the copy is open
+        self._total = 0
+        self._nchunks = 0
+        self._hyd_buf = bytearray(HYDRATE_CHUNK_SECTORS * SECTOR_SIZE)
+        self._hyd_view = memoryview(self._hyd_buf)
+        self._hydrate_task = None
+        if 'unittest' not in sys.modules:
+            try:
+                self._hydrate_task = asyncio.create_task(self._safe_hydrate())
+            except Exception:
+                pass
+
+    def _has(self, chunk: int) -> bool:
+        return bool(self._present[chunk >> 3] & (1 << (chunk & 7)))
+
+    def _open_local(self, total: int) -> bool:
+        """Open (or start) the local copy for an image of `total` sectors."""
+        path = self.local_path
+        side = path + PRESENT_SUFFIX
+        nchunks = (total + HYDRATE_CHUNK_SECTORS - 1) // HYDRATE_CHUNK_SECTORS
+        present = bytearray((nchunks + 7) >> 3)
+        try:
+            os.stat(path)
+            exists = True
+        except OSError:
+            exists = False
+        try:
+            if exists:
+                with open(side, 'rb') as f:
+                    hdr = f.read(8)
+                    if hdr[:4] != _PRESENT_MAGIC or struct.unpack_from('>I', hdr, 4)[0] != total:
+                        raise OSError(22, 'stale')
+                    f.readinto(present)
+            else:
+                try:
+                    st = os.statvfs(RFM_BASE_DIR)
+                    if st[0] * st[3] < total * SECTOR_SIZE:
+                        resilience.log(f"Not hydrating '{path}': insufficient SD space", level=2)
+                        return False
+                except (OSError, AttributeError):
+                    pass
+                drop_image_sidecars(path)
+                # Sidecar first: an image file without one is taken as complete
+                with open(side, 'wb') as f:
+                    f.write(_PRESENT_MAGIC + struct.pack('>I', total))
+                    f.write(present)
+                with open(path, 'wb') as f:
+                    f.seek(total * SECTOR_SIZE - 1); f.write(b'\0')
+            self.file = open(path, 'r+b')
+        except OSError as e:
+            resilience.log(f"Not hydrating '{path}': no usable partial copy ({e})", level=2)
+            return False
+        self._present = present
+        self._total = total
+        self._nchunks = nchunks
+        done = 0
+        for c in range(nchunks):
+            if self._has(c): done += 1
+        self.stats['hydrate_chunks'] = done
+        self.stats['hydrate_total'] = nchunks
+        return True
+
+    def _save_present(self):
+        """Persist the present bitmap; the data it covers is flushed first."""
+        try:
+            self.file.flush()
+            # In place: bits only ever turn on, so a torn write is still safe
+            with open(self.local_path + PRESENT_SUFFIX, 'r+b') as f:
+                f.seek(8); f.write(self._present)
+        except OSError as e:
+            resilience.log(f"Hydration bitmap save failed '{self.local_path}': {e}", level=2)
+
+    async def _copy_chunk(self, chunk: int) -> bool:
+        """Copy one chunk into the local image and mark it present. Caller holds _fetch_lock."""
+        lsn = chunk * HYDRATE_CHUNK_SECTORS
+        count = min(HYDRATE_CHUNK_SECTORS, self._total - lsn)
+        n = count * SECTOR_SIZE
+        bm = self.bitmap
+        free = bm is not None
+        i = 0
+        while free and i < count:
+            free = bm.is_free(lsn + i); i += 1
+        try:
+            if free:
+                # Unallocated per the RBF bitmap: zeros, no network traffic
+                self.file.seek(lsn * SECTOR_SIZE)
+                for i in range(count): self.file.write(_PAD_256)
+            else:
+                sock = await resilience.open_remote_stream_async(self._sector_url(lsn, count), keep_alive=True)
+                if not sock:
+                    return False
+                try:
+                    if sock.length >= 0:
+                        self.stats['wire_bytes'] += sock.length
+                    pos = await sock.recv_into(self._hyd_view[:n])
+                    resilience.feed_wdt()
+                finally:
+                    sock.close()
+                if pos < n:
+                    resilience.log(f"Hydration of LSN {lsn}: short body {pos}/{n}", level=2)
+                    return False
+                self.file.seek(lsn * SECTOR_SIZE)
+                self.file.write(self._hyd_view[:n])
+        except OSError as e:
+            resilience.log(f"Hydration write failed at LSN {lsn}: {e}", level=3)
+            return False
+        self._present[chunk >> 3] |= 1 << (chunk & 7)
+        self.stats['hydrate_chunks'] += 1
+        return True
+
+    def _read_local(self, lsn: int, warm: bool = False) -> Optional[bytearray]:
+        try:
+            self.file.seek(lsn * SECTOR_SIZE)
+            n = self.file.readinto(self._ret_buf)
+        except OSError as e:
+            resilience.log(f"Hydrated read failed at LSN {lsn}: {e}", level=2)
+            return None
+        if not n:
+            return None
+        for i in range(n, SECTOR_SIZE):
+            self._ret_buf[i] = 0
+        self.stats['local_reads'] += 1
+        _observe_bitmap(self, lsn, self._ret_buf)
+        if _track_dir(self, lsn, self._ret_buf):
+            if lsn in self.directory_cache or (
+                    len(self.directory_cache) < MAX_DIR_CACHE_ENTRIES and self.cache.reserve()):
+                self.directory_cache.put(lsn, self._ret_buf)
+        else:
+            if not warm: self.stats['read_misses'] += 1
+            if self.cache.reserve():
+                self.read_cache.put(lsn, self._ret_buf)
+        return self._ret_buf
+
+    async def _fetch(self, lsn: int, bm, sequential: bool = False, warm: bool = False) -> Optional[bytearray]:
+        if self._present is not None and lsn < self._total:
+            chunk = lsn // HYDRATE_CHUNK_SECTORS
+            if self._has(chunk) or await self._copy_chunk(chunk):
+                data = self._read_local(lsn, warm)
+                if data is not None:
+                    return data
+        return await super()._fetch(lsn, bm, sequential, warm)
+
+    async def write_sector(self, lsn: int, data: Union[bytes, bytearray, memoryview]) -> bool:
+        if self._present is None or lsn >= self._total:
+            self.last_error = E_WP; return False  # Until the local copy is open
+        async with self._fetch_lock:
+            chunk = lsn // HYDRATE_CHUNK_SECTORS
+            copied = not self._has(chunk)
+            # The rest of the chunk must land before this sector can be written
+            if copied and not await self._copy_chunk(chunk):
+                self.stats['errors'] += 1; self.last_error = E_NOTRDY
+                return False
+            try:
+                self.file.seek(lsn * SECTOR_SIZE)
+                self.file.write(data)
+                # The local copy now differs from the server: a chunk copied
+                # for this write must not be fetched again after a reboot.
+                if copied: self._save_present()
+                else: self.file.flush()
+            except OSError as e:
+                resilience.log(f"Hydrated write failed at LSN {lsn}: {e}", level=3)
+                self.stats['errors'] += 1; self.last_error = E_READ
+                return False
+        self.stats['writes'] += 1
+        _observe_bitmap(self, lsn, data, True)
+        if lsn in self.directory_cache: self.directory_cache.put(lsn, data)
+        elif lsn in self.read_cache: self.read_cache.put(lsn, data)
+        return True
+
+    async def flush(self):
+        if self.file:
+            self.file.flush()
+
+    async def _safe_hydrate(self):
+        try:
+            lsn0 = await self.read_sector(0)
+            if lsn0 is None:
+                self.stats['hydrate_state'] = 3
+                return
+            total = (lsn0[0] << 16) | (lsn0[1] << 8) | lsn0[2]
+            if not total or not self._open_local(total):
+                self.stats['hydrate_state'] = 3
+                return
+            await self._hydrate()
+        except Exception as e:
+            resilience.log(f"Hydration of '{self.url}' stopped: {e}", level=2)
+            self.stats['hydrate_state'] = 3
+
+    async def _hydrate(self):
+        """Copy every missing chunk, then retire the sidecar and signal `hydrated`."""
+        self.stats['hydrate_state'] = 1
+        resilience.log(f"Hydrating '{self.url}' to '{self.local_path}'", level=1)
+        chunk = 0; unsaved = 0; failures = 0
+        while chunk < self._nchunks:
+            if self._has(chunk):
+                chunk += 1
+                if not chunk & 0xFF: await asyncio.sleep(0)
+                continue
+            async with self._fetch_lock:
+                ok = self._has(chunk) or await self._copy_chunk(chunk)
+            resilience.feed_wdt()
+            if not ok:
+                # Server unreachable: keep serving what has landed and retry later
+                failures += 1
+                await asyncio.sleep(min(60, 2 << failures))
+                continue
+            failures = 0; chunk += 1; unsaved += 1
+            if unsaved >= HYDRATE_SAVE_CHUNKS:
+                self._save_present(); unsaved = 0
+            await asyncio.sleep(0.02)  # Leave the WiFi link to the CoCo's own misses
+        self.file.close()
+        self.file = None
+        self._present = None
+        try: os.remove(self.local_path + PRESENT_SUFFIX)
+        except OSError: pass
+        self.stats['hydrate_state'] = 2
+        resilience.log(f"Hydration of '{self.local_path}' complete", level=1)
+        self.hydrated.set()
+
+    async def close(self):
+        if self._hydrate_task:
+            self._hydrate_task.cancel(); self._hydrate_task = None
+        if self.file:
+            self._save_present()
+            self.file.close()
+            self.file = None
+        self._present = None
+        self.hydrated.set()  # Release the server's promotion wait; hydrate_state tells
+        await super().close()
 
 
 class DriveWireServer:
@@ -431,6 +1625,7 @@ class DriveWireServer:
         self.uart = None
         self.drives = [None] * NUM_DRIVES
         self.running = False
+        self.bus_idle = True  # No opcode since the last UART idle timeout; background work may run
         self.print_buffer = bytearray()
         self.stats = {
             'last_opcode': None, 'last_drive': None, 'serial': {},
@@ -451,6 +1646,8 @@ class DriveWireServer:
         self._read_resp = bytearray(259)
         self._ser_resp = bytearray(2)
         self._err_resp = bytearray(1)
+        self._checkpoint_event = asyncio.Event()  # Set when a journaled drive wants a checkpoint
+        self._dispatch = self._build_dispatch()
         self.init_uart()
 
     def log_msg(self, msg: str):
@@ -466,10 +1663,14 @@ class DriveWireServer:
     def init_uart(self):
         baud = self.config.get('baud_rate', 115200)
         try:
-            self.uart = UART(0, baudrate=baud, tx=0, rx=1, timeout=10)
+            # timeout=0: readinto() returns what is buffered instead of blocking
+            # the event loop; waiting is done by _await_rx() on the stream.
+            self.uart = UART(0, baudrate=baud, tx=0, rx=1, timeout=0)
+            self._rx_stream = asyncio.StreamReader(self.uart)
         except Exception as e:
             resilience.log(f"UART init failed (baud={baud}): {e}", level=4)
             self.uart = None
+            self._rx_stream = None
 
     async def init_drives(self):
         # Reload-safe: never overwrite a live drive without flushing+closing it
@@ -494,17 +1695,41 @@ class DriveWireServer:
                 if same:
                     continue
 
-            new_drive = RemoteDrive(path) if is_remote else VirtualDrive(path)
+            if not is_remote:
+                new_drive = VirtualDrive(path)
+            elif self.config.get('hydrate_remote', False):
+                new_drive = HydratingDrive(path)
+            else:
+                new_drive = RemoteDrive(path)
             await self.swap_drive(i, new_drive)
+            if isinstance(new_drive, HydratingDrive):
+                asyncio.create_task(self._promote_when_hydrated(i, new_drive))
+
+    async def _promote_when_hydrated(self, drive_num: int, drive):
+        """Replace a HydratingDrive with a VirtualDrive on its copy once complete."""
+        await drive.hydrated.wait()
+        if drive.stats['hydrate_state'] != 2 or self.drives[drive_num] is not drive:
+            return
+        new_drive = VirtualDrive(drive.local_path)
+        if not new_drive.file:
+            resilience.log(f"Hydrated image '{drive.local_path}' failed to open", level=3)
+            return
+        await self.swap_drive(drive_num, new_drive)
+        # Point the slot at the local copy so the next boot mounts it directly
+        drives = list(self.config.get('drives', []))
+        if drive_num < len(drives):
+            drives[drive_num] = drive.local_path
+            self.config.set('drives', drives)
 
     async def swap_drive(self, drive_num: int, new_drive):
         if 0 <= drive_num < NUM_DRIVES:
             old_drive = self.drives[drive_num]
             if old_drive:
-                if old_drive.filename == new_drive.filename:
-                    new_drive.read_cache = old_drive.read_cache
-                    new_drive.directory_cache = old_drive.directory_cache
+                if old_drive.filename == new_drive.filename or \
+                        getattr(old_drive, 'local_path', None) == new_drive.filename:
+                    old_drive.cache.pool.transfer(old_drive.cache, new_drive.cache)
                     new_drive.dir_lsns = old_drive.dir_lsns
+                    new_drive.bitmap = old_drive.bitmap
                 await old_drive.close()
             self.drives[drive_num] = new_drive
 
@@ -534,23 +1759,39 @@ class DriveWireServer:
         return s & 0xFFFF
 
     async def read_bytes(self, count: int, offset: int = 0) -> Optional[memoryview]:
-        """Read exact number of bytes from UART with WDT feed and 5s timeout."""
-        if offset + count > len(self._rx_buf): return None
-        pos = 0; start_t = utime.ticks_us(); last_wdt_t = start_t
-        while pos < count:
-            if self.uart.any():
-                n = self.uart.readinto(self._rx_view[offset + pos : offset + count])
-                if n: 
-                    pos += n; start_t = utime.ticks_us(); last_wdt_t = start_t
+        """Read exactly `count` bytes from the UART into _rx_buf at `offset`.
+
+        Bytes already in the UART FIFO are drained without yielding. When the
+        FIFO runs dry mid-transaction the task parks on the UART stream until
+        the next byte arrives, so the web server and TCP channel readers keep
+        running. Returns None after UART_RX_TIMEOUT_MS of silence.
+        """
+        end = offset + count
+        if end > len(self._rx_buf): return None
+        uart = self.uart; view = self._rx_view
+        pos = offset
+        while pos < end:
+            avail = uart.any()
+            if avail:
+                # Never ask for more than is buffered: readinto() must not block
+                pos += uart.readinto(view[pos:min(end, pos + avail)]) or 0
             else:
-                now = utime.ticks_us()
-                # Timeout after 5 seconds of no data
-                if utime.ticks_diff(now, start_t) > 5_000_000:
-                    return None
-                # Feed WDT every ~100ms during idle waits
-                if utime.ticks_diff(now, last_wdt_t) > 100_000:
-                    resilience.feed_wdt(); last_wdt_t = now
-        return self._rx_view[offset : offset + count]
+                n = await self._await_rx(view[pos:pos + 1], UART_RX_TIMEOUT_MS)
+                if n is None: return None
+                pos += n
+        return view[offset:end]
+
+    async def _await_rx(self, buf, timeout_ms: int) -> Optional[int]:
+        """Suspend until the UART is readable, then read into `buf`.
+
+        Returns the byte count read, or None if nothing arrived within timeout_ms.
+        """
+        try:
+            n = await asyncio.wait_for_ms(self._rx_stream.readinto(buf), timeout_ms)
+        except asyncio.TimeoutError:
+            return None
+        resilience.feed_wdt()
+        return n or 0
 
     async def tcp_reader_task(self, chan, reader):
         try:
@@ -575,8 +1816,14 @@ class DriveWireServer:
             except Exception as e: resilience.log(f"close_tcp error ch{chan}: {e}", level=0)
 
     async def flush_loop(self):
+        """Checkpoint dirty sectors every FLUSH_INTERVAL_MS, or as soon as a
+        journaled drive asks for it (see VirtualDrive.checkpoint_due)."""
         while self.running:
-            await asyncio.sleep(60)
+            try:
+                await asyncio.wait_for_ms(self._checkpoint_event.wait(), FLUSH_INTERVAL_MS)
+            except asyncio.TimeoutError:
+                pass
+            self._checkpoint_event.clear()
             for d in self.drives:
                 if d and hasattr(d, 'dirty_sectors') and d.dirty_sectors:
                     try:
@@ -584,334 +1831,50 @@ class DriveWireServer:
                     except Exception as e:
                         resilience.log(f"Periodic flush error: {e}", level=3)
                     resilience.feed_wdt()
+                # Persist newly learned directory LSNs for the next warm start
+                if d and hasattr(d, 'save_meta'):
+                    d.save_meta()
 
     async def run(self):
         self.running = True
         await self.init_drives()
         flush_task = asyncio.create_task(self.flush_loop())
-        loop_counter = 0
+        idle_wakeups = 0
         # Must be initialized before the loop: if the UART has data on the very
         # first iteration the idle branch (which used to seed this) is skipped,
         # and the `consecutive_opcodes += 1` below would raise UnboundLocalError.
         consecutive_opcodes = 0
+        op_view = self._rx_view[0:1]
         try:
             while self.running:
                 try:
-                    if not self.uart.any():
-                        await asyncio.sleep(0.01); loop_counter += 1
-                        if loop_counter >= 50: gc.collect(); loop_counter = 0
-                        consecutive_opcodes = 0
-                        continue
+                    if self.uart.any():
+                        n = self.uart.readinto(op_view)
+                    else:
+                        # Sleep on the UART stream until the CoCo sends an opcode;
+                        # the timeout only bounds stop() latency and idle GC.
+                        n = await self._await_rx(op_view, UART_IDLE_WAIT_MS)
+                        if n is None:
+                            self.bus_idle = True
+                            # Bus idle: remote drives queue the burst's writes for a PUT
+                            for d in self.drives:
+                                if d:
+                                    commit = getattr(d, 'commit', None)
+                                    if commit: commit()
+                                    if getattr(d, 'checkpoint_due', False): self._checkpoint_event.set()
+                            consecutive_opcodes = 0; idle_wakeups += 1
+                            if idle_wakeups >= IDLE_GC_WAKEUPS: gc.collect(); idle_wakeups = 0
+                            continue
+                    if not n: continue
+                    self.bus_idle = False
                     req_start_t = utime.ticks_us()
-                    op_data = await self.read_bytes(1)
-                    if not op_data: continue
-                    opcode = op_data[0]; self.stats['last_opcode'] = opcode
-                    if opcode in (OP_RESET, OP_RESET2, OP_RESET3):
-                        while self.uart.any(): self.uart.read()
-                        continue
-                    elif opcode in (OP_INIT, OP_TERM, OP_NOP):
-                        continue
-                    elif opcode == OP_DWINIT:
-                        cap = await self.read_bytes(1)
-                        if cap: self.uart.write(_RESP_OK)
-                    elif opcode in (OP_READ, OP_READEX, OP_REREAD, OP_REREADEX):
-                        is_extended = opcode in (OP_READEX, OP_REREADEX)
-                        header = await self.read_bytes(4)
-                        if header:
-                            drive_num, lsn = header[0], (header[1] << 16) | (header[2] << 8) | header[3]
-                            if drive_num < NUM_DRIVES and self.drives[drive_num]:
-                                data = await self.drives[drive_num].read_sector(lsn)
-                                if data is not None:
-                                    cs = self.checksum(data)
-                                    if is_extended:
-                                        self.uart.write(data); self.uart.write(_RESP_OK)
-                                        coco_cs_bytes = await self.read_bytes(2)
-                                        if coco_cs_bytes:
-                                            coco_cs = (coco_cs_bytes[0] << 8) | coco_cs_bytes[1]
-                                            self.uart.write(_RESP_OK if coco_cs == cs else _RESP_CRC)
-                                    else:
-                                        self._read_resp[0] = 0; struct.pack_into(">H", self._read_resp, 1, cs)
-                                        self._read_resp[3:259] = data; self.uart.write(self._read_resp)
-                                else:
-                                    err = getattr(self.drives[drive_num], 'last_error', E_UNIT) or E_UNIT
-                                    self._err_resp[0] = err
-                                    if is_extended:
-                                        self.uart.write(_PAD_256)
-                                        if await self.read_bytes(2) is not None:
-                                            self.uart.write(self._err_resp)
-                                    else: self.uart.write(self._err_resp)
-                            else:
-                                if is_extended:
-                                    self.uart.write(_PAD_256)
-                                    if await self.read_bytes(2) is not None:
-                                        self.uart.write(_RESP_UNIT)
-                                else: self.uart.write(_RESP_UNIT)
-                    elif opcode in (OP_WRITE, OP_REWRITE):
-                        header = await self.read_bytes(4)
-                        if header:
-                            drive_num, lsn = header[0], (header[1] << 16) | (header[2] << 8) | header[3]
-                            data_view = await self.read_bytes(SECTOR_SIZE, offset=4) # Read after header
-                            if not data_view:
-                                continue  # UART timeout mid-transaction, CoCo already timed out
-                            cs_bytes = await self.read_bytes(2, offset=0) # Reuse start of buffer for CS
-                            if not cs_bytes:
-                                continue  # UART timeout reading checksum
-                            remote_cs = (cs_bytes[0] << 8) | cs_bytes[1]
-                            if remote_cs == self.checksum(data_view):
-                                success = False
-                                if drive_num < NUM_DRIVES and self.drives[drive_num]:
-                                    success = await self.drives[drive_num].write_sector(lsn, data_view)
-                                if success:
-                                    self.uart.write(_RESP_OK)
-                                elif drive_num < NUM_DRIVES and self.drives[drive_num]:
-                                    err = self.drives[drive_num].last_error or E_READ
-                                    self._err_resp[0] = err; self.uart.write(self._err_resp)
-                                else:
-                                    self.uart.write(_RESP_UNIT)
-                            else: self.uart.write(_RESP_CRC)
-                    elif opcode == OP_TIME:
-                        try:
-                            t = time_sync.get_local_time(); year = max(0, min(255, t[0] - 1900))
-                            _TIME_BUF[0] = year; _TIME_BUF[1] = t[1]; _TIME_BUF[2] = t[2]
-                            _TIME_BUF[3] = t[3]; _TIME_BUF[4] = t[4]; _TIME_BUF[5] = t[5]
-                            self.uart.write(_TIME_BUF)
-                        except Exception as e:
-                            resilience.log(f"OP_TIME error: {e}", level=2)
-                            self.uart.write(_TIME_FALLBACK)
-                    elif opcode == OP_PRINT:
-                        b = await self.read_bytes(1)
-                        if b:
-                            if len(self.print_buffer) < 4096:
-                                self.print_buffer.append(b[0])
-                    elif opcode == OP_PRINTFLUSH:
-                        self.print_buffer.clear()
-                    elif opcode in (OP_GETSTAT, OP_SETSTAT):
-                        req = await self.read_bytes(2)
-                        if req: self.stats['last_drive'], self.stats['last_stat'] = req[0], req[1]
-                    elif opcode == OP_SERREAD:
-                        found_channel = -1
-                        if self._active_channels:
-                            found_channel = next(iter(self._active_channels))
-                        if found_channel >= 0:
-                            ch_idx = found_channel
-                            if len(self.channels[ch_idx]) == 1:
-                                data_byte = self.channels[ch_idx].pop(0)
-                                self._ser_resp[0], self._ser_resp[1] = ch_idx + 1, data_byte
-                                self.uart.write(self._ser_resp)
-                                self._active_channels.discard(ch_idx)
-                            else:
-                                count = min(len(self.channels[ch_idx]), 255)
-                                self._ser_resp[0], self._ser_resp[1] = ch_idx + 17, count
-                                self.uart.write(self._ser_resp)
-                            if ch_idx not in self.stats['serial']: self.stats['serial'][ch_idx] = {'tx':0, 'rx':0}
-                            self.stats['serial'][ch_idx]['rx'] += 1
-                        else: self.uart.write(_RESP_2ZERO)
-                    elif opcode == OP_SERWRITE:
-                        req = await self.read_bytes(2)
-                        if req:
-                            chan, val = req[0], req[1]
-                            if chan in self.tcp_connections:
-                                try:
-                                    _, writer, _ = self.tcp_connections[chan]
-                                    _SER_WRITE_BUF[0] = val
-                                    writer.write(_SER_WRITE_BUF); await writer.drain()
-                                    if chan not in self.stats['serial']: self.stats['serial'][chan] = {'tx':0, 'rx':0}
-                                    self.stats['serial'][chan]['tx'] += 1
-                                    self.snoop_serial(chan, val)
-                                except Exception as e:
-                                    resilience.log(f"OP_SERWRITE error on ch{chan}: {e}", level=2)
-                                    await self.close_tcp(chan)
-                    elif opcode == OP_SERREADM:
-                        req = await self.read_bytes(2)
-                        if req:
-                            chan, count = req[0], req[1]
-                            if chan < len(self.channels) and len(self.channels[chan]) >= count:
-                                self.uart.write(memoryview(self.channels[chan])[:count])
-                                del self.channels[chan][:count]
-                                if not self.channels[chan]:
-                                    self._active_channels.discard(chan)
-                                if chan not in self.stats['serial']: self.stats['serial'][chan] = {'tx':0, 'rx':0}
-                                self.stats['serial'][chan]['rx'] += count
-                            else:
-                                pass
-                    elif opcode == OP_SERWRITEM:
-                        req = await self.read_bytes(2)
-                        if req:
-                            chan, count = req[0], req[1]
-                            data = await self.read_bytes(count)
-                            if data:
-                                if chan in self.tcp_connections:
-                                    try:
-                                        _, writer, _ = self.tcp_connections[chan]
-                                        writer.write(data); await writer.drain()
-                                        if chan not in self.stats['serial']: self.stats['serial'][chan] = {'tx':0, 'rx':0}
-                                        self.stats['serial'][chan]['tx'] += count
-                                        self.snoop_serial(chan, data)
-                                    except Exception as e:
-                                        resilience.log(f"OP_SERWRITEM write error on ch{chan}: {e}", level=2)
-                                        await self.close_tcp(chan)
-                    elif 0x80 <= opcode <= 0x8F:
-                        b = await self.read_bytes(1)
-                        if b:
-                            chan = opcode & 0x0F
-                            val = b[0]
-                            if chan in self.tcp_connections:
-                                try:
-                                    _, writer, _ = self.tcp_connections[chan]
-                                    _SER_WRITE_BUF[0] = val
-                                    writer.write(_SER_WRITE_BUF); await writer.drain()
-                                    if chan not in self.stats['serial']: self.stats['serial'][chan] = {'tx':0, 'rx':0}
-                                    self.stats['serial'][chan]['tx'] += 1
-                                    self.snoop_serial(chan, val)
-                                except Exception as e:
-                                    resilience.log(f"Fastwrite error on ch{chan}: {e}", level=2)
-                                    await self.close_tcp(chan)
-                    elif opcode == OP_SERINIT:
-                        req = await self.read_bytes(1)
-                        if req:
-                            chan = req[0]
-                            await self.init_channel(chan)
-                    elif opcode == OP_SERTERM:
-                        req = await self.read_bytes(1)
-                        if req:
-                            chan = req[0]
-                            await self.close_tcp(chan)
-                            if chan < len(self.channels):
-                                self.channels[chan].clear()
-                                self._active_channels.discard(chan)
-                    elif opcode == OP_SERSETSTAT:
-                        req = await self.read_bytes(2)
-                        if req:
-                            chan, code = req[0], req[1]
-                            if code == 0x28:
-                                desc = await self.read_bytes(26)
-                            elif code == 0x29:
-                                await self.init_channel(chan)
-                            elif code == 0x2A:
-                                await self.close_tcp(chan)
-                                if chan < len(self.channels):
-                                    self.channels[chan].clear()
-                                    self._active_channels.discard(chan)
-                    elif opcode == OP_RFM:
-                        sub_op_b = await self.read_bytes(1)
-                        if sub_op_b:
-                            sub = sub_op_b[0]
-                            if sub == OP_RFM_OPEN:
-                                h = await self.read_bytes(7)
-                                if h:
-                                    addr, mode, length = (h[2]<<8)|h[3], h[4], (h[5]<<8)|h[6]
-                                    pb = await self.read_bytes(length)
-                                    ec = 216
-                                    if pb:
-                                        p = self._sanitize_rfm_path(bytes(pb).decode('ascii', 'ignore'))
-                                        if p:
-                                            if len(self.rfm_paths) >= 8:
-                                                ec = 207
-                                            else:
-                                                try:
-                                                    self.rfm_paths[addr] = {'handle': open(p, 'rb' if not (mode & 2) else 'r+b'), 'mode': mode}
-                                                    ec = 0; activity_led.blink()
-                                                except Exception as e:
-                                                    resilience.log(f"RFM open error: {e}", level=2)
-                                    _RFM_RESP[0] = ec
-                                    self.uart.write(_RFM_RESP)
-                            elif sub == OP_RFM_CHGDIR:
-                                h = await self.read_bytes(7)
-                                if h:
-                                    length = (h[5]<<8)|h[6]; pb = await self.read_bytes(length); ec = 0
-                                    if pb:
-                                        p = self._sanitize_rfm_path(bytes(pb).decode('ascii', 'ignore'))
-                                        try: os.stat(p)
-                                        except OSError as e:
-                                            resilience.log(f"RFM chgdir stat error: {e}", level=2)
-                                            ec = 216
-                                    _RFM_RESP[0] = ec
-                                    self.uart.write(_RFM_RESP)
-                            elif sub == OP_RFM_SEEK:
-                                h = await self.read_bytes(7)
-                                if h:
-                                    addr, pos = (h[0]<<8)|h[1], (h[3]<<24)|(h[4]<<16)|(h[5]<<8)|h[6]
-                                    ec = 207
-                                    if addr in self.rfm_paths:
-                                        try:
-                                            self.rfm_paths[addr]['handle'].seek(pos)
-                                            ec = 0
-                                            activity_led.blink()
-                                        except Exception as e:
-                                            resilience.log(f"RFM seek error: {e}", level=2)
-                                            ec = 211
-                                    _RFM_ERR_RESP[0] = ec
-                                    self.uart.write(_RFM_ERR_RESP)
-                            elif sub == OP_RFM_READ:
-                                h = await self.read_bytes(5)
-                                if h:
-                                    addr, count = (h[0]<<8)|h[1], (h[3]<<8)|h[4]; ec, data = 207, b""
-                                    if addr in self.rfm_paths:
-                                        try:
-                                            data = self.rfm_paths[addr]['handle'].read(count) or b""
-                                            ec = 0 if data else 211; activity_led.blink()
-                                        except Exception as e:
-                                            resilience.log(f"RFM read error: {e}", level=2)
-                                            ec = 211
-                                    _RFM_READ_RESP[0] = ec
-                                    _RFM_READ_RESP[1] = (len(data)>>8)&0xFF
-                                    _RFM_READ_RESP[2] = len(data)&0xFF
-                                    self.uart.write(_RFM_READ_RESP)
-                                    if ec == 0:
-                                        ack = await self.read_bytes(1)
-                                        if ack and ack[0] == 0: self.uart.write(data)
-                            elif sub == OP_RFM_CLOSE:
-                                h = await self.read_bytes(4)
-                                if h:
-                                    addr = (h[2]<<8)|h[3]; ec = 0
-                                    if addr in self.rfm_paths:
-                                        try:
-                                            self.rfm_paths[addr]['handle'].close()
-                                            del self.rfm_paths[addr]
-                                            activity_led.blink()
-                                        except Exception as e:
-                                            resilience.log(f"RFM close error: {e}", level=2)
-                                            ec = 214
-                                    else: ec = 207
-                                    _RFM_ERR_RESP[0] = ec
-                                    self.uart.write(_RFM_ERR_RESP)
-                            else:
-                                # Unhandled RFM sub-op (e.g. WRITE/GETSTT/SETSTT/
-                                # MAKDIR/DELETE). Returning an unknown-service
-                                # error unblocks the client instead of leaving it
-                                # to hang forever waiting on a response.
-                                resilience.log(f"Unhandled RFM sub-op {sub:#04x}; returning E_UNKSVC", level=2)
-                                _RFM_ERR_RESP[0] = E_UNKSVC
-                                self.uart.write(_RFM_ERR_RESP)
-                    elif opcode == OP_NAMEOBJ_MOUNT or opcode == OP_NAMEOBJ_CREATE:
-                        ln_b = await self.read_bytes(1, offset=1)
-                        if ln_b:
-                            ln = ln_b[0]; name_b = await self.read_bytes(ln, offset=2)
-                            if name_b:
-                                try:
-                                    name = bytes(name_b).decode('ascii', 'ignore'); free_drive = -1
-                                    for i in range(NUM_DRIVES):
-                                        if self.drives[i] is None: free_drive = i; break
-                                    if free_drive >= 0:
-                                        if any(seg == '..' for seg in name.split('/')) or not name.endswith('.dsk'):
-                                            self.uart.write(_RESP_0xFF)
-                                        else:
-                                            try:
-                                                vd = VirtualDrive(name)
-                                                if vd.file:
-                                                    self.drives[free_drive] = vd
-                                                    self._err_resp[0] = free_drive
-                                                    self.uart.write(self._err_resp)
-                                                else:
-                                                    self.uart.write(_RESP_0xFF)
-                                            except Exception as e:
-                                                resilience.log(f"NAMEOBJ mount VirtualDrive error: {e}", level=2)
-                                                self.uart.write(_RESP_0xFF)
-                                    else:
-                                        self.uart.write(_RESP_0xFF)
-                                except Exception as e:
-                                    resilience.log(f"NAMEOBJ protocol error: {e}", level=2)
-                                    self.uart.write(_RESP_0xFF)
+                    opcode = self._rx_buf[0]; self.stats['last_opcode'] = opcode
+                    try:
+                        await self._dispatch[opcode](opcode)
+                    except Exception as e:
+                        # Isolate a failing handler: log it and resync on the next opcode
+                        resilience.log(f"Opcode {opcode:#04x} handler error: {e}", level=3)
+                    self.stats['latency']['total_request_us'] = utime.ticks_diff(utime.ticks_us(), req_start_t)
                     resilience.feed_wdt()
                     consecutive_opcodes += 1
                     if consecutive_opcodes >= 32:
@@ -944,6 +1907,356 @@ class DriveWireServer:
                 try: await self.close_tcp(chan)
                 except Exception: pass
 
+    def _build_dispatch(self) -> list:
+        """Build the 256-entry opcode -> bound handler table used by run().
+
+        Unassigned opcodes map to _op_ignore, so dispatch is a single list index
+        regardless of how many opcodes are implemented.
+        """
+        t = [self._op_ignore] * 256
+        t[OP_RESET] = t[OP_RESET2] = t[OP_RESET3] = self._op_reset
+        t[OP_DWINIT] = self._op_dwinit
+        t[OP_READ] = t[OP_REREAD] = self._op_read
+        t[OP_READEX] = t[OP_REREADEX] = self._op_readex
+        t[OP_WRITE] = t[OP_REWRITE] = self._op_write
+        t[OP_TIME] = self._op_time
+        t[OP_PRINT] = self._op_print
+        t[OP_PRINTFLUSH] = self._op_printflush
+        t[OP_GETSTAT] = t[OP_SETSTAT] = self._op_stat
+        t[OP_SERREAD] = self._op_serread
+        t[OP_SERWRITE] = self._op_serwrite
+        t[OP_SERREADM] = self._op_serreadm
+        t[OP_SERWRITEM] = self._op_serwritem
+        for op in range(OP_FASTWRITE, OP_FASTWRITE + 16):
+            t[op] = self._op_fastwrite
+        t[OP_SERINIT] = self._op_serinit
+        t[OP_SERTERM] = self._op_serterm
+        t[OP_SERSETSTAT] = self._op_sersetstat
+        t[OP_RFM] = self._op_rfm
+        t[OP_NAMEOBJ_MOUNT] = t[OP_NAMEOBJ_CREATE] = self._op_nameobj_mount
+        return t
+
+    async def _op_ignore(self, opcode: int):
+        """OP_NOP, OP_INIT, OP_TERM and any opcode without a handler."""
+        pass
+
+    async def _op_reset(self, opcode: int):
+        while self.uart.any(): self.uart.read()
+
+    async def _op_dwinit(self, opcode: int):
+        cap = await self.read_bytes(1)
+        if cap: self.uart.write(_RESP_OK)
+
+    async def _op_read(self, opcode: int):
+        """OP_READ / OP_REREAD: [err, cs_hi, cs_lo] + 256 bytes in one write."""
+        header = await self.read_bytes(4)
+        if not header: return
+        drive_num, lsn = header[0], (header[1] << 16) | (header[2] << 8) | header[3]
+        if drive_num < NUM_DRIVES and self.drives[drive_num]:
+            data = await self.drives[drive_num].read_sector(lsn)
+            if data is not None:
+                self._read_resp[0] = 0; struct.pack_into(">H", self._read_resp, 1, self.checksum(data))
+                self._read_resp[3:259] = data; self.uart.write(self._read_resp)
+            else:
+                self._err_resp[0] = getattr(self.drives[drive_num], 'last_error', E_UNIT) or E_UNIT
+                self.uart.write(self._err_resp)
+        else:
+            self.uart.write(_RESP_UNIT)
+
+    async def _op_readex(self, opcode: int):
+        """OP_READEX / OP_REREADEX: 256 bytes, CoCo checksum, then status byte."""
+        header = await self.read_bytes(4)
+        if not header: return
+        drive_num, lsn = header[0], (header[1] << 16) | (header[2] << 8) | header[3]
+        if drive_num < NUM_DRIVES and self.drives[drive_num]:
+            data = await self.drives[drive_num].read_sector(lsn)
+            if data is not None:
+                cs = self.checksum(data)
+                self.uart.write(data); self.uart.write(_RESP_OK)
+                coco_cs_bytes = await self.read_bytes(2)
+                if coco_cs_bytes:
+                    coco_cs = (coco_cs_bytes[0] << 8) | coco_cs_bytes[1]
+                    self.uart.write(_RESP_OK if coco_cs == cs else _RESP_CRC)
+            else:
+                self._err_resp[0] = getattr(self.drives[drive_num], 'last_error', E_UNIT) or E_UNIT
+                self.uart.write(_PAD_256)
+                if await self.read_bytes(2) is not None:
+                    self.uart.write(self._err_resp)
+        else:
+            self.uart.write(_PAD_256)
+            if await self.read_bytes(2) is not None:
+                self.uart.write(_RESP_UNIT)
+
+    async def _op_write(self, opcode: int):
+        header = await self.read_bytes(4)
+        if not header: return
+        drive_num, lsn = header[0], (header[1] << 16) | (header[2] << 8) | header[3]
+        data_view = await self.read_bytes(SECTOR_SIZE, offset=4) # Read after header
+        if not data_view:
+            return  # UART timeout mid-transaction, CoCo already timed out
+        cs_bytes = await self.read_bytes(2, offset=0) # Reuse start of buffer for CS
+        if not cs_bytes:
+            return  # UART timeout reading checksum
+        remote_cs = (cs_bytes[0] << 8) | cs_bytes[1]
+        if remote_cs != self.checksum(data_view):
+            self.uart.write(_RESP_CRC); return
+        success = False
+        if drive_num < NUM_DRIVES and self.drives[drive_num]:
+            success = await self.drives[drive_num].write_sector(lsn, data_view)
+        if success:
+            self.uart.write(_RESP_OK)
+            if getattr(self.drives[drive_num], 'checkpoint_due', False):
+                self._checkpoint_event.set()
+        elif drive_num < NUM_DRIVES and self.drives[drive_num]:
+            self._err_resp[0] = self.drives[drive_num].last_error or E_READ
+            self.uart.write(self._err_resp)
+        else:
+            self.uart.write(_RESP_UNIT)
+
+    async def _op_time(self, opcode: int):
+        try:
+            t = time_sync.get_local_time(); year = max(0, min(255, t[0] - 1900))
+            _TIME_BUF[0] = year; _TIME_BUF[1] = t[1]; _TIME_BUF[2] = t[2]
+            _TIME_BUF[3] = t[3]; _TIME_BUF[4] = t[4]; _TIME_BUF[5] = t[5]
+            self.uart.write(_TIME_BUF)
+        except Exception as e:
+            resilience.log(f"OP_TIME error: {e}", level=2)
+            self.uart.write(_TIME_FALLBACK)
+
+    async def _op_print(self, opcode: int):
+        b = await self.read_bytes(1)
+        if b and len(self.print_buffer) < 4096:
+            self.print_buffer.append(b[0])
+
+    async def _op_printflush(self, opcode: int):
+        self.print_buffer.clear()
+
+    async def _op_stat(self, opcode: int):
+        """OP_GETSTAT / OP_SETSTAT: informational only."""
+        req = await self.read_bytes(2)
+        if req: self.stats['last_drive'], self.stats['last_stat'] = req[0], req[1]
+
+    def _count_serial(self, chan: int, key: str, n: int):
+        if chan not in self.stats['serial']: self.stats['serial'][chan] = {'tx':0, 'rx':0}
+        self.stats['serial'][chan][key] += n
+
+    async def _op_serread(self, opcode: int):
+        if not self._active_channels:
+            self.uart.write(_RESP_2ZERO); return
+        ch_idx = next(iter(self._active_channels))
+        if len(self.channels[ch_idx]) == 1:
+            data_byte = self.channels[ch_idx].pop(0)
+            self._ser_resp[0], self._ser_resp[1] = ch_idx + 1, data_byte
+            self.uart.write(self._ser_resp)
+            self._active_channels.discard(ch_idx)
+        else:
+            count = min(len(self.channels[ch_idx]), 255)
+            self._ser_resp[0], self._ser_resp[1] = ch_idx + 17, count
+            self.uart.write(self._ser_resp)
+        self._count_serial(ch_idx, 'rx', 1)
+
+    async def _tcp_write_byte(self, chan: int, val: int, label: str):
+        """Forward one CoCo byte to the TCP connection mapped to `chan`."""
+        if chan not in self.tcp_connections: return
+        try:
+            _, writer, _ = self.tcp_connections[chan]
+            _SER_WRITE_BUF[0] = val
+            writer.write(_SER_WRITE_BUF); await writer.drain()
+            self._count_serial(chan, 'tx', 1)
+            self.snoop_serial(chan, val)
+        except Exception as e:
+            resilience.log(f"{label} error on ch{chan}: {e}", level=2)
+            await self.close_tcp(chan)
+
+    async def _op_serwrite(self, opcode: int):
+        req = await self.read_bytes(2)
+        if req: await self._tcp_write_byte(req[0], req[1], "OP_SERWRITE")
+
+    async def _op_fastwrite(self, opcode: int):
+        """OP_FASTWRITE range $80-$8F: channel is the low nibble of the opcode."""
+        b = await self.read_bytes(1)
+        if b: await self._tcp_write_byte(opcode & 0x0F, b[0], "Fastwrite")
+
+    async def _op_serreadm(self, opcode: int):
+        req = await self.read_bytes(2)
+        if not req: return
+        chan, count = req[0], req[1]
+        if chan < len(self.channels) and len(self.channels[chan]) >= count:
+            self.uart.write(memoryview(self.channels[chan])[:count])
+            del self.channels[chan][:count]
+            if not self.channels[chan]:
+                self._active_channels.discard(chan)
+            self._count_serial(chan, 'rx', count)
+
+    async def _op_serwritem(self, opcode: int):
+        req = await self.read_bytes(2)
+        if not req: return
+        chan, count = req[0], req[1]
+        data = await self.read_bytes(count)
+        if data and chan in self.tcp_connections:
+            try:
+                _, writer, _ = self.tcp_connections[chan]
+                writer.write(data); await writer.drain()
+                self._count_serial(chan, 'tx', count)
+                self.snoop_serial(chan, data)
+            except Exception as e:
+                resilience.log(f"OP_SERWRITEM write error on ch{chan}: {e}", level=2)
+                await self.close_tcp(chan)
+
+    async def _op_serinit(self, opcode: int):
+        req = await self.read_bytes(1)
+        if req: await self.init_channel(req[0])
+
+    async def _term_channel(self, chan: int):
+        await self.close_tcp(chan)
+        if chan < len(self.channels):
+            self.channels[chan].clear()
+            self._active_channels.discard(chan)
+
+    async def _op_serterm(self, opcode: int):
+        req = await self.read_bytes(1)
+        if req: await self._term_channel(req[0])
+
+    async def _op_sersetstat(self, opcode: int):
+        req = await self.read_bytes(2)
+        if not req: return
+        chan, code = req[0], req[1]
+        if code == 0x28:
+            await self.read_bytes(26)  # SS.ComSt descriptor: consumed, not applied
+        elif code == 0x29:
+            await self.init_channel(chan)
+        elif code == 0x2A:
+            await self._term_channel(chan)
+
+    async def _op_rfm(self, opcode: int):
+        sub_op_b = await self.read_bytes(1)
+        if not sub_op_b: return
+        sub = sub_op_b[0]
+        if sub == OP_RFM_OPEN: await self._rfm_open()
+        elif sub == OP_RFM_CHGDIR: await self._rfm_chgdir()
+        elif sub == OP_RFM_SEEK: await self._rfm_seek()
+        elif sub == OP_RFM_READ: await self._rfm_read()
+        elif sub == OP_RFM_CLOSE: await self._rfm_close()
+        else:
+            # Unhandled RFM sub-op (e.g. WRITE/GETSTT/SETSTT/
+            # MAKDIR/DELETE). Returning an unknown-service
+            # error unblocks the client instead of leaving it
+            # to hang forever waiting on a response.
+            resilience.log(f"Unhandled RFM sub-op {sub:#04x}; returning E_UNKSVC", level=2)
+            _RFM_ERR_RESP[0] = E_UNKSVC
+            self.uart.write(_RFM_ERR_RESP)
+
+    async def _rfm_open(self):
+        h = await self.read_bytes(7)
+        if not h: return
+        addr, mode, length = (h[2]<<8)|h[3], h[4], (h[5]<<8)|h[6]
+        pb = await self.read_bytes(length)
+        ec = 216
+        if pb:
+            p = self._sanitize_rfm_path(bytes(pb).decode('ascii', 'ignore'))
+            if p:
+                if len(self.rfm_paths) >= 8:
+                    ec = 207
+                else:
+                    try:
+                        self.rfm_paths[addr] = {'handle': open(p, 'rb' if not (mode & 2) else 'r+b'), 'mode': mode}
+                        ec = 0; activity_led.blink()
+                    except Exception as e:
+                        resilience.log(f"RFM open error: {e}", level=2)
+        _RFM_RESP[0] = ec
+        self.uart.write(_RFM_RESP)
+
+    async def _rfm_chgdir(self):
+        h = await self.read_bytes(7)
+        if not h: return
+        length = (h[5]<<8)|h[6]; pb = await self.read_bytes(length); ec = 0
+        if pb:
+            p = self._sanitize_rfm_path(bytes(pb).decode('ascii', 'ignore'))
+            try: os.stat(p)
+            except OSError as e:
+                resilience.log(f"RFM chgdir stat error: {e}", level=2)
+                ec = 216
+        _RFM_RESP[0] = ec
+        self.uart.write(_RFM_RESP)
+
+    async def _rfm_seek(self):
+        h = await self.read_bytes(7)
+        if not h: return
+        addr, pos = (h[0]<<8)|h[1], (h[3]<<24)|(h[4]<<16)|(h[5]<<8)|h[6]
+        ec = 207
+        if addr in self.rfm_paths:
+            try:
+                self.rfm_paths[addr]['handle'].seek(pos)
+                ec = 0
+                activity_led.blink()
+            except Exception as e:
+                resilience.log(f"RFM seek error: {e}", level=2)
+                ec = 211
+        _RFM_ERR_RESP[0] = ec
+        self.uart.write(_RFM_ERR_RESP)
+
+    async def _rfm_read(self):
+        h = await self.read_bytes(5)
+        if not h: return
+        addr, count = (h[0]<<8)|h[1], (h[3]<<8)|h[4]; ec, data = 207, b""
+        if addr in self.rfm_paths:
+            try:
+                data = self.rfm_paths[addr]['handle'].read(count) or b""
+                ec = 0 if data else 211; activity_led.blink()
+            except Exception as e:
+                resilience.log(f"RFM read error: {e}", level=2)
+                ec = 211
+        _RFM_READ_RESP[0] = ec
+        _RFM_READ_RESP[1] = (len(data)>>8)&0xFF
+        _RFM_READ_RESP[2] = len(data)&0xFF
+        self.uart.write(_RFM_READ_RESP)
+        if ec == 0:
+            ack = await self.read_bytes(1)
+            if ack and ack[0] == 0: self.uart.write(data)
+
+    async def _rfm_close(self):
+        h = await self.read_bytes(4)
+        if not h: return
+        addr = (h[2]<<8)|h[3]; ec = 0
+        if addr in self.rfm_paths:
+            try:
+                self.rfm_paths[addr]['handle'].close()
+                del self.rfm_paths[addr]
+                activity_led.blink()
+            except Exception as e:
+                resilience.log(f"RFM close error: {e}", level=2)
+                ec = 214
+        else: ec = 207
+        _RFM_ERR_RESP[0] = ec
+        self.uart.write(_RFM_ERR_RESP)
+
+    async def _op_nameobj_mount(self, opcode: int):
+        """OP_NAMEOBJ_MOUNT / OP_NAMEOBJ_CREATE: both mount an existing image."""
+        ln_b = await self.read_bytes(1, offset=1)
+        if not ln_b: return
+        ln = ln_b[0]; name_b = await self.read_bytes(ln, offset=2)
+        if not name_b: return
+        try:
+            name = bytes(name_b).decode('ascii', 'ignore'); free_drive = -1
+            for i in range(NUM_DRIVES):
+                if self.drives[i] is None: free_drive = i; break
+            if free_drive < 0 or any(seg == '..' for seg in name.split('/')) or not name.endswith('.dsk'):
+                self.uart.write(_RESP_0xFF); return
+            try:
+                vd = VirtualDrive(name)
+                if vd.file:
+                    self.drives[free_drive] = vd
+                    self._err_resp[0] = free_drive
+                    self.uart.write(self._err_resp)
+                else:
+                    self.uart.write(_RESP_0xFF)
+            except Exception as e:
+                resilience.log(f"NAMEOBJ mount VirtualDrive error: {e}", level=2)
+                self.uart.write(_RESP_0xFF)
+        except Exception as e:
+            resilience.log(f"NAMEOBJ protocol error: {e}", level=2)
+            self.uart.write(_RESP_0xFF)
+
     async def tcp_accept_handler(self, chan, reader, writer):
         if chan in self.tcp_connections: await self.close_tcp(chan)
         self.tcp_connections[chan] = (reader, writer, asyncio.create_task(self.tcp_reader_task(chan, reader)))
@@ -956,4 +2269,6 @@ class DriveWireServer:
 
     async def stop(self): self.running = False
     async def reload_config(self):
-        self.config.load(); await self.init_drives(); self.init_uart()
+        self.config.load()
+        sector_cache.set_budget(self.config.get('sector_cache_kb', DEFAULT_SECTOR_CACHE_KB) * 1024)
+        await self.init_drives(); self.init_uart()
@@ -1,6 +1,6 @@
 import uasyncio as asyncio
 from drivewire import DriveWireServer
-from web_server import app
+from web_server import app, reconcile_dsk_index
 import time_sync
 import gc
 import machine
@@ -37,6 +37,9 @@ async def main():
     
     # Create the DriveWire task
     asyncio.create_task(dw_server.run())
+
+    # Keep the .dsk file index in step with changes made outside the web UI
+    asyncio.create_task(reconcile_dsk_index())
     
     resilience.log("Starting Web Server on port 80...")
     
@@ -2,6 +2,7 @@ import machine
 import os
 import time
 import gc
+import uasyncio as asyncio
 
 try:
     from typing import Optional, List, Union
@@ -235,124 +236,519 @@ def file_exists(path: str) -> bool:
     except OSError:
         return False
 
-def open_remote_stream(url: str, addr=None):
-    """Open a raw socket HTTP GET and return the socket after consuming headers.
-    
-    This avoids urequests/Response objects which buffer entire payloads into RAM.
-    Returns the socket object for incremental reading, or None on failure.
-    Important: Caller MUST close the socket when finished.
-    """
+_URL_SAFE = b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~'
+
+def url_quote(text: str, safe: str = '/') -> str:
+    """Percent-encode `text` for a URL path or query value (there is no urllib on device)."""
+    out = []
+    for b in text.encode():
+        c = chr(b)
+        out.append(c if b in _URL_SAFE or (b < 128 and c in safe) else '%%%02X' % b)
+    return ''.join(out)
+
+def _split_url(url: str):
+    """Split http://host:port/path into (host, port, path)."""
+    url_no_proto = url.split('://', 1)[1] if '://' in url else url
+    slash_pos = url_no_proto.find('/')
+    if slash_pos >= 0:
+        hostport = url_no_proto[:slash_pos]
+        path = url_no_proto[slash_pos:]
+    else:
+        hostport = url_no_proto
+        path = '/'
+    if ':' in hostport:
+        host, port_str = hostport.rsplit(':', 1)
+        port = int(port_str)
+    else:
+        host = hostport
+        port = 80
+    return host, port, path
+
+
+def _connect(addr):
+    """Open a TCP socket to `addr`, retrying on ENOMEM while lwIP frees PCBs."""
     import usocket
-    try:
-        # Parse URL: http://host:port/path
-        url_no_proto = url.split('://', 1)[1] if '://' in url else url
-        slash_pos = url_no_proto.find('/')
-        if slash_pos >= 0:
-            hostport = url_no_proto[:slash_pos]
-            path = url_no_proto[slash_pos:]
-        else:
-            hostport = url_no_proto
-            path = '/'
-        
-        if ':' in hostport:
-            host, port_str = hostport.rsplit(':', 1)
-            port = int(port_str)
+    # Retry up to 3 times on ENOMEM — LwIP TIME_WAIT PCBs may need time
+    sock = None
+    _delays = [1000, 2000]  # ms to wait on 1st and 2nd retry
+    for attempt in range(3):
+        try:
+            sock = usocket.socket()
+            sock.settimeout(5)
+            sock.connect(addr)
+            break
+        except OSError as e:
+            if sock is not None:
+                try:
+                    sock.close()
+                except Exception:
+                    pass
+                sock = None
+            if e.errno == 12 and attempt < 2:
+                # ENOMEM: GC + wait for LwIP to reclaim TIME_WAIT PCBs
+                gc.collect()
+                import time as _time
+                _time.sleep_ms(_delays[attempt])
+                feed_wdt()
+                log(f"Retrying socket after ENOMEM cooldown ({attempt+1}/2)", level=0)
+                continue
+            raise  # Re-raise on final attempt or non-ENOMEM error
+    feed_wdt()
+    return sock
+
+
+_MAX_HDR_BYTES = 2048  # Safety limit to prevent CPU burn on malformed responses
+
+
+class _HttpResponse:
+    """Response framing shared by RemoteStream and AsyncRemoteStream.
+
+    Headers are read in blocks and parsed once; body bytes that arrived with
+    them wait in `_pending`. `status` and `length` (Content-Length, or -1)
+    are exposed to callers. `remaining` counts body bytes not yet returned
+    and drops to 0 at the end of a chunked body. `rle` is set when the body
+    is x-dw-rle encoded; `length` is then the encoded size.
+    """
+    def _reset(self):
+        self.status_line = None
+        self.status = 0
+        self.length = -1
+        self.chunked = False
+        self.keep = False
+        self.rle = False
+        self.remaining = 0
+        self._pending = b''
+        self._cstate = 0  # 0 size line, 1 data, 2 data CRLF, 3 trailer, 4 done
+        self._csize = 0
+        self._cext = False
+        self._run = 0     # x-dw-rle bytes left in the current record
+        self._fill = -1   # Its repeated byte, or -1 for a literal record
+
+    def _parse_headers(self, buf: bytes) -> bool:
+        """Consume a complete header block from `buf`; False if more is needed."""
+        end = buf.find(b'\r\n\r\n')
+        if end < 0:
+            if len(buf) >= _MAX_HDR_BYTES:
+                log(f"Remote stream: headers exceeded {_MAX_HDR_BYTES} bytes", level=2)
+                raise OSError(22, 'Oversized headers')
+            return False
+        hdr = [None, -1, True, False, False]
+        for txt in buf[:end].decode('ascii', 'ignore').split('\r\n'):
+            _header_line(hdr, txt)
+        self._reset()
+        self.status_line, self.length, self.keep, self.chunked, self.rle = hdr
+        parts = (self.status_line or '').split(' ', 2)
+        self.status = int(parts[1]) if len(parts) >= 2 and parts[1].isdigit() else 0
+        if self.chunked:
+            self.length = -1
+            self.remaining = 0x7FFFFFFF
         else:
-            host = hostport
-            port = 80
-        
+            self.remaining = self.length if self.length >= 0 else 0x7FFFFFFF
+        self._pending = buf[end + 4:]
+        return True
+
+    def _take(self, raw: bytes, n: int) -> bytes:
+        """Up to `n` body bytes from `raw`; unused raw bytes go back to `_pending`."""
+        if not self.chunked:
+            n = min(n, self.remaining)
+            if len(raw) > n: self._pending = raw[n:]
+            out = raw[:n]
+            self.remaining -= len(out)
+            return out
+        out = b''; i = 0; size = len(raw)
+        while i < size and len(out) < n:
+            st = self._cstate
+            if st == 1:
+                take = min(self._csize, n - len(out), size - i)
+                out += raw[i:i + take]; i += take; self._csize -= take
+                if not self._csize: self._cstate = 2
+                continue
+            if st == 4:
+                break
+            c = raw[i]; i += 1
+            if c == 13: continue
+            if st == 0:
+                if c == 10:
+                    self._cstate = 1 if self._csize else 3
+                    self._cext = False
+                elif c == 59:  # ';' chunk extension, ignored
+                    self._cext = True
+                elif not self._cext:
+                    d = c - 48 if c < 58 else (c | 32) - 87
+                    if d < 0 or d > 15: raise OSError(22, 'Bad chunk size')
+                    self._csize = (self._csize << 4) | d
+            elif st == 2:
+                if c == 10: self._cstate = 0
+            elif c == 10:  # Trailer: an empty line ends the body
+                if self._cext: self._cext = False
+                else: self._cstate = 4
+            else:
+                self._cext = True
+        if i < size: self._pending = raw[i:]
+        if self._cstate == 4: self.remaining = 0
+        return out
+
+    def _want(self, n: int) -> int:
+        # Chunk framing rides along with the data, so read a little extra
+        return max(n, 64) if self.chunked else min(n, self.remaining)
+
+
+def _header_line(hdr: list, txt: str):
+    """Fold one header line into hdr = [status_line, content_length, keep_alive, chunked, rle]."""
+    if hdr[0] is None:
+        hdr[0] = txt
+        # HTTP/1.0 closes unless told otherwise
+        hdr[2] = txt.startswith('HTTP/1.1')
+        return
+    name, _, value = txt.partition(':')
+    name = name.strip().lower()
+    value = value.strip().lower()
+    if name == 'content-length':
+        hdr[1] = int(value)
+    elif name == 'connection':
+        hdr[2] = value == 'keep-alive' or (hdr[2] and value != 'close')
+    elif name == 'transfer-encoding':
+        hdr[3] = 'chunked' in value
+    elif name == 'content-encoding':
+        hdr[4] = value == RLE_ENCODING
+
+
+def _send_request(sock, path: str, host_header: str):
+    # Minimal HTTP/1.0 request (Connection: close implied).
+    # The Host header must carry the non-default port (RFC 7230); some
+    # servers/frameworks reject or misroute requests whose Host omits it.
+    sock.send(b'GET ')
+    sock.send(path.encode())
+    sock.send(b' HTTP/1.0\r\nHost: ')
+    sock.send(host_header.encode())
+    sock.send(b'\r\n\r\n')
+
+
+def _status_ok(status_line: str, path: str) -> bool:
+    # Check for 2xx status (allowing 200, 206 etc)
+    parts = status_line.split(' ', 2) if status_line else ()
+    if len(parts) >= 2 and parts[1].startswith('2'):
+        return True
+    # Surface the actual status line — a silent None here is the reason
+    # remote-drive failures are indistinguishable from a dead connection.
+    log(f"Remote stream non-2xx for {path}: '{(status_line or '').strip()}'", level=2)
+    return False
+
+
+REMOTE_TIMEOUT_MS = 5000  # Per-operation timeout for remote connect/read
+RLE_ENCODING = 'x-dw-rle'  # Sector run-length encoding offered by sector_server
+_ZERO_RUN = memoryview(bytes(256))  # Source for expanding zero runs
+
+
+class AsyncRemoteStream(_HttpResponse):
+    """HTTP GET over an asyncio stream, optionally kept alive between requests.
+
+    Returned by `open_remote_stream_async()`. Every connect, write and read is
+    awaited with a cancellable REMOTE_TIMEOUT_MS timeout, so a slow or dead
+    server only stalls the coroutine using it, never the UART protocol loop
+    or the web server.
+
+    `recv()` is bounded by the response's Content-Length or chunked framing. `close()` keeps a
+    keep-alive connection open for the next request when the body was fully
+    read and the server agreed. A pooled socket the server has since dropped
+    is reconnected transparently on the next request.
+    """
+    def __init__(self, host: str, port: int, keep_alive: bool = False):
+        self.host = host
+        self.port = port
+        self.keep_alive = keep_alive
+        self.host_header = host if port == 80 else f"{host}:{port}"
+        self.reader = None
+        self.writer = None
+        self._reset()
+        self.reusable = False
+        self.busy = False
+        self.requests = 0
+        self.connects = 0
+
+    async def _connect(self):
+        # A new socket is the allocation-heavy step, so collect here rather
+        # than on every pooled request
         gc.collect()
-        if addr is None:
-            addr = usocket.getaddrinfo(host, port)[0][-1]
-            
-        # Retry up to 3 times on ENOMEM — LwIP TIME_WAIT PCBs may need time
-        sock = None
-        _delays = [1000, 2000]  # ms to wait on 1st and 2nd retry
+        # Retry on ENOMEM — lwIP TIME_WAIT PCBs may need time to be reclaimed
         for attempt in range(3):
             try:
-                sock = usocket.socket()
-                sock.settimeout(5)
-                sock.connect(addr)
-                break
+                self.reader, self.writer = await asyncio.wait_for_ms(
+                    asyncio.open_connection(self.host, self.port), REMOTE_TIMEOUT_MS)
+                self.connects += 1
+                return
             except OSError as e:
-                if sock is not None:
-                    try:
-                        sock.close()
-                    except Exception:
-                        pass
-                    sock = None
                 if e.errno == 12 and attempt < 2:
-                    # ENOMEM: GC + wait for LwIP to reclaim TIME_WAIT PCBs
                     gc.collect()
-                    import time as _time
-                    _time.sleep_ms(_delays[attempt])
                     feed_wdt()
                     log(f"Retrying socket after ENOMEM cooldown ({attempt+1}/2)", level=0)
+                    await asyncio.sleep_ms(1000 << attempt)
                     continue
-                raise  # Re-raise on final attempt or non-ENOMEM error
-        feed_wdt()
-        
-        # Send minimal HTTP/1.0 request (Connection: close implied).
-        # The Host header must carry the non-default port (RFC 7230); some
-        # servers/frameworks reject or misroute requests whose Host omits it.
-        host_header = host if port == 80 else f"{host}:{port}"
-        sock.send(b'GET ')
-        sock.send(path.encode())
-        sock.send(b' HTTP/1.0\r\nHost: ')
-        sock.send(host_header.encode())
-        sock.send(b'\r\n\r\n')
-        
-        # Read headers byte-by-byte looking for \r\n\r\n end marker
-        # Use a 4-byte ring buffer to detect the boundary without large allocs
-        hdr_end = bytearray(4)
-        status_line = bytearray(16)  # First few bytes to check status
-        status_pos = 0
-        hdr_bytes_read = 0
-        _MAX_HDR_BYTES = 2048  # Safety limit to prevent CPU burn on malformed responses
-        
-        while hdr_bytes_read < _MAX_HDR_BYTES:
-            b = sock.recv(1)
-            if not b:
-                sock.close()
+                raise
+
+    async def _read_headers(self) -> bool:
+        """Buffered header read; False if the peer closed before any byte."""
+        buf = self._pending  # Bytes read past the end of the previous body
+        if self._parse_headers(buf): return True
+        while True:
+            chunk = await asyncio.wait_for_ms(self.reader.read(256), REMOTE_TIMEOUT_MS)
+            if not chunk:
+                if not buf: return False
+                raise OSError(104, 'Truncated headers')
+            buf += chunk
+            if self._parse_headers(buf): return True
+
+    async def request(self, path: str, method: str = 'GET', body=None) -> bool:
+        """Send `method path` and consume the headers; False on failure or non-2xx.
+
+        `body` is a list of buffers sent back to back as the request body
+        (written without copying, and resent if a stale socket is retried).
+        """
+        extra = b''
+        if body is not None:
+            n = 0
+            for b in body: n += len(b)
+            extra = b'Content-Length: ' + str(n).encode() + b'\r\n'
+        for _ in range(2):
+            fresh = self.writer is None
+            try:
+                if fresh:
+                    await self._connect()
+                self.writer.write(method.encode() + b' ' + path.encode() +
+                                  (b' HTTP/1.1\r\nConnection: keep-alive\r\nHost: ' if self.keep_alive
+                                   else b' HTTP/1.0\r\nHost: ') +
+                                  self.host_header.encode() + b'\r\n' + extra + b'\r\n')
+                if body is not None:
+                    for b in body: self.writer.write(b)
+                await asyncio.wait_for_ms(self.writer.drain(), REMOTE_TIMEOUT_MS)
+                got = await self._read_headers()
+            except (OSError, ValueError, asyncio.TimeoutError) as e:
+                # ValueError: a malformed header (e.g. a non-numeric Content-Length)
+                self._drop()
+                if fresh:
+                    log(f"Remote stream error ({self.host_header}{path}): {repr(e)}", level=2)
+                    return False
+                continue  # Stale keep-alive socket: reconnect once
+            if not got:
+                self._drop()
+                if fresh:
+                    return False
+                continue
+            feed_wdt()
+            self.requests += 1
+            self.reusable = self.keep_alive and self.keep and (self.length >= 0 or self.chunked)
+            if not _status_ok(self.status_line, path):
+                self._drop()
+                return False
+            return True
+        return False
+
+    async def recv(self, n: int) -> bytes:
+        """Up to `n` body bytes; b'' at the end of the body."""
+        while self.remaining > 0:
+            raw = self._pending
+            if raw:
+                self._pending = b''
+            else:
+                if self.reader is None: break
+                raw = await asyncio.wait_for_ms(self.reader.read(self._want(n)), REMOTE_TIMEOUT_MS)
+                if not raw:
+                    self.reusable = False
+                    self.remaining = 0
+                    break
+            out = self._take(raw, n)
+            if out: return out
+        return b''
+
+    async def _recv_exact(self, n: int):
+        # A record header may straddle two reads
+        got = b''
+        while len(got) < n:
+            chunk = await self.recv(n - len(got))
+            if not chunk:
+                if got: raise OSError(22, 'Truncated run header')
                 return None
-            hdr_bytes_read += 1
-            
-            # Capture first 16 bytes for status code check
-            if status_pos < 16:
-                status_line[status_pos] = b[0]
-                status_pos += 1
-            
-            # Shift ring buffer
-            hdr_end[0] = hdr_end[1]
-            hdr_end[1] = hdr_end[2]
-            hdr_end[2] = hdr_end[3]
-            hdr_end[3] = b[0]
-            
-            if hdr_end == b'\r\n\r\n':
-                break
-        else:
-            # Exceeded _MAX_HDR_BYTES without finding header end
-            sock.close()
-            log(f"Remote stream: headers exceeded {_MAX_HDR_BYTES} bytes", level=2)
-            return None
-        
-        feed_wdt()
-        
-        # Check for 2xx status (allowing 200, 206 etc)
-        if b' 2' not in bytes(status_line):
-            # Surface the actual status line — a silent None here is the reason
-            # remote-drive failures are indistinguishable from a dead connection.
+            got += chunk
+        return got
+
+    async def recv_into(self, buf) -> int:
+        """Fill `buf` with body bytes, decoding x-dw-rle; returns the count (short only at the end).
+
+        Repeat records are expanded in place, so an encoded response needs no
+        buffer beyond the caller's own.
+        """
+        size = len(buf)
+        pos = 0
+        while pos < size:
+            if not self.rle:
+                chunk = await self.recv(size - pos)
+                if not chunk: break
+                buf[pos:pos + len(chunk)] = chunk
+                pos += len(chunk)
+                continue
+            if not self._run:
+                head = await self._recv_exact(2)
+                if head is None: break
+                run = ((head[0] & 0x7F) << 8) | head[1]
+                if not run: raise OSError(22, 'Empty run')
+                if head[0] & 0x80:
+                    value = await self._recv_exact(1)
+                    if value is None: raise OSError(22, 'Truncated run header')
+                    self._fill = value[0]
+                else:
+                    self._fill = -1
+                self._run = run
+            n = min(self._run, size - pos)
+            if self._fill < 0:
+                chunk = await self.recv(n)
+                if not chunk: raise OSError(104, 'Truncated literal run')
+                n = len(chunk)
+                buf[pos:pos + n] = chunk
+            elif self._fill == 0:
+                i = 0
+                while i < n:
+                    k = min(n - i, len(_ZERO_RUN))
+                    buf[pos + i:pos + i + k] = _ZERO_RUN[:k]
+                    i += k
+            else:
+                v = self._fill
+                for i in range(pos, pos + n): buf[i] = v
+            self._run -= n
+            pos += n
+        return pos
+
+    def close(self):
+        """End this response; the connection stays open only if it is reusable."""
+        self.busy = False
+        if self.remaining or not self.reusable:
+            self._drop()
+
+    def _drop(self):
+        if self.writer is not None:
             try:
-                status_txt = bytes(status_line).decode('ascii', 'ignore').strip()
+                self.writer.close()
             except Exception:
-                status_txt = repr(bytes(status_line))
-            log(f"Remote stream non-2xx for {path}: '{status_txt}'", level=2)
+                pass
+        self.reader = self.writer = None
+        self._reset()
+        self.reusable = False
+
+
+_keepalive_pool = {}  # "host:port" -> AsyncRemoteStream
+
+
+def close_remote_streams():
+    """Close every pooled keep-alive connection (e.g. on WiFi loss)."""
+    for conn in _keepalive_pool.values():
+        conn._drop()
+    _keepalive_pool.clear()
+
+
+async def open_remote_stream_async(url: str, keep_alive: bool = False, method: str = 'GET', body=None):
+    """Non-blocking HTTP request: an AsyncRemoteStream positioned at the response body, or None.
+
+    With keep_alive=True the request reuses the pooled connection for the
+    server; if that connection is busy in another coroutine a one-shot
+    connection is used instead. `method` and `body` (a list of buffers)
+    allow a PUT. Caller MUST close() the stream.
+    """
+    conn = None
+    try:
+        host, port, path = _split_url(url)
+        if keep_alive:
+            key = f"{host}:{port}"
+            conn = _keepalive_pool.get(key)
+            if conn is None:
+                conn = _keepalive_pool[key] = AsyncRemoteStream(host, port, True)
+            elif conn.busy:
+                conn = None
+        if conn is None:
+            conn = AsyncRemoteStream(host, port)
+        # Claim it before the first await, or a second coroutine could be
+        # handed the same socket while this request is still in flight
+        conn.busy = True
+        if await conn.request(path, method, body):
+            return conn
+    except Exception as e:
+        log(f"Remote stream error ({url}): {repr(e)}", level=2)
+        if conn is not None:
+            conn._drop()
+    except BaseException:
+        # Cancelled mid-request (CancelledError is a BaseException in
+        # uasyncio): the socket is half-read, so drop it and hand the pool
+        # slot back before the cancellation propagates
+        if conn is not None:
+            conn._drop()
+            conn.busy = False
+        raise
+    if conn is not None:
+        conn.busy = False
+    return None
+
+
+class RemoteStream(_HttpResponse):
+    """Blocking one-shot HTTP/1.0 response body, returned by open_remote_stream()."""
+    def __init__(self, sock):
+        self.sock = sock
+        self._reset()
+
+    def _read_headers(self) -> bool:
+        buf = b''
+        while True:
+            chunk = self.sock.recv(256)
+            if not chunk:
+                if not buf: return False
+                raise OSError(104, 'Truncated headers')
+            buf += chunk
+            if self._parse_headers(buf): return True
+
+    def recv(self, n: int) -> bytes:
+        """Up to `n` body bytes; b'' at the end of the body."""
+        while self.remaining > 0:
+            raw = self._pending
+            if raw:
+                self._pending = b''
+            else:
+                raw = self.sock.recv(self._want(n))
+                if not raw:
+                    self.remaining = 0
+                    break
+            out = self._take(raw, n)
+            if out: return out
+        return b''
+
+    def close(self):
+        self.sock.close()
+
+
+def open_remote_stream(url: str, addr=None):
+    """Open a raw socket HTTP GET and return a RemoteStream positioned at the body.
+    
+    This avoids urequests/Response objects which buffer entire payloads into RAM.
+    Returns the stream for incremental recv(), or None on failure.
+    Important: Caller MUST close the socket when finished.
+
+    This blocks the event loop while connecting and reading; code running
+    next to the DriveWire protocol loop uses open_remote_stream_async().
+    """
+    sock = None
+    try:
+        host, port, path = _split_url(url)
+        gc.collect()
+        if addr is None:
+            import usocket
+            addr = usocket.getaddrinfo(host, port)[0][-1]
+        sock = _connect(addr)
+        _send_request(sock, path, host if port == 80 else f"{host}:{port}")
+        stream = RemoteStream(sock)
+        got = stream._read_headers()
+        feed_wdt()
+        if not got or not _status_ok(stream.status_line, path):
             sock.close()
             return None
-        
-        return sock
+        return stream
     except Exception as e:
-        if 'sock' in locals() and sock is not None:
+        if sock is not None:
             try:
                 sock.close()
             except Exception:
@@ -148,6 +148,11 @@ def _cleanup() -> None:
     _mounted = False
 
 
+def was_mounted() -> bool:
+    """Last known mount state, without touching the card (no SPI traffic, no LED)."""
+    return _mounted
+
+
 def is_mounted() -> bool:
     """Check if SD card is currently mounted and accessible."""
     global _mounted
@@ -2,14 +2,16 @@ import struct
 
 SECTOR_SIZE = 256
 
-def create_lsn0(total_sectors, sectors_per_track=18, root_fd_lsn=2):
+def create_lsn0(total_sectors, sectors_per_track=18, root_fd_lsn=2, cluster_size=1):
     """
     Generates a valid OS9 RBF LSN 0 sector.
     
     Structure:
-    0-2: Total sectors (3 bytes)
-    3:   Sectors per track (1 byte)
-    6-8: DD.DIR (Root directory FD LSN) (3 bytes)
+    0-2:  DD.TOT Total sectors (3 bytes)
+    3:    DD.TKS Sectors per track (1 byte)
+    4-5:  DD.MAP Allocation bitmap size in bytes (2 bytes)
+    6-7:  DD.BIT Sectors per cluster (2 bytes)
+    8-10: DD.DIR (Root directory FD LSN) (3 bytes)
     """
     data = bytearray(SECTOR_SIZE)
     # Total sectors (LSB is high-order byte in some docs? No, OS-9 is Big-Endian)
@@ -18,10 +20,33 @@ def create_lsn0(total_sectors, sectors_per_track=18, root_fd_lsn=2):
     data[2] = total_sectors & 0xFF
     # Sectors per track
     data[3] = sectors_per_track
+    # DD.MAP: one bit per cluster
+    map_bytes = ((total_sectors + cluster_size - 1) // cluster_size + 7) // 8
+    data[4] = (map_bytes >> 8) & 0xFF
+    data[5] = map_bytes & 0xFF
+    # DD.BIT
+    data[6] = (cluster_size >> 8) & 0xFF
+    data[7] = cluster_size & 0xFF
     # DD.DIR
-    data[6] = (root_fd_lsn >> 16) & 0xFF
-    data[7] = (root_fd_lsn >> 8) & 0xFF
-    data[8] = root_fd_lsn & 0xFF
+    data[8] = (root_fd_lsn >> 16) & 0xFF
+    data[9] = (root_fd_lsn >> 8) & 0xFF
+    data[10] = root_fd_lsn & 0xFF
+    return bytes(data)
+
+def create_bitmap(total_sectors, used_lsns, cluster_size=1):
+    """
+    Generates the allocation bitmap sectors (LSN 1 onward).
+    
+    Bit 7 of byte 0 is cluster 0; a set bit marks the cluster allocated.
+    Bits past the last cluster are set, as OS-9 format does.
+    """
+    clusters = (total_sectors + cluster_size - 1) // cluster_size
+    map_bytes = (clusters + 7) // 8
+    nsec = (map_bytes + SECTOR_SIZE - 1) // SECTOR_SIZE
+    data = bytearray(nsec * SECTOR_SIZE)
+    used = [lsn // cluster_size for lsn in used_lsns] + list(range(clusters, map_bytes * 8))
+    for c in used:
+        data[c >> 3] |= 0x80 >> (c & 7)
     return bytes(data)
 
 def create_fd(is_dir=True, segments=None):
@@ -50,6 +75,25 @@ def create_fd(is_dir=True, segments=None):
             
     return bytes(data)
 
+def create_dir_body(entries):
+    """
+    Generates a directory body sector from (name, fd_lsn) pairs.
+    
+    Structure (32 bytes per entry):
+    0-28:  Name, last character with bit 7 set (byte 0 == 0 marks a deleted entry)
+    29-31: FD LSN of the entry (3 bytes)
+    """
+    data = bytearray(SECTOR_SIZE)
+    for i, (name, fd_lsn) in enumerate(entries):
+        off = i * 32
+        raw = name.encode()
+        data[off:off + len(raw)] = raw
+        data[off + len(raw) - 1] |= 0x80
+        data[off + 29] = (fd_lsn >> 16) & 0xFF
+        data[off + 30] = (fd_lsn >> 8) & 0xFF
+        data[off + 31] = fd_lsn & 0xFF
+    return bytes(data)
+
 def generate_minimal_os9_disk(filename, total_sectors=100):
     """Creates a minimal OS9 disk image with LSN 0 and a root directory."""
     root_fd_lsn = 2
@@ -64,7 +108,7 @@ def generate_minimal_os9_disk(filename, total_sectors=100):
     
     with open(filename, "wb") as f:
         f.write(lsn0)               # LSN 0
-        f.write(b"\x00" * SECTOR_SIZE) # LSN 1 (Allocation Bitmap/Reserved)
+        f.write(create_bitmap(total_sectors, [0, 1, 2, 3])) # LSN 1 (Allocation Bitmap)
         f.write(root_fd)            # LSN 2
         f.write(root_dir_body)      # LSN 3
         
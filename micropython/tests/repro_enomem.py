@@ -44,7 +44,8 @@ class MockSocket:
     def __init__(self, data):
         self.data = data
         self.pos = 0
-    def recv(self, n):
+        self.length = len(data)
+    async def recv(self, n):
         chunk = self.data[self.pos:self.pos+n]
         self.pos += n
         return chunk
@@ -52,7 +53,7 @@ class MockSocket:
         pass
 
 class TestStreamingInfo(unittest.IsolatedAsyncioTestCase):
-    def test_stream_remote_info_large_payload(self):
+    async def test_stream_remote_info_large_payload(self):
         """Test that stream_remote_info yields disks from a large JSON payload."""
         disks = []
         for i in range(100):
@@ -67,14 +68,15 @@ class TestStreamingInfo(unittest.IsolatedAsyncioTestCase):
         
         mock_sock = MockSocket(info_json)
         
-        with patch('web_server.resilience.open_remote_stream', return_value=mock_sock):
-            yielded_disks = list(web_server.stream_remote_info("http://mock"))
+        yielded_disks = []
+        with patch('web_server.resilience.open_remote_stream_async', new_callable=AsyncMock, return_value=mock_sock):
+            await web_server.stream_remote_info("http://mock", yielded_disks.append)
             
             self.assertEqual(len(yielded_disks), 100)
             self.assertEqual(yielded_disks[0]['name'], "disk_0.dsk")
             self.assertEqual(yielded_disks[-1]['name'], "disk_99.dsk")
 
-    @patch('web_server.resilience.open_remote_stream')
+    @patch('web_server.resilience.open_remote_stream_async', new_callable=AsyncMock)
     async def test_remote_clone_endpoint_uses_streaming(self, mock_open_stream):
         """Test that remote_clone_endpoint uses the streaming parser to find total_sectors."""
         # Setup mock info
@@ -18,6 +18,17 @@ MOCK_MODULES = [
     'config'
 ]
 
+class HostStreamReader:
+    """Host stand-in for uasyncio.StreamReader over a polled (mock) UART."""
+    def __init__(self, s):
+        self.s = s
+
+    async def readinto(self, buf):
+        while not self.s.any():
+            await asyncio.sleep(0.001)
+        return self.s.readinto(buf)
+
+
 def setup_all_mocks():
     # 1. Config Mock
     if 'config' not in sys.modules or getattr(sys.modules['config'], '__is_shim__', False) == False:
@@ -59,6 +70,10 @@ def setup_all_mocks():
                 mock.create_task = asyncio.create_task
                 mock.Event = asyncio.Event
                 mock.Lock = asyncio.Lock
+                mock.TimeoutError = asyncio.TimeoutError
+                mock.CancelledError = asyncio.CancelledError
+                mock.wait_for_ms = lambda aw, ms: asyncio.wait_for(aw, ms / 1000)
+                mock.StreamReader = HostStreamReader
             
             if m == 'utime':
                 import time
@@ -45,12 +45,14 @@ class MockUART:
         return n
 
     def any(self):
-        return len(self.input_buffer) > 0
+        # Like machine.UART.any() on rp2: number of bytes waiting
+        return len(self.input_buffer)
     
     def deinit(self):
         pass
 
 import drivewire
+import resilience
 from drivewire import (
     DriveWireServer, OP_DWINIT, OP_READ, OP_READEX, OP_WRITE, OP_NAMEOBJ_MOUNT,
     OP_NAMEOBJ_CREATE, OP_TIME, E_NONE, E_UNIT, E_CRC, E_WP,
@@ -98,7 +100,10 @@ class TestDriveWire(unittest.IsolatedAsyncioTestCase):
         if hasattr(self, 'server'):
             await self.server.stop()
         await asyncio.sleep(0.05)
-        for f in [self.test_dsk, self.test_mount, "test_swap.dsk", "test_verify.dsk", "system.log"]:
+        for f in [self.test_dsk, self.test_mount, "test_swap.dsk", "test_verify.dsk", "system.log",
+                  self.test_dsk + ".jnl", self.test_mount + ".jnl",
+                  self.test_dsk + ".dwc", self.test_mount + ".dwc", "test_swap.dsk.dwc",
+                  "test_hydrate.dsk", "test_hydrate.dsk.dwp", "test_hydrate.dsk.dwc"]:
             if os.path.exists(f):
                 try: os.remove(f)
                 except OSError: pass
@@ -313,13 +318,21 @@ class TestDriveWire(unittest.IsolatedAsyncioTestCase):
         rd = drivewire.RemoteDrive(remote_url)
 
         mock_sock = MagicMock()
-        mock_sock.recv.return_value = b''  # End of stream
+        mock_sock.length = -1
+        mock_sock.rle = False
+        mock_sock.recv_into = AsyncMock(return_value=0)  # End of stream
 
-        with patch('resilience.open_remote_stream', return_value=mock_sock) as mock_open:
+        with patch('resilience.open_remote_stream_async', new_callable=AsyncMock, return_value=mock_sock) as mock_open:
             await rd.read_sector(612)
             mock_open.assert_called()
             called_url = mock_open.call_args[0][0]
-            self.assertEqual(called_url, "http://192.168.1.100:6809/sectors/NOS9_6309_L2_DEV_coco3_dw.dsk/612?count=8")
+            self.assertEqual(called_url, "http://192.168.1.100:6809/sectors/NOS9_6309_L2_DEV_coco3_dw.dsk/612?count=1")
+
+    async def test_remote_drive_url_keeps_subdirectory(self):
+        # A --recursive sector server names images by relative path
+        rd = drivewire.RemoteDrive("http://192.168.1.100:6809/disk/archive/1987/games.dsk")
+        self.assertEqual(rd._sector_url(5, 2), "http://192.168.1.100:6809/sectors/archive/1987/games.dsk/5?count=2")
+        await rd.close()
 
     async def test_remote_drive_empty_response_reports_read_error(self):
         # When the socket opens but the server returns no usable data, read_sector
@@ -329,9 +342,11 @@ class TestDriveWire(unittest.IsolatedAsyncioTestCase):
         rd = drivewire.RemoteDrive(remote_url)
 
         mock_sock = MagicMock()
-        mock_sock.recv.return_value = b''  # End of stream: no bytes delivered
+        mock_sock.length = -1
+        mock_sock.rle = False
+        mock_sock.recv_into = AsyncMock(return_value=0)  # End of stream: no bytes delivered
 
-        with patch('resilience.open_remote_stream', return_value=mock_sock):
+        with patch('resilience.open_remote_stream_async', new_callable=AsyncMock, return_value=mock_sock):
             result = await rd.read_sector(612)
 
         self.assertIsNone(result)
@@ -349,8 +364,9 @@ class TestDriveWire(unittest.IsolatedAsyncioTestCase):
         payload = b''.join(bytes([(i + 10) & 0xFF]) * 256 for i in range(8))
         # recv delivers it in 100-byte slices that straddle sector boundaries.
         sock = _ChunkedSocket(payload, max_chunk=100)
+        rd._next_lsn, rd._ra_window = 0, 4  # Mid sequential run: the window doubles to 8
 
-        with patch('resilience.open_remote_stream', return_value=sock):
+        with patch('resilience.open_remote_stream_async', new_callable=AsyncMock, return_value=sock):
             result = await rd.read_sector(0)
 
         # LSN 0 is treated as a directory sector and returned from directory_cache.
@@ -361,6 +377,205 @@ class TestDriveWire(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(rd.last_error, 0)
         self.assertTrue(sock.closed)
 
+    async def test_remote_drive_decodes_run_length_bulk_reads(self):
+        # With remote_compress the fetch asks for enc=rle and expands the
+        # records into its sector buffers, even when record headers straddle reads.
+        rd = drivewire.RemoteDrive("http://192.168.1.100:6809/disk/test.dsk")
+        rd.compress = True
+        body = (struct.pack('>H', 256) + bytes(range(256)) +       # LSN 40: literal
+                struct.pack('>H', 0x8000 | 512) + b'\x00' +         # LSN 41-42: zero run
+                struct.pack('>H', 0x8000 | 200) + b'\xe5' +         # LSN 43: format fill...
+                struct.pack('>H', 56) + b'A' * 56)                  # ...then a literal tail
+        urls = []
+        async def _serve(url, keep_alive=False):
+            urls.append(url)
+            return _ChunkedSocket(body, max_chunk=3, rle=True)
+        rd._next_lsn, rd._ra_window = 40, 2  # Mid sequential run: the window doubles to 4
+
+        with patch('resilience.open_remote_stream_async', side_effect=_serve):
+            result = await rd.read_sector(40)
+
+        self.assertTrue(urls[0].endswith('/sectors/test.dsk/40?count=4&enc=rle'))
+        self.assertEqual(bytes(result), bytes(range(256)))
+        self.assertEqual(rd.read_cache[41], bytearray(256))
+        self.assertEqual(rd.read_cache[42], bytearray(256))
+        self.assertEqual(rd.read_cache[43], bytearray(b'\xe5' * 200 + b'A' * 56))
+        self.assertEqual(rd.stats['wire_bytes'], len(body))
+        self.assertEqual(rd.last_error, 0)
+        await rd.close()
+
+    async def test_remote_fetch_window_adapts_to_access_pattern(self):
+        # A sequential walk grows the per-request window; a random lookup
+        # drops back to one sector. Read-ahead hits and waste are counted.
+        pool = drivewire.SectorCache(64 * 256)
+        rd = drivewire.RemoteDrive("http://192.168.1.100:6809/disk/test.dsk", cache=pool)
+        counts = []
+        async def _serve(url, keep_alive=False):
+            start = int(url.split('/')[-1].split('?')[0])
+            count = int(url.split('count=')[1])
+            counts.append(count)
+            return _ChunkedSocket(b''.join(bytes([(start + i) & 0xFF]) * 256 for i in range(count)))
+
+        with patch('resilience.open_remote_stream_async', side_effect=_serve):
+            for lsn in range(100, 127):
+                data = await rd.read_sector(lsn)
+                self.assertEqual(bytes(data), bytes([lsn & 0xFF]) * 256)
+            self.assertEqual(counts, [1, 2, 4, 8, 16])
+            self.assertEqual(rd.stats['readahead_hits'], 22)
+
+            await rd.read_sector(500)  # random: one sector, rest of the last window wasted
+        self.assertEqual(counts[-1], 1)
+        self.assertEqual(rd.stats['fetch_window'], 1)
+        self.assertEqual(rd.stats['readahead_sectors'], 26)
+        self.assertEqual(rd.stats['readahead_waste'], 4)
+        await rd.close()
+
+    async def test_remote_writes_flush_as_bulk_puts(self):
+        # Writes are buffered and read back locally, then PUT as one request
+        # per contiguous run; without remote_writes the drive is write-protected.
+        rd = drivewire.RemoteDrive("http://192.168.1.100:6809/disk/test.dsk",
+                                   cache=drivewire.SectorCache(32 * 256))
+        self.assertFalse(await rd.write_sector(5, b'\x01' * 256))
+        self.assertEqual(rd.last_error, drivewire.E_WP)
+
+        rd.writable = True
+        puts = []
+        async def _put(url, keep_alive=False, method='GET', body=None):
+            puts.append((method, url, b''.join(bytes(b) for b in body)))
+            return _ChunkedSocket(b'{"status": "ok"}')
+        for lsn in (12, 10, 11, 20):
+            self.assertTrue(await rd.write_sector(lsn, bytes([lsn]) * 256))
+        self.assertTrue(rd.checkpoint_due)
+        self.assertEqual(bytes(await rd.read_sector(11)), bytes([11]) * 256)
+
+        with patch('resilience.open_remote_stream_async', side_effect=_put):
+            await rd.flush()
+        self.assertEqual([(m, u) for m, u, _ in puts], [
+            ('PUT', "http://192.168.1.100:6809/sectors/test.dsk/10"),
+            ('PUT', "http://192.168.1.100:6809/sectors/test.dsk/20")])
+        self.assertEqual(puts[0][2], bytes([10]) * 256 + bytes([11]) * 256 + bytes([12]) * 256)
+        self.assertEqual(len(rd.dirty_sectors), 0)
+        self.assertFalse(rd.checkpoint_due)
+        self.assertEqual(rd.stats['flush_runs'], 2)
+
+        # A failed PUT keeps the data dirty for the next flush
+        await rd.write_sector(30, b'\x1e' * 256)
+        with patch('resilience.open_remote_stream_async', new_callable=AsyncMock, return_value=None):
+            await rd.flush()
+        self.assertIn(30, rd.dirty_sectors)
+        rd.dirty_sectors.clear()
+        await rd.close()
+
+    async def test_hydrating_drive_copies_then_promotes(self):
+        # Reads and writes pull their chunk to the local copy first; the
+        # background pass copies the rest, then the slot becomes a VirtualDrive.
+        image = bytearray()
+        for lsn in range(40):
+            image += bytes([lsn]) * 256
+        image[0:3] = b'\x00\x00\x28'  # DD.TOT = 40 sectors: chunks of 16, 16 and 8
+        fetched = []
+        async def _serve(url, keep_alive=False):
+            start = int(url.split('/')[-1].split('?')[0])
+            count = int(url.split('count=')[1])
+            fetched.append((start, count))
+            return _ChunkedSocket(bytes(image[start * 256:(start + count) * 256]))
+
+        hd = drivewire.HydratingDrive("http://192.168.1.100:6809/disk/test_hydrate.dsk",
+                                      cache=drivewire.SectorCache(64 * 256))
+        self.assertEqual(hd.local_path, drivewire.RFM_BASE_DIR + "/test_hydrate.dsk")
+        hd.local_path = "test_hydrate.dsk"
+        with patch('resilience.open_remote_stream_async', side_effect=_serve):
+            await hd.read_sector(0)
+            self.assertTrue(hd._open_local(40))
+            self.assertTrue(os.path.exists("test_hydrate.dsk.dwp"))
+
+            data = await hd.read_sector(20)
+            self.assertEqual(bytes(data), bytes([20]) * 256)
+            self.assertEqual(fetched[-1], (16, 16))
+            self.assertEqual(hd.stats['local_reads'], 1)
+            self.assertTrue(await hd.write_sector(3, b'\xAA' * 256))
+            self.assertEqual(fetched[-1], (0, 16))
+
+            await hd._hydrate()
+        self.assertEqual(fetched[-1], (32, 8))
+        self.assertEqual(hd.stats['hydrate_state'], 2)
+        self.assertEqual(hd.stats['hydrate_chunks'], 3)
+        self.assertFalse(os.path.exists("test_hydrate.dsk.dwp"))
+        with open("test_hydrate.dsk", "rb") as f:
+            local = f.read()
+        image[3 * 256:4 * 256] = b'\xAA' * 256
+        self.assertEqual(local, bytes(image))
+
+        self.server.config = MagicMock()
+        self.server.config.get.return_value = [hd.url, None, None, None]
+        self.server.drives[0] = hd
+        await self.server._promote_when_hydrated(0, hd)
+        vd = self.server.drives[0]
+        self.assertIsInstance(vd, drivewire.VirtualDrive)
+        self.assertEqual(vd.filename, "test_hydrate.dsk")
+        self.server.config.set.assert_called_with('drives', ["test_hydrate.dsk", None, None, None])
+        self.assertEqual(bytes(await vd.read_sector(3)), b'\xAA' * 256)
+
+    async def test_cancelled_hydrate_leaves_clean_pooled_connection(self):
+        # Cancelling the background copy mid-body must not strand the pooled
+        # keep-alive socket: the next fetch reuses the pool entry on a fresh
+        # connection instead of reading the abandoned response.
+        image = bytes([7]) * (32 * 256)
+        stalled = asyncio.Event()
+
+        class FakeReader:
+            def __init__(self, data, stall):
+                self.data, self.stall = bytearray(data), stall
+            async def read(self, n):
+                if not self.data and self.stall:
+                    stalled.set()
+                    await asyncio.sleep(10)
+                out = bytes(self.data[:n]); del self.data[:n]; return out
+
+        class FakeWriter:
+            def __init__(self): self.closed = False
+            def write(self, b): pass
+            async def drain(self): pass
+            def close(self): self.closed = True
+
+        def response(body):
+            return b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n" % (16 * 256) + body
+        conns = [(FakeReader(response(image[:1000]), True), FakeWriter()),
+                 (FakeReader(response(image[16 * 256:32 * 256]), False), FakeWriter())]
+        writers = [w for _, w in conns]
+        async def open_connection(host, port):
+            return conns.pop(0)
+
+        hd = drivewire.HydratingDrive("http://192.168.1.100:6809/disk/test_hydrate.dsk",
+                                      cache=drivewire.SectorCache(64 * 256))
+        hd._warm_task.cancel()  # Only the hydrate pass talks to the server
+        hd.local_path = "test_hydrate.dsk"
+        self.assertTrue(hd._open_local(32))
+        resilience.close_remote_streams()
+        try:
+            with patch.object(resilience.asyncio, 'open_connection', open_connection):
+                task = asyncio.ensure_future(hd._hydrate())
+                await stalled.wait()
+                task.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await task
+                pooled = resilience._keepalive_pool["192.168.1.100:6809"]
+                self.assertFalse(pooled.busy)
+                self.assertIsNone(pooled.writer)
+                self.assertTrue(writers[0].closed)
+                self.assertFalse(hd._fetch_lock.locked())
+                self.assertFalse(hd._has(0))
+
+                data = await hd.read_sector(20)
+                self.assertEqual(bytes(data), bytes([7]) * 256)
+                self.assertIs(resilience._keepalive_pool["192.168.1.100:6809"], pooled)
+                self.assertEqual(pooled.connects, 2)
+                self.assertFalse(pooled.busy)
+                self.assertTrue(hd._has(1))
+        finally:
+            resilience.close_remote_streams()
+            hd.file.close()
+
     async def test_virtual_drive_read_hit_miss_counters(self):
         # Defect #1: the stats screen reads read_hits/read_misses. A physical
         # read of a data sector is a miss; the cached re-read is a hit.
@@ -378,6 +593,91 @@ class TestDriveWire(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(vd.stats['read_hits'], 1)
         await vd.close()
 
+    async def test_sequential_reads_use_readahead_window(self):
+        # A sequential walk should be served by growing multi-sector reads,
+        # with every sector's content intact; a random jump resets the window.
+        with open(self.test_dsk, "wb") as f:
+            for lsn in range(64):
+                f.write(bytes([lsn]) * 256)
+        vd = drivewire.VirtualDrive(self.test_dsk)
+        for lsn in range(1, 31):
+            data = await vd.read_sector(lsn)
+            self.assertEqual(bytes(data), bytes([lsn]) * 256)
+        self.assertLess(vd.stats['read_misses'], 10)
+        self.assertGreater(vd.stats['readahead_sectors'], 20)
+
+        await vd.read_sector(5)  # still cached
+        await vd.read_sector(60)  # beyond any window read so far
+        self.assertEqual(vd._ra_window, 1)
+        await vd.close()
+
+    async def test_flush_coalesces_contiguous_runs_in_lsn_order(self):
+        vd = drivewire.VirtualDrive(self.test_dsk)
+        for lsn in (7, 3, 5, 4, 1):
+            await vd.write_sector(lsn, bytes([lsn]) * 256)
+
+        real_file = vd.file
+        writes = []
+        class _Spy:
+            def seek(self, pos): self.pos = pos; return real_file.seek(pos)
+            def write(self, buf): writes.append((self.pos // 256, len(buf))); return real_file.write(buf)
+            def __getattr__(self, name): return getattr(real_file, name)
+        vd.file = _Spy()
+        await vd.flush()
+        vd.file = real_file
+
+        self.assertEqual(writes, [(1, 256), (3, 768), (7, 256)])
+        self.assertEqual(len(vd.dirty_sectors), 0)
+        self.assertEqual(vd.stats['flush_runs'], 3)
+        self.assertEqual(vd.stats['flush_bytes'], 5 * 256)
+        await vd.close()
+        with open(self.test_dsk, 'rb') as f:
+            for lsn in (1, 3, 4, 5, 7):
+                f.seek(lsn * 256)
+                self.assertEqual(f.read(256), bytes([lsn]) * 256)
+
+    async def test_journal_replays_unflushed_writes_after_crash(self):
+        vd = drivewire.VirtualDrive(self.test_dsk)
+        await vd.write_sector(3, bytes([0x33]) * 256)
+        await vd.write_sector(6, bytes([0x66]) * 256)
+        # No commit(): an acknowledged write must already be on the card.
+        self.assertEqual(os.path.getsize(vd.journal_path), 2 * drivewire.JOURNAL_RECORD_SIZE)
+        # Simulate power loss: handles vanish, dirty sectors never reach the image
+        vd._close_journal(); vd.file.close(); vd.file = None
+        with open(vd.journal_path, 'ab') as j:
+            j.write(b'J\x00\x00\x07' + bytes([0x77]) * 100)  # torn final append
+        with open(self.test_dsk, 'rb') as f:
+            f.seek(3 * 256)
+            self.assertEqual(f.read(256), bytes([0x55]) * 256)
+
+        vd2 = drivewire.VirtualDrive(self.test_dsk)
+        self.assertFalse(os.path.exists(vd2.journal_path))
+        with open(self.test_dsk, 'rb') as f:
+            for lsn, val in ((3, 0x33), (6, 0x66), (7, 0x55)):
+                f.seek(lsn * 256)
+                self.assertEqual(f.read(256), bytes([val]) * 256)
+        await vd2.close()
+
+    async def test_journaled_writes_checkpoint_in_background(self):
+        vd = drivewire.VirtualDrive(self.test_dsk)
+        self.server.drives[0] = vd
+        for lsn in range(4):
+            data = bytes([lsn + 1]) * 256
+            cs = sum(data) & 0xFFFF
+            self.uart_mock.input_buffer.extend([OP_WRITE, 0x00, 0x00, 0x00, lsn])
+            self.uart_mock.input_buffer.extend(data)
+            self.uart_mock.input_buffer.extend([(cs >> 8) & 0xFF, cs & 0xFF])
+        server_task = asyncio.create_task(self.server.run())
+        await asyncio.sleep(0.1)
+        await self.server.stop()
+        await server_task
+        self.assertEqual(list(self.uart_mock.output_buffer), [0x00] * 4)
+        # Half the dirty limit was reached: flush_loop checkpointed without a
+        # synchronous flush and dropped the now-redundant journal.
+        self.assertEqual(len(vd.dirty_sectors), 0)
+        self.assertFalse(os.path.exists(vd.journal_path))
+        await vd.close()
+
     async def test_reload_config_preserves_dirty_and_flushes_removed(self):
         # Defect #5: reloading config must not silently drop unflushed writes
         # nor leak the open file handle of a drive being replaced/removed.
@@ -421,6 +721,31 @@ class TestDriveWire(unittest.IsolatedAsyncioTestCase):
         logged = " ".join(str(c.args[0]) for c in mock_log.call_args_list if c.args)
         self.assertNotIn("Protocol error", logged)
 
+    async def test_dispatch_table_covers_every_opcode(self):
+        table = self.server._dispatch
+        self.assertEqual(len(table), 256)
+        self.assertEqual(table[OP_READ], self.server._op_read)
+        for op in range(0x80, 0x90):
+            self.assertEqual(table[op], self.server._op_fastwrite)
+        self.assertEqual(table[0x7E], self.server._op_ignore)
+
+    async def test_failing_handler_is_isolated(self):
+        # A raising handler must be logged against its opcode and must not trip
+        # the loop-level "Protocol error" back-off; the next opcode still runs.
+        async def boom(opcode):
+            raise ValueError("boom")
+        self.server._dispatch[OP_PRINT] = boom
+        self.uart_mock.input_buffer.extend([OP_PRINT, OP_DWINIT, 0x00])
+        with patch('drivewire.resilience.log') as mock_log:
+            server_task = asyncio.create_task(self.server.run())
+            await asyncio.sleep(0.05)
+            await self.server.stop()
+            await server_task
+        logged = " ".join(str(c.args[0]) for c in mock_log.call_args_list if c.args)
+        self.assertIn("handler error", logged)
+        self.assertNotIn("Protocol error", logged)
+        self.assertEqual(list(self.uart_mock.output_buffer), [0x00])
+
     async def test_rfm_unhandled_subop_returns_unksvc(self):
         # Feature gap F2: an unhandled RFM sub-op (e.g. WRITE) wrote no response,
         # leaving the OS-9 client to hang waiting forever. It must now answer
@@ -456,17 +781,44 @@ class TestDriveWire(unittest.IsolatedAsyncioTestCase):
         self.assertNotIn(5, vd.dirty_sectors)
         await vd.close()
 
-
-class _ChunkedSocket:
-    """Minimal socket stand-in whose recv() honors the contract recv(n) <= n,
-    returning data in small straddling chunks to exercise sector reassembly."""
-    def __init__(self, payload, max_chunk=100):
+    async def test_read_bytes_yields_while_waiting_mid_transaction(self):
+        # A half-received transaction must park the protocol task on the UART
+        # stream instead of spinning, so other tasks (web UI, TCP readers) run.
+        self.uart_mock.input_buffer.extend([0x01, 0x02])
+        ticks = 0
+        async def other_task():
+            nonlocal ticks
+            for _ in range(5):
+                ticks += 1
+                await asyncio.sleep(0.001)
+            self.uart_mock.input_buffer.extend([0x03, 0x04])
+        other = asyncio.create_task(other_task())
+        data = await self.server.read_bytes(4)
+        await other
+        self.assertEqual(bytes(data), bytes([1, 2, 3, 4]))
+        self.assertEqual(ticks, 5)
+
+    async def test_read_bytes_times_out_on_silence(self):
+        self.uart_mock.input_buffer.extend([0x01])
+        with patch('drivewire.UART_RX_TIMEOUT_MS', 20):
+            data = await self.server.read_bytes(4)
+        self.assertIsNone(data)
+
+
+class _ChunkedSocket(resilience.AsyncRemoteStream):
+    """Minimal remote-stream stand-in whose recv() honors the contract recv(n) <= n,
+    returning data in small straddling chunks to exercise sector reassembly.
+    recv_into() and its run-length decoding are the real ones, fed by recv()."""
+    def __init__(self, payload, max_chunk=100, rle=False):
+        self._reset()
+        self.rle = rle
         self._buf = bytes(payload)
         self._pos = 0
         self._max = max_chunk
+        self.length = len(self._buf)
         self.closed = False
 
-    def recv(self, n):
+    async def recv(self, n):
         if self._pos >= len(self._buf):
             return b''
         take = min(n, self._max, len(self._buf) - self._pos)
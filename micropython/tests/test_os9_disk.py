@@ -15,8 +15,9 @@ if not hasattr(os, 'sync'):
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import AFTER shim setup
-from drivewire import VirtualDrive, RbfParser, SECTOR_SIZE, MAX_DIR_CACHE_ENTRIES
-from tests.os9_disk_util import generate_minimal_os9_disk, create_lsn0, create_fd
+import resilience
+from drivewire import VirtualDrive, RemoteDrive, RbfParser, SectorCache, SECTOR_SIZE, MAX_DIR_CACHE_ENTRIES, warm_directory_tree, drop_image_sidecars, rbf_format_sectors, RbfBitmap
+from tests.os9_disk_util import generate_minimal_os9_disk, create_lsn0, create_fd, create_bitmap, create_dir_body
 
 class TestOS9Disk(unittest.IsolatedAsyncioTestCase):
     @classmethod
@@ -42,11 +43,12 @@ class TestOS9Disk(unittest.IsolatedAsyncioTestCase):
         if hasattr(self, 'drive') and self.drive:
             await self.drive.close()
             
-        if os.path.exists(self.test_dsk):
-            try:
-                os.remove(self.test_dsk)
-            except OSError:
-                pass
+        for f in (self.test_dsk, self.test_dsk + ".jnl", self.test_dsk + ".dwc"):
+            if os.path.exists(f):
+                try:
+                    os.remove(f)
+                except OSError:
+                    pass
 
     async def test_disk_creation_validity(self):
         """Verify that the generated disk has a valid RBF structure."""
@@ -114,6 +116,10 @@ class TestOS9Disk(unittest.IsolatedAsyncioTestCase):
 
     async def test_cache_eviction_protection(self):
         """Verify that directory sectors are protected from LRU eviction of normal data."""
+        # Dedicated 10-sector cache: 2 directory sectors + 8 data sectors
+        await self.drive.close()
+        self.drive = VirtualDrive(self.test_dsk, cache=SectorCache(10 * SECTOR_SIZE))
+
         # Populate directory cache with LSN 0 and 2
         await self.drive.read_sector(0)
         await self.drive.read_sector(2)
@@ -132,5 +138,229 @@ class TestOS9Disk(unittest.IsolatedAsyncioTestCase):
         self.assertNotIn(10, self.drive.read_cache)
         self.assertIn(19, self.drive.read_cache)
 
+    async def test_shared_cache_rebalances_to_hot_drive(self):
+        """An idle drive's share of the shared budget moves to the busy drive."""
+        pool = SectorCache(16 * SECTOR_SIZE)
+        await self.drive.close()
+        self.drive = VirtualDrive(self.test_dsk, cache=pool)
+        idle = VirtualDrive(self.test_dsk, cache=pool)
+        try:
+            self.assertEqual(self.drive.cache.quota, idle.cache.quota)
+            for _ in range(3):
+                for lsn in range(10, 14):
+                    await self.drive.read_sector(lsn)
+            pool.rebalance()
+            self.assertGreater(self.drive.cache.quota, idle.cache.quota)
+            self.assertLessEqual(self.drive.cache.quota + idle.cache.quota, pool.capacity)
+
+            # Idle drive filling the budget is the one that gives sectors back
+            for lsn in range(20, 36):
+                await idle.read_sector(lsn)
+            self.assertLessEqual(pool.used(), pool.capacity)
+            self.assertIn(13, self.drive.read_cache)
+        finally:
+            await idle.close()
+
+    async def test_slab_slots_are_recycled_and_isolated(self):
+        """Sector data lives in preallocated slab slots that return to the free list."""
+        pool = SectorCache(8 * SECTOR_SIZE)
+        await self.drive.close()
+        self.drive = VirtualDrive(self.test_dsk, cache=pool)
+        free_at_start = pool.slab.nfree
+
+        # Written data is copied into a slot: mutating the source afterwards
+        # (as read_bytes() does to _rx_buf) must not change the dirty sector.
+        src = bytearray([0x5A] * SECTOR_SIZE)
+        await self.drive.write_sector(10, src)
+        src[0] = 0
+        self.assertEqual(self.drive.dirty_sectors[10][0], 0x5A)
+        self.assertIsInstance(self.drive.dirty_sectors[10], memoryview)
+
+        await self.drive.flush()
+        self.assertEqual(len(self.drive.dirty_sectors), 0)
+        for lsn in range(10, 30):
+            await self.drive.read_sector(lsn)
+        self.assertLessEqual(pool.used(), pool.capacity)
+
+        await self.drive.close()
+        self.assertEqual(pool.slab.nfree, free_at_start)
+        self.drive = None
+
+    async def test_free_sectors_answered_from_bitmap(self):
+        """Unallocated LSNs read as zeros without touching the image once the bitmap is seen."""
+        # Stale data in a free sector (a deleted file) proves no media read happens
+        with open(self.test_dsk, "r+b") as f:
+            f.seek(50 * SECTOR_SIZE); f.write(b"\xAA" * SECTOR_SIZE)
+        self.assertEqual(await self.drive.read_sector(50), b"\xAA" * SECTOR_SIZE)
+
+        await self.drive.read_sector(0)
+        await self.drive.read_sector(1)
+        self.drive.read_cache.clear()
+        self.assertEqual(await self.drive.read_sector(50), bytes(SECTOR_SIZE))
+        self.assertEqual(self.drive.stats['free_skips'], 1)
+        # Allocated sectors still come from the image
+        self.assertTrue(RbfParser.is_directory_fd(await self.drive.read_sector(2)))
+
+        # A data write wins even before its bitmap update arrives
+        data = bytes([0x42] * SECTOR_SIZE)
+        await self.drive.write_sector(60, data)
+        await self.drive.flush()
+        self.assertEqual(await self.drive.read_sector(60), data)
+
+        # Writing the bitmap sector makes the OS's view authoritative
+        await self.drive.write_sector(1, create_bitmap(100, [0, 1, 2, 3, 50]))
+        self.drive.read_cache.clear()
+        self.assertEqual(await self.drive.read_sector(50), b"\xAA" * SECTOR_SIZE)
+        self.assertEqual(await self.drive.read_sector(60), bytes(SECTOR_SIZE))
+
+    async def test_inconsistent_lsn0_never_skips(self):
+        """Images whose LSN 0 or bitmap do not describe RBF never short-circuit reads."""
+        await self.drive.close()
+        with open(self.test_dsk, "r+b") as f:
+            f.write(create_lsn0(100)[:4] + bytes([0, 99]))  # DD.MAP too large for DD.TOT
+        self.drive = VirtualDrive(self.test_dsk)
+        await self.drive.read_sector(0)
+        self.assertIsNone(self.drive.bitmap)
+
+        # Valid geometry, but a bitmap that marks LSN 0 free
+        await self.drive.write_sector(0, create_lsn0(100))
+        self.assertIsNotNone(self.drive.bitmap)
+        await self.drive.write_sector(1, bytes(SECTOR_SIZE))
+        self.assertIsNone(self.drive.bitmap)
+        self.assertEqual(self.drive.stats['free_skips'], 0)
+
+    async def test_directory_tree_warmed_breadth_first(self):
+        """The mount-time walk caches every directory FD and body reachable from DD.DIR."""
+        with open(self.test_dsk, "r+b") as f:
+            # Root (FD 2, body 3) holds a file (FD 10) and CMDS (FD 12, body 13)
+            f.seek(3 * SECTOR_SIZE)
+            f.write(create_dir_body([("..", 2), (".", 2), ("startup", 10), ("CMDS", 12)]))
+            f.seek(10 * SECTOR_SIZE); f.write(create_fd(is_dir=False, segments=[(11, 1)]))
+            f.seek(12 * SECTOR_SIZE); f.write(create_fd(is_dir=True, segments=[(13, 1)]))
+            f.seek(13 * SECTOR_SIZE); f.write(create_dir_body([("..", 2), (".", 12)]))
+        await self.drive.read_sector(7)  # CoCo mid-way through a sequential run
+        before = dict(self.drive.stats), self.drive.cache.hits
+
+        await warm_directory_tree(self.drive)
+        # Warm-up reads leave the counters the cache quotas are weighted by alone
+        for k in ('reads', 'read_hits', 'dir_cache_hits'):
+            self.assertEqual(self.drive.stats[k], before[0][k])
+        self.assertEqual(self.drive.cache.hits, before[1])
+        for lsn in (0, 2, 3, 12, 13):
+            self.assertIn(lsn, self.drive.directory_cache)
+        self.assertNotIn(10, self.drive.directory_cache)
+        self.assertIn(13, self.drive.dir_lsns)
+        self.assertEqual(self.drive.stats['warm_state'], 2)
+        self.assertEqual(self.drive.stats['warm_dirs'], 2)
+        self.assertEqual(self.drive._next_lsn, 8)
+
+        hits = self.drive.stats['dir_cache_hits']
+        await self.drive.read_sector(13)
+        self.assertEqual(self.drive.stats['dir_cache_hits'], hits + 1)
+
+        # A remote drive warms over the network while the CoCo's read-ahead
+        # batch is still being consumed: that bookkeeping must survive the walk
+        with open(self.test_dsk, "rb") as f:
+            image = f.read()
+
+        class _Body(resilience.AsyncRemoteStream):
+            def __init__(self, data):
+                self._reset()
+                self._data, self.length = data, len(data)
+            async def recv(self, n):
+                out, self._data = self._data[:n], self._data[n:]
+                return out
+            def close(self):
+                pass
+
+        async def _serve(url, keep_alive=False):
+            path, _, query = url.partition('?')
+            lsn, count = int(path.split('/')[-1]), int(query.split('count=')[1])
+            return _Body(image[lsn * SECTOR_SIZE:(lsn + count) * SECTOR_SIZE])
+
+        remote = RemoteDrive("http://host:6809/disk/test_verify.dsk", cache=SectorCache(64 * SECTOR_SIZE))
+        remote._warm_task.cancel()
+        try:
+            with patch('resilience.open_remote_stream_async', side_effect=_serve):
+                await remote.read_sector(20)
+                await remote.read_sector(21)  # Sequential: fetches 21 and read-ahead 22
+                self.assertEqual((remote._ra_base, remote._ra_count), (22, 1))
+                keys = ('reads', 'read_hits', 'read_misses', 'readahead_waste', 'fetch_window')
+                before = [remote.stats[k] for k in keys], remote.cache.hits
+
+                await warm_directory_tree(remote)
+                for lsn in (0, 2, 3, 12, 13):
+                    self.assertIn(lsn, remote.directory_cache)
+                self.assertEqual(remote.stats['warm_dirs'], 2)
+                self.assertEqual(([remote.stats[k] for k in keys], remote.cache.hits), before)
+                self.assertEqual((remote._ra_base, remote._ra_count), (22, 1))
+                self.assertEqual((remote._next_lsn, remote._ra_window), (22, 2))
+
+                await remote.read_sector(22)
+                self.assertEqual(remote.stats['readahead_hits'], 1)
+        finally:
+            await remote.close()
+
+    async def test_cache_metadata_sidecar_warm_start(self):
+        """Learned directory LSNs and hot sectors survive a remount of an unchanged image."""
+        for lsn in (0, 2, 3, 20):
+            await self.drive.read_sector(lsn)
+        await self.drive.close()
+        self.assertTrue(os.path.exists(self.test_dsk + ".dwc"))
+
+        self.drive = VirtualDrive(self.test_dsk)
+        self.assertIn(2, self.drive.dir_lsns)
+        self.assertIn(3, self.drive.dir_lsns)
+        self.assertIn(20, self.drive._hot)
+        await warm_directory_tree(self.drive, self.drive._hot)
+        self.assertIn(20, self.drive.read_cache)
+        await self.drive.close()
+
+        # A different image generation (size changed) ignores the sidecar
+        with open(self.test_dsk, "ab") as f:
+            f.write(bytes(SECTOR_SIZE))
+        self.drive = VirtualDrive(self.test_dsk)
+        self.assertEqual(len(self.drive.dir_lsns), 0)
+        await self.drive.close()
+
+        drop_image_sidecars(self.test_dsk)
+        self.assertFalse(os.path.exists(self.test_dsk + ".dwc"))
+        self.drive = None
+
+    async def test_rbf_format_writes_a_usable_empty_disk(self):
+        """A sparse RBF format matches the reference layout and reads back as an empty file system."""
+        await self.drive.close()
+        total = 204790                                # ~50MB, with tail bits past the last cluster
+        written = []
+        with open(self.test_dsk, "wb") as f:
+            for lsn, data in rbf_format_sectors(total, "HDD"):
+                written.append(lsn)
+                f.seek(lsn * SECTOR_SIZE)
+                f.write(data)
+            f.seek(total * SECTOR_SIZE - SECTOR_SIZE)
+            f.write(bytes(SECTOR_SIZE))
+        # 100 bitmap sectors, but only the first and last carry set bits
+        self.assertEqual(written, [0, 1, 100, 101, 102])
+        self.drive = VirtualDrive(self.test_dsk)
+
+        lsn0 = await self.drive.read_sector(0)
+        self.assertEqual(bytes(lsn0[:8]), create_lsn0(total)[:8])
+        self.assertEqual(RbfParser.get_root_dir_lsn(lsn0), 101)
+        self.assertEqual(bytes(lsn0[31:34]), b"HD\xc4")
+
+        bitmap = RbfBitmap.from_lsn0(lsn0)
+        self.assertIsNotNone(bitmap)
+        for lsn in range(1, 101):
+            self.assertTrue(bitmap.load(lsn, await self.drive.read_sector(lsn)))
+        self.assertFalse(bitmap.is_free(102))
+        self.assertTrue(bitmap.is_free(1000))
+        self.assertFalse(bitmap.is_free(total - 1))   # Shares a summary span with the tail bits
+
+        root_fd = await self.drive.read_sector(101)
+        self.assertTrue(RbfParser.is_directory_fd(root_fd))
+        self.assertEqual(list(RbfParser.get_segments(root_fd)), [(102, 1)])
+        body = await self.drive.read_sector(102)
+        self.assertEqual(bytes(body[:64]), create_dir_body([("..", 101), (".", 101)])[:64])
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,5 +1,6 @@
 import unittest
 from unittest.mock import MagicMock, patch
+import asyncio
 import os
 import sys
 
@@ -100,5 +101,144 @@ class TestResilience(unittest.TestCase):
             resilience.collect_garbage("testing")
             mock_collect.assert_called()
 
+    def test_keepalive_stream_reuses_and_reconnects(self):
+        """Pooled HTTP/1.1 streams serve several requests and survive a server-side close."""
+        body = bytes(range(256)) * 2
+        resp = b"HTTP/1.1 200 OK\r\nContent-Length: 512\r\n\r\n" + body
+
+        class FakeReader:
+            def __init__(self, data): self.data = bytearray(data)
+            async def read(self, n):
+                out = bytes(self.data[:n]); del self.data[:n]; return out
+
+        class FakeWriter:
+            def __init__(self): self.sent = bytearray()
+            def write(self, b): self.sent.extend(b)
+            async def drain(self): pass
+            def close(self): pass
+
+        # Two responses on the first connection, then the server drops it
+        conns = [(FakeReader(resp * 2), FakeWriter()), (FakeReader(resp), FakeWriter())]
+        first_writer = conns[0][1]
+        async def open_connection(host, port):
+            return conns.pop(0)
+
+        async def fetch_three():
+            streams = []
+            for _ in range(3):
+                stream = await resilience.open_remote_stream_async("http://nas:6809/sectors/a.dsk/0?count=2", keep_alive=True)
+                self.assertIsNotNone(stream)
+                got = bytearray()
+                while True:
+                    chunk = await stream.recv(200)
+                    if not chunk: break
+                    got.extend(chunk)
+                stream.close()
+                self.assertEqual(bytes(got), body)
+                streams.append(stream)
+            return streams
+
+        resilience.close_remote_streams()
+        with patch.object(resilience.asyncio, 'open_connection', open_connection):
+            streams = asyncio.run(fetch_three())
+        self.assertIs(streams[0], streams[2])
+        self.assertEqual(streams[0].requests, 3)
+        self.assertEqual(streams[0].connects, 2)
+        self.assertIn(b"Connection: keep-alive", first_writer.sent)
+        self.assertIn(b"Host: nas:6809", first_writer.sent)
+        resilience.close_remote_streams()
+
+    def test_cancelled_or_malformed_request_frees_pooled_connection(self):
+        """A cancelled request or a bad header drops the pooled socket and frees the slot."""
+        resp = b"HTTP/1.1 200 OK\r\nContent-Length: 4\r\n\r\nabcd"
+        stalled = asyncio.Event()
+
+        class FakeReader:
+            def __init__(self, data, stall=False): self.data, self.stall = bytearray(data), stall
+            async def read(self, n):
+                if self.stall:
+                    stalled.set()
+                    await asyncio.sleep(10)
+                out = bytes(self.data[:n]); del self.data[:n]; return out
+
+        class FakeWriter:
+            def __init__(self): self.closed = False
+            def write(self, b): pass
+            async def drain(self): pass
+            def close(self): self.closed = True
+
+        conns = [(FakeReader(b'', stall=True), FakeWriter()),
+                 (FakeReader(b"HTTP/1.1 200 OK\r\nContent-Length: abc\r\n\r\n"), FakeWriter()),
+                 (FakeReader(resp), FakeWriter())]
+        writers = [w for _, w in conns]
+        async def open_connection(host, port):
+            return conns.pop(0)
+
+        url = "http://nas:6809/sectors/a.dsk/0?count=1"
+        async def scenario():
+            task = asyncio.ensure_future(resilience.open_remote_stream_async(url, keep_alive=True))
+            await stalled.wait()
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            pooled = resilience._keepalive_pool["nas:6809"]
+            self.assertFalse(pooled.busy)
+            self.assertIsNone(pooled.writer)
+            self.assertTrue(writers[0].closed)
+
+            # A non-numeric Content-Length fails the request without leaving the socket pooled
+            self.assertIsNone(await resilience.open_remote_stream_async(url, keep_alive=True))
+            self.assertFalse(pooled.busy)
+            self.assertIsNone(pooled.writer)
+
+            stream = await resilience.open_remote_stream_async(url, keep_alive=True)
+            self.assertIs(stream, pooled)
+            self.assertEqual(await stream.recv(4), b"abcd")
+            stream.close()
+
+        resilience.close_remote_streams()
+        with patch.object(resilience.asyncio, 'open_connection', open_connection):
+            asyncio.run(scenario())
+        resilience.close_remote_streams()
+
+    def test_stream_parses_headers_in_blocks_and_dechunks(self):
+        """Headers arrive in a few recv() calls; chunked bodies are decoded across splits."""
+        resp = (b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+                b"5\r\nhello\r\n1;ext=1\r\n \r\nA\r\n0123456789\r\n0\r\nX-Trailer: y\r\n\r\n")
+
+        class FakeSock:
+            def __init__(self, data): self.data = bytearray(data); self.calls = 0; self.closed = False
+            def send(self, b): pass
+            def recv(self, n):
+                self.calls += 1
+                n = min(n, 7)  # Awkward splits through framing and data
+                out = bytes(self.data[:n]); del self.data[:n]; return out
+            def close(self): self.closed = True
+
+        sock = FakeSock(resp)
+        with patch('resilience._connect', return_value=sock):
+            stream = resilience.open_remote_stream("http://nas:6809/files", addr=('nas', 6809))
+        self.assertEqual(stream.status, 200)
+        self.assertTrue(stream.chunked)
+        self.assertEqual(stream.length, -1)
+        got = bytearray()
+        while True:
+            chunk = stream.recv(4)
+            if not chunk: break
+            self.assertLessEqual(len(chunk), 4)
+            got.extend(chunk)
+        self.assertEqual(bytes(got), b"hello 0123456789")
+        self.assertEqual(stream.remaining, 0)
+        stream.close()
+        self.assertTrue(sock.closed)
+
+        # Content-Length is exposed before the body is read
+        sock = FakeSock(b"HTTP/1.0 200 OK\r\nContent-Length: 3\r\n\r\nabcEXTRA")
+        with patch('resilience._connect', return_value=sock):
+            stream = resilience.open_remote_stream("http://nas:6809/x", addr=('nas', 6809))
+        self.assertEqual(stream.length, 3)
+        self.assertEqual(stream.recv(100), b"abc")
+        self.assertEqual(stream.recv(100), b"")
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,3 +1,4 @@
+import asyncio
 import unittest
 from unittest.mock import MagicMock, patch, AsyncMock
 import sys
@@ -58,6 +59,9 @@ class TestWebAPI(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(status, 202)
         self.assertIn("accepted", response["status"])
         mock_create_task.assert_called()
+        # The mock never schedules the job: close it so it isn't left un-awaited
+        mock_create_task.call_args[0][0].close()
+        web_server._creating_disk = False
 
     async def test_create_blank_disk_duplicate(self):
         web_server._creating_disk = True
@@ -139,6 +143,147 @@ class TestWebAPI(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(status, 411)
         self.assertIn("Content-Length", response["error"])
 
+    async def test_upload_streams_through_reused_ring_slots(self):
+        # Body bytes are read straight into a fixed ring of whole-block slots
+        # and written from there; the slot buffers are the only data buffers.
+        import tempfile
+        payload = bytes((i * 13) & 0xFF for i in range(10 * web_server.UPLOAD_SLOT_SIZE + 300))
+        headers = {'X-Filename': 'up.dsk', 'Content-Length': str(len(payload))}
+
+        class _Body:
+            def __init__(self, data):
+                self._data, self.targets = data, set()
+            async def readinto(self, view):
+                self.targets.add(id(view.obj))
+                n = min(len(view), 1460, len(self._data))   # One TCP segment at a time
+                view[:n] = self._data[:n]
+                self._data = self._data[n:]
+                return n
+
+        request = MagicMock()
+        request.headers.get.side_effect = lambda k, d=None: headers.get(k, d)
+        request.stream = _Body(payload)
+        fd, path = tempfile.mkstemp(suffix='.dsk')
+        os.close(fd)
+        writes = []
+        def _open(p, mode='r'):
+            f = open(path, mode)
+            write = f.write
+            f.write = lambda b: writes.append(len(b)) or write(b)
+            return f
+        try:
+            with patch('web_server.open', create=True, side_effect=_open), \
+                 patch('web_server.sd_card.is_mounted', return_value=True), \
+                 patch('web_server.os.statvfs', create=True, return_value=(4096, 4096, 1000, 1000, 1000, 0, 0, 0, 0, 255)), \
+                 patch('web_server.refresh_dsk_entry'):
+                result = await web_server.upload_file_endpoint(request)
+            self.assertEqual(result['size'], len(payload))
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), payload)
+            self.assertEqual(len(request.stream.targets), 1)
+            self.assertEqual(writes, [web_server.UPLOAD_SLOT_SIZE] * 10 + [300])
+            self.assertEqual(web_server.app.upload_written, len(payload))
+        finally:
+            os.remove(path)
+
+    async def test_resumable_upload_survives_a_dropped_chunk(self):
+        # A chunk cut off mid-stream commits what arrived; the client asks for
+        # the committed count, resumes from there, and the last chunk renames
+        # the .part file over the target.
+        import tempfile
+        import shutil
+        root = tempfile.mkdtemp()
+        real_open, real_remove, real_rename = open, os.remove, os.rename
+        real_entries, real_stat = web_server._dir_entries, os.stat
+        sd = lambda p: root + p[3:] if p.startswith('/sd/') else p
+        payload = bytes((i * 31) & 0xFF for i in range(20000))
+        with real_open(root + '/game.dsk', 'wb') as f:
+            f.write(b'old image')
+
+        class _Body:
+            def __init__(self, data):
+                self._data = data
+            async def readinto(self, view):
+                n = min(len(view), len(self._data))
+                view[:n] = self._data[:n]
+                self._data = self._data[n:]
+                return n
+
+        def _put(sid, start, end, data):
+            headers = {'Content-Range': f'bytes {start}-{end}/{len(payload)}', 'Content-Length': str(end - start + 1)}
+            request = MagicMock(method='PUT')
+            request.headers.get.side_effect = lambda k, d=None: headers.get(k, d)
+            request.stream = _Body(data)
+            return web_server.upload_chunk_endpoint(request, sid)
+
+        web_server._upload_sessions.clear()
+        web_server._upload_sessions_restored = True
+        try:
+            with patch('web_server.open', create=True, side_effect=lambda p, m='r': real_open(sd(p), m)), \
+                 patch('web_server.os.remove', side_effect=lambda p: real_remove(sd(p))), \
+                 patch('web_server.os.rename', side_effect=lambda a, b: real_rename(sd(a), sd(b))), \
+                 patch('web_server.os.stat', side_effect=lambda p: real_stat(sd(p))), \
+                 patch('web_server._dir_entries', side_effect=lambda p: real_entries(sd(p + '/'))), \
+                 patch('web_server.sd_card.is_mounted', return_value=True), \
+                 patch('web_server.sd_card.was_mounted', return_value=True), \
+                 patch('web_server.os.statvfs', create=True, return_value=(4096, 4096, 1000, 1000, 1000, 0, 0, 0, 0, 255)), \
+                 patch('web_server.refresh_dsk_entry'):
+                request = MagicMock()
+                request.json = {'filename': 'game.dsk', 'size': len(payload), 'fingerprint': 'fp-1'}
+                result, status = await web_server.upload_session_endpoint(request)
+                self.assertEqual(status, 201)
+                sid = result['session']
+
+                # The first chunk drops after 6000 of its 12000 bytes
+                result, status = await _put(sid, 0, 11999, payload[:6000])
+                self.assertEqual((status, result['committed']), (400, 6000))
+                self.assertFalse(web_server._uploading)
+
+                # Skipping ahead is refused; reopening the session resumes it
+                result, status = await _put(sid, 12000, 19999, payload[12000:])
+                self.assertEqual((status, result['committed']), (416, 6000))
+                result = await web_server.upload_session_endpoint(request)
+                self.assertEqual((result['session'], result['committed']), (sid, 6000))
+                # A different image of the same name and size never inherits that prefix
+                other = MagicMock()
+                other.json = {'filename': 'game.dsk', 'size': len(payload), 'fingerprint': 'fp-2'}
+                result, status = await web_server.upload_session_endpoint(other)
+                self.assertEqual((status, result['committed']), (201, 0))
+                self.assertNotIn(sid, web_server._upload_sessions)
+                result, status = await web_server.upload_session_endpoint(request)
+                self.assertEqual(status, 201)
+                sid = result['session']
+                await _put(sid, 0, 5999, payload[:6000])
+                self.assertEqual(await web_server.upload_chunk_endpoint(MagicMock(method='GET'), sid),
+                                 {'session': sid, 'size': len(payload), 'committed': 6000})
+
+                result = await _put(sid, 6000, 15999, payload[6000:16000])
+                self.assertEqual(result['committed'], 16000)
+                with real_open(root + '/game.dsk', 'rb') as f:
+                    self.assertEqual(f.read(), b'old image')    # Untouched until complete
+
+                # A reboot loses the RAM sessions: the saved one comes back with
+                # its id, and a .part with no session record is deleted
+                with real_open(root + '/lost.dsk.part', 'wb') as f:
+                    f.write(b'orphan')
+                web_server._upload_sessions.clear()
+                web_server._upload_sessions_restored = False
+                result = await web_server.upload_chunk_endpoint(MagicMock(method='GET'), sid)
+                self.assertEqual(result['committed'], 16000)
+                self.assertFalse(os.path.exists(root + '/lost.dsk.part'))
+
+                result = await _put(sid, 16000, 19999, payload[16000:])
+                self.assertEqual(result['status'], 'ok')
+            with real_open(root + '/game.dsk', 'rb') as f:
+                self.assertEqual(f.read(), payload)
+            self.assertFalse(os.path.exists(root + '/game.dsk.part'))
+            self.assertFalse(os.path.exists(root + '/game.dsk.part.meta'))
+            self.assertEqual(web_server._upload_sessions, {})
+        finally:
+            web_server._upload_sessions.clear()
+            web_server._upload_sessions_restored = False
+            shutil.rmtree(root)
+
     async def test_stream_remote_info_handles_structural_chars_in_names(self):
         # Defect #9: the streaming /info parser counted '{','}','[',']' and ','
         # even inside string values, so a disk name containing any of them
@@ -157,7 +302,7 @@ class TestWebAPI(unittest.IsolatedAsyncioTestCase):
             def __init__(self, data, chunk=7):
                 self._data, self._pos, self._chunk = data, 0, chunk
                 self.closed = False
-            def recv(self, n):
+            async def recv(self, n):
                 end = min(self._pos + self._chunk, len(self._data))
                 out = self._data[self._pos:end]
                 self._pos = end
@@ -166,8 +311,9 @@ class TestWebAPI(unittest.IsolatedAsyncioTestCase):
                 self.closed = True
 
         sock = _InfoSocket(payload)
-        with patch('web_server.resilience.open_remote_stream', return_value=sock):
-            disks = list(web_server.stream_remote_info("http://host:6809"))
+        disks = []
+        with patch('web_server.resilience.open_remote_stream_async', new_callable=AsyncMock, return_value=sock):
+            await web_server.stream_remote_info("http://host:6809", disks.append)
 
         self.assertEqual(
             [d["name"] for d in disks],
@@ -175,6 +321,220 @@ class TestWebAPI(unittest.IsolatedAsyncioTestCase):
         )
         self.assertTrue(sock.closed)
 
+    async def test_stream_remote_info_quotes_disk_name(self):
+        # Names on a --recursive server may hold spaces, '&', '#', '+' or '%';
+        # they must reach the server as one percent-encoded query value.
+        sock = MagicMock()
+        sock.recv = AsyncMock(return_value=b'')
+        with patch('web_server.resilience.open_remote_stream_async', new_callable=AsyncMock, return_value=sock) as opener:
+            await web_server.stream_remote_info("http://host:6809", lambda d: None, name="games/A&B #2+100%.dsk")
+        self.assertEqual(opener.await_args[0][0],
+                         "http://host:6809/info?name=games%2FA%26B%20%232%2B100%25.dsk")
+
+    async def test_remote_clone_delta_fetches_only_changed_chunks(self):
+        # An existing local copy is compared against the server's chunk
+        # manifest; only chunks whose digests differ are downloaded. A failed
+        # manifest request is retried rather than taken as "no manifest".
+        import hashlib
+        import tempfile
+        remote = bytes((i * 7) & 0xFF for i in range(300 * 256))
+        local = bytearray(remote[:260 * 256])    # Short: chunk 4 is incomplete
+        local[70 * 256] ^= 0xFF                   # Chunk 1 differs
+        fd, local_path = tempfile.mkstemp(suffix='.dsk')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(local)
+
+        class _Body(web_server.resilience.AsyncRemoteStream):
+            def __init__(self, data):
+                self._reset()
+                self._data, self.length = data, len(data)
+            async def recv(self, n):
+                out, self._data = self._data[:n], self._data[n:]
+                return out
+            def close(self):
+                pass
+
+        urls = []
+        async def _serve(url, keep_alive=False):
+            urls.append(url)
+            path, _, query = url.partition('?')
+            args = dict(kv.split('=') for kv in query.split('&'))
+            if '/manifest/' in path:
+                if len(urls) == 1:
+                    return None
+                out = b''
+                for i in range(int(args['start']), int(args['start']) + int(args['count'])):
+                    chunk = remote[i * 64 * 256:(i + 1) * 64 * 256]
+                    if chunk:
+                        out += hashlib.sha256(chunk).digest()[:8]
+                return _Body(out)
+            lsn = int(path.split('/')[-1])
+            return _Body(remote[lsn * 256:(lsn + int(args['count'])) * 256])
+
+        async def _info(server_url, visit, name=None):
+            visit({'name': 'build.dsk', 'total_sectors': 300})
+
+        tasks = []
+        request = MagicMock()
+        request.json = {'remote_url': 'http://host:6809', 'disk_name': 'build.dsk', 'local_path': local_path}
+        try:
+            with patch('web_server.stream_remote_info', side_effect=_info), \
+                 patch('web_server._sanitize_path', side_effect=lambda p: p), \
+                 patch('web_server.os.statvfs', create=True, return_value=(4096, 4096, 1000, 1000, 1000, 0, 0, 0, 0, 255)), \
+                 patch('web_server.asyncio.create_task', side_effect=tasks.append), \
+                 patch('web_server.resilience.open_remote_stream_async', side_effect=_serve):
+                result = await web_server.remote_clone_endpoint(request)
+                self.assertEqual(result['status'], 'started')
+                await tasks[0]
+
+            with open(local_path, 'rb') as f:
+                self.assertEqual(f.read(), remote)
+            fetched = [u.split('?')[0].split('/')[-1] for u in urls if '/sectors/' in u]
+            self.assertEqual(fetched, ['64', '256'])
+            self.assertEqual(web_server._clone_progress['state'], 'complete')
+            self.assertEqual(web_server._clone_progress['reused'], 192)
+        finally:
+            os.remove(local_path)
+
+
+    async def test_failed_resync_keeps_existing_local_copy(self):
+        # A clone onto an existing image updates it in place; a network error
+        # part-way must leave the user's file on the card, not delete it.
+        import tempfile
+        fd, local_path = tempfile.mkstemp(suffix='.dsk')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b'\x5a' * 256 * 100)
+
+        async def _info(server_url, visit, name=None):
+            visit({'name': 'build.dsk', 'total_sectors': 100})
+
+        tasks = []
+        request = MagicMock()
+        request.json = {'remote_url': 'http://host:6809', 'disk_name': 'build.dsk', 'local_path': local_path}
+        try:
+            with patch('web_server.stream_remote_info', side_effect=_info), \
+                 patch('web_server._sanitize_path', side_effect=lambda p: p), \
+                 patch('web_server.os.statvfs', create=True, return_value=(4096, 4096, 1000, 1000, 1000, 0, 0, 0, 0, 255)), \
+                 patch('web_server.asyncio.create_task', side_effect=tasks.append), \
+                 patch('web_server.resilience.open_remote_stream_async', new_callable=AsyncMock, return_value=None):
+                await web_server.remote_clone_endpoint(request)
+                await tasks[0]
+            self.assertEqual(web_server._clone_progress['state'], 'error')
+            self.assertIn('local copy kept', web_server._clone_progress['error'])
+            with open(local_path, 'rb') as f:
+                self.assertEqual(f.read(), b'\x5a' * 256 * 100)
+        finally:
+            os.remove(local_path)
+
+
+    async def test_failed_full_clone_leaves_existing_image_unchanged(self):
+        # A local copy larger than the remote image can't be updated in place:
+        # the new copy goes to a temp file, so a failure leaves the old one.
+        import tempfile
+        fd, local_path = tempfile.mkstemp(suffix='.dsk')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b'\x5a' * 256 * 100)
+
+        class _Body(web_server.resilience.AsyncRemoteStream):
+            def __init__(self, data):
+                self._reset()
+                self._data, self.length = data, len(data)
+            async def recv(self, n):
+                out, self._data = self._data[:n], self._data[n:]
+                return out
+            def close(self):
+                pass
+
+        served = []
+        async def _serve(url, keep_alive=False):
+            served.append(url)
+            return _Body(b'\x11' * 64 * 256) if len(served) == 1 else None
+
+        async def _info(server_url, visit, name=None):
+            visit({'name': 'build.dsk', 'total_sectors': 80})
+
+        tasks = []
+        request = MagicMock()
+        request.json = {'remote_url': 'http://host:6809', 'disk_name': 'build.dsk', 'local_path': local_path}
+        try:
+            with patch('web_server.stream_remote_info', side_effect=_info), \
+                 patch('web_server._sanitize_path', side_effect=lambda p: p), \
+                 patch('web_server.os.statvfs', create=True, return_value=(4096, 4096, 1000, 1000, 1000, 0, 0, 0, 0, 255)), \
+                 patch('web_server.asyncio.create_task', side_effect=tasks.append), \
+                 patch('web_server.resilience.open_remote_stream_async', side_effect=_serve):
+                await web_server.remote_clone_endpoint(request)
+                await tasks[0]
+            self.assertEqual(web_server._clone_progress['state'], 'error')
+            self.assertIn('local copy unchanged', web_server._clone_progress['error'])
+            with open(local_path, 'rb') as f:
+                self.assertEqual(f.read(), b'\x5a' * 256 * 100)
+            self.assertFalse(os.path.exists(local_path + web_server.CLONE_TMP_SUFFIX))
+        finally:
+            os.remove(local_path)
+
+
+    async def test_dsk_index_persists_and_updates_in_place(self):
+        # The listing comes from a persisted index: handlers update single
+        # entries, and reconciliation folds in changes made behind the UI's back.
+        import tempfile
+        import shutil
+        root = tempfile.mkdtemp()
+        os.mkdir(root + '/games')
+        for name, size in (('a.dsk', 512), ('games/b.dsk', 1024), ('notes.txt', 10)):
+            with open(f'{root}/{name}', 'wb') as f:
+                f.write(bytes(size))
+        scan = web_server._scan_dsk_dir
+        def _scan(base, depth=0, max_depth=3):
+            return scan(root if base == '/' else base, depth, max_depth)
+        try:
+            with patch('web_server._scan_dsk_dir', side_effect=_scan), \
+                 patch('web_server.DSK_INDEX_FILE', root + '/.dsk_index'), \
+                 patch('web_server._DSK_INDEX_TMP', root + '/.dsk_index.tmp'), \
+                 patch('web_server.sd_card.is_mounted', return_value=False), \
+                 patch('web_server.sd_card.was_mounted', return_value=False):
+                web_server._dsk_index = None
+                self.assertEqual(web_server.get_dsk_files(), [root + '/a.dsk', root + '/games/b.dsk'])
+
+                # A restart reloads the index from flash without scanning
+                web_server._dsk_index = None
+                with patch('web_server._scan_dsk_dir', side_effect=AssertionError('scanned')):
+                    info = await web_server.files_info_endpoint(MagicMock())
+                self.assertEqual(info[root + '/games/b.dsk']['size'], 1024)
+
+                # Handlers update their entry in place; the burst is saved once
+                with open(root + '/c.dsk', 'wb') as f:
+                    f.write(bytes(256))
+                with patch('web_server._save_dsk_index', wraps=web_server._save_dsk_index) as save:
+                    web_server.refresh_dsk_entry(root + '/c.dsk')
+                    os.remove(root + '/a.dsk')
+                    web_server.refresh_dsk_entry(root + '/a.dsk')
+                    self.assertEqual(web_server.get_dsk_files(), [root + '/c.dsk', root + '/games/b.dsk'])
+                    self.assertEqual(save.call_count, 0)
+                    while web_server._dsk_save_task is not None:
+                        await asyncio.sleep(0)
+                    self.assertEqual(save.call_count, 1)
+
+                # An image rewritten in place keeps its size but gets a new mtime
+                os.utime(root + '/games/b.dsk', (1000, 1000))
+                await web_server._reconcile_dsk_index()
+                self.assertEqual(web_server._dsk_index[root + '/games/b.dsk'], [1024, 1000])
+                with patch('web_server._save_dsk_index') as save:
+                    await web_server._reconcile_dsk_index()
+                save.assert_not_called()
+
+                # Changes made elsewhere are picked up by reconciliation
+                with open(root + '/games/d.dsk', 'wb') as f:
+                    f.write(bytes(256))
+                os.remove(root + '/c.dsk')
+                await web_server._reconcile_dsk_index()
+                web_server._dsk_index = None
+                self.assertEqual(web_server.get_dsk_files(), [root + '/games/b.dsk', root + '/games/d.dsk'])
+        finally:
+            web_server._dsk_index = None
+            web_server._dsk_sorted = None
+            web_server._dsk_index_dirty = False
+            shutil.rmtree(root)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -10,27 +10,405 @@ Usage:
     python sector_server.py --dir /path/to/disk/images --port 8080
 
 Endpoints:
-    GET  /info                          - Server info and available disks
-    GET  /files                         - List all .dsk files
+    GET  /info?offset=I&limit=N         - Server info and available disks
+    GET  /info?name=<filename>          - Server info and one disk
+    GET  /files?offset=I&limit=N        - List .dsk files (X-Total-Count header)
+    GET  /manifest/<filename>?chunk=N&start=I&count=M
+                                        - Digests of M N-sector chunks from chunk I
     GET  /sector/<filename>/<lsn>       - Read a single 256-byte sector
     GET  /sectors/<filename>/<lsn>?count=N  - Read N consecutive sectors (bulk)
+         ...&enc=rle                    - Same, run-length encoded (x-dw-rle)
     PUT  /sector/<filename>/<lsn>       - Write a single 256-byte sector
+    PUT  /sectors/<filename>/<lsn>      - Write N consecutive sectors (bulk, body of N*256 bytes)
+
+Connections are HTTP/1.1 keep-alive: the Pico reuses one connection for
+every sector fetch instead of paying a TCP handshake per request. Each
+connection is served on its own thread. Image files stay open in a bounded
+LRU shared by all threads and are read with positional I/O, so concurrent
+clients never share a file offset. Bulk reads are sent with sendfile()
+straight from the page cache; only the part of a range past the end of the
+image is padded, from a fixed zero buffer.
+
+Listings come from an in-memory ImageIndex kept fresh by a background
+thread: a directory is rescanned only when its mtime changes, so /info and
+/files cost no filesystem calls even with thousands of images. With
+--recursive, images in sub-directories are named by their relative path
+(`archive/1987/games.dsk`), and every endpoint accepts such names.
+
+A bulk read may ask for the x-dw-rle encoding (`enc=rle`, or
+`Accept-Encoding: x-dw-rle`). The body is then a series of records, each
+headed by a big-endian 16-bit word: bit 15 clear means the low 15 bits count
+literal bytes that follow; bit 15 set means the count repeats the one byte
+that follows. Free space and format fill shrink to three bytes a run, and
+the Pico decodes the records straight into its sector buffers.
+
+A manifest is the first MANIFEST_DIGEST bytes of the SHA-256 of each chunk
+(the chunk's whole sectors, clipped at the end of the image), back to back.
+A clone hashes its existing local copy the same way and fetches only the
+chunks whose digests differ. Digests are computed as they are first asked
+for and kept with the open image until its size or mtime changes.
 """
 
 import argparse
+import hashlib
 import json
 import os
+import re
 import sys
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse, parse_qs
+import threading
+import time
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, unquote
 
 SECTOR_SIZE = 256
 DEFAULT_PORT = 8080
+KEEPALIVE_IDLE_S = 30  # Close keep-alive connections idle this long
+MAX_PUT_SECTORS = 64   # Largest bulk write accepted in one request (16KB)
+DEFAULT_MAX_OPEN = 32  # Image files kept open between requests
+DEFAULT_MAX_COUNT = 256  # Largest bulk read in sectors (64KB); --max-count
+_ZEROS = bytes(64 * 1024)  # Tail padding source, sent in slices
+RLE_MIN_RUN = 8        # Shorter repeats stay inside a literal record
+RLE_MAX_RECORD = 0x7FFF
+RLE_ENCODING = 'x-dw-rle'
+_RUN_RE = re.compile(rb'(.)\1{%d,}' % (RLE_MIN_RUN - 1), re.S)
+MANIFEST_DIGEST = 8    # Bytes of SHA-256 kept per chunk
+MAX_MANIFEST_CHUNK = 1024  # Largest chunk in sectors (256KB)
+MAX_MANIFEST_COUNT = 256   # Digests per manifest request
+INDEX_RESCAN_S = 60.0  # Full re-stat of the index (catches images rewritten in place)
+REVALIDATE_S = 2.0     # Re-stat a cached image at most this often (catches replaced files)
+
+
+def rle_encode(data):
+    """Encode `data` as x-dw-rle records (see the module docstring)."""
+    out = bytearray()
+    pos = 0
+    # Runs found by the regex, then a zero-length run to flush the tail literal
+    runs = [(m.start(), m.end()) for m in _RUN_RE.finditer(data)]
+    runs.append((len(data), len(data)))
+    for start, end in runs:
+        while pos < start:
+            n = min(start - pos, RLE_MAX_RECORD)
+            out += n.to_bytes(2, 'big')
+            out += data[pos:pos + n]
+            pos += n
+        while pos < end:
+            n = min(end - pos, RLE_MAX_RECORD)
+            out += (0x8000 | n).to_bytes(2, 'big')
+            out += data[start:start + 1]
+            pos += n
+    return bytes(out)
+
+
+class ImageHandle:
+    """One open image file. pread/pwrite never touch a shared file offset."""
+
+    def __init__(self, path, writable):
+        flags = (os.O_RDWR if writable else os.O_RDONLY) | getattr(os, 'O_BINARY', 0)
+        try:
+            self.fd = os.open(path, flags)
+        except PermissionError:
+            self.fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        st = os.fstat(self.fd)
+        self.ident = (st.st_ino, st.st_mtime_ns) if st.st_ino else None
+        self.checked = time.monotonic()
+        self.refs = 0
+        self.evicted = False
+        self._lock = threading.Lock()  # Only used where os.pread is missing (Windows)
+        self._digests = {}  # chunk sectors -> (generation, [digest or None, ...])
+        self._digest_lock = threading.Lock()
+
+    def size(self):
+        return os.fstat(self.fd).st_size
+
+    def pread(self, n, offset):
+        if hasattr(os, 'pread'):
+            return os.pread(self.fd, n, offset)
+        with self._lock:
+            os.lseek(self.fd, offset, os.SEEK_SET)
+            return os.read(self.fd, n)
+
+    def pwrite(self, data, offset):
+        if hasattr(os, 'pwrite'):
+            return os.pwrite(self.fd, data, offset)
+        with self._lock:
+            os.lseek(self.fd, offset, os.SEEK_SET)
+            return os.write(self.fd, data)
+
+    def digests(self, chunk, start, count):
+        """Digests of chunks [start, start + count) of `chunk` sectors each.
+
+        Chunks past the end of the image are left out. Each digest is hashed
+        once per generation of the file (its size and mtime).
+        """
+        st = os.fstat(self.fd)
+        total = st.st_size // SECTOR_SIZE
+        generation = (st.st_size, st.st_mtime_ns)
+        nchunks = (total + chunk - 1) // chunk
+        with self._digest_lock:
+            gen, table = self._digests.get(chunk, (None, None))
+            if gen != generation:
+                table = [None] * nchunks
+                self._digests[chunk] = (generation, table)
+        out = bytearray()
+        for i in range(start, min(start + count, nchunks)):
+            digest = table[i]
+            if digest is None:
+                lsn = i * chunk
+                n = min(chunk, total - lsn) * SECTOR_SIZE
+                digest = table[i] = hashlib.sha256(self.pread(n, lsn * SECTOR_SIZE)).digest()[:MANIFEST_DIGEST]
+            out += digest
+        return bytes(out)
+
+    def close(self):
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+class _RangeReader:
+    """File-like view of an ImageHandle for socket.sendfile().
+
+    fileno() feeds the zero-copy os.sendfile path. seek()/read() back the
+    send() fallback used where sendfile is unavailable, via pread, so the
+    shared descriptor's offset is never moved.
+    """
+
+    def __init__(self, h):
+        self.h = h
+        self.pos = 0
+
+    def fileno(self):
+        return self.h.fd
+
+    def seek(self, pos):
+        self.pos = pos
+
+    def read(self, n):
+        data = self.h.pread(n, self.pos)
+        self.pos += len(data)
+        return data
+
+
+class ImageCache:
+    """Bounded LRU of open ImageHandles, shared by every handler thread.
+
+    A handle is revalidated against the path every REVALIDATE_S seconds, so
+    an image replaced on disk (a fresh build) is reopened. Evicted handles
+    still in use by another thread close when that thread releases them.
+    """
+
+    def __init__(self, capacity, writable):
+        self.capacity = max(1, capacity)
+        self.writable = writable
+        self._handles = OrderedDict()  # path -> ImageHandle
+        self._lock = threading.Lock()
+
+    def acquire(self, path):
+        """An ImageHandle for `path` (caller must release()), or None if it is gone."""
+        with self._lock:
+            h = self._handles.get(path)
+            now = time.monotonic()
+            if h is not None and now - h.checked >= REVALIDATE_S:
+                try:
+                    st = os.stat(path)
+                    stale = h.ident is not None and (st.st_ino, st.st_mtime_ns) != h.ident
+                except OSError:
+                    stale = True
+                if stale:
+                    self._drop(path)
+                    h = None
+                else:
+                    h.checked = now
+            if h is None:
+                if not os.path.isfile(path):
+                    return None
+                h = self._handles[path] = ImageHandle(path, self.writable)
+                while len(self._handles) > self.capacity:
+                    self._drop(next(iter(self._handles)))
+            else:
+                self._handles.move_to_end(path)
+            h.refs += 1
+            return h
+
+    def release(self, h):
+        with self._lock:
+            h.refs -= 1
+            if h.evicted and not h.refs:
+                h.close()
+
+    def touch(self, h):
+        """A write changed the file: record its new identity so it is not reopened."""
+        with self._lock:
+            st = os.fstat(h.fd)
+            if h.ident is not None:
+                h.ident = (st.st_ino, st.st_mtime_ns)
+
+    def _drop(self, path):
+        h = self._handles.pop(path)
+        h.evicted = True
+        if not h.refs:
+            h.close()
+
+    def close_all(self):
+        with self._lock:
+            for path in list(self._handles):
+                self._drop(path)
+
+
+def _inside(root, path):
+    """True if `path`, with symlinks resolved, lies under the directory `root`."""
+    root = os.path.realpath(root)
+    return os.path.commonpath([root, os.path.realpath(path)]) == root
+
+
+class ImageIndex:
+    """In-memory index of the .dsk images under the serving directory.
+
+    Each entry holds name, size, total_sectors, mtime and a generation that
+    is bumped whenever the file changes. A background thread checks the
+    directory mtimes every REVALIDATE_S seconds and rescans only the
+    directories that changed. Every INDEX_RESCAN_S it also re-stats every
+    image, which catches images rewritten in place.
+    """
+
+    def __init__(self, root, recursive=False):
+        self.root = root
+        self.recursive = recursive
+        self._dirs = {}    # relative dir -> (mtime_ns, image names, sub-dirs)
+        self._images = {}  # relative name -> entry dict
+        self._sorted = []
+        self._ready = threading.Event()
+        self._full_at = 0.0
+
+    def start(self):
+        """Build the index, then keep it fresh from a daemon thread."""
+        self.refresh()
+        threading.Thread(target=self._run, name='image-index', daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(REVALIDATE_S)
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing image index: {e}")
+
+    def images(self):
+        """Every image entry, sorted by name (a snapshot; do not modify)."""
+        self._ready.wait()
+        return self._sorted
+
+    def get(self, name):
+        self._ready.wait()
+        return self._images.get(name)
+
+    def refresh(self):
+        now = time.monotonic()
+        full = now - self._full_at >= INDEX_RESCAN_S
+        if full:
+            self._full_at = now
+        changed = False
+        seen = set()
+        stack = ['']
+        while stack:
+            rel = stack.pop()
+            path = os.path.join(self.root, rel) if rel else self.root
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            seen.add(rel)
+            known = self._dirs.get(rel)
+            if full or known is None or known[0] != mtime:
+                known, dir_changed = self._scan(rel, path, mtime)
+                changed |= dir_changed
+            stack.extend(known[2])
+        for rel in [d for d in self._dirs if d not in seen]:
+            self._forget(rel)
+            changed = True
+        if changed or not self._ready.is_set():
+            # Swapped in whole: handlers iterate the old list undisturbed
+            self._sorted = sorted(self._images.values(), key=lambda d: d['name'])
+        self._ready.set()
+
+    def _scan(self, rel, path, mtime):
+        """Re-list one directory; returns its record and whether any image changed."""
+        names, subdirs = [], []
+        changed = False
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.name.startswith('.'):
+                        continue
+                    child = f'{rel}/{entry.name}' if rel else entry.name
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if self.recursive:
+                                subdirs.append(child)
+                            continue
+                        if not entry.name.lower().endswith('.dsk') or not entry.is_file():
+                            continue
+                        if entry.is_symlink() and not _inside(self.root, entry.path):
+                            continue  # Not servable: _get_disk_path refuses it
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    names.append(child)
+                    old = self._images.get(child)
+                    ident = (st.st_ino, st.st_size, st.st_mtime_ns)
+                    if old is None or old['_ident'] != ident:
+                        self._images[child] = {
+                            'name': child,
+                            'size': st.st_size,
+                            'total_sectors': st.st_size // SECTOR_SIZE,
+                            'mtime': int(st.st_mtime),
+                            'generation': old['generation'] + 1 if old else 1,
+                            '_ident': ident,
+                        }
+                        changed = True
+        except OSError as e:
+            print(f"Error listing directory {path}: {e}")
+        old = self._dirs.get(rel)
+        if old is not None:
+            keep = set(names)
+            for name in old[1]:
+                if name not in keep:
+                    self._images.pop(name, None)
+                    changed = True
+            for sub in old[2]:
+                if sub not in subdirs:
+                    self._forget(sub)
+                    changed = True
+        record = self._dirs[rel] = (mtime, names, subdirs)
+        return record, changed
+
+    def _forget(self, rel):
+        record = self._dirs.pop(rel, None)
+        if record is None:
+            return
+        for name in record[1]:
+            self._images.pop(name, None)
+        for sub in record[2]:
+            self._forget(sub)
+
+
+def _public(entry):
+    return {k: v for k, v in entry.items() if not k.startswith('_')}
 
 
 class SectorHandler(BaseHTTPRequestHandler):
     """HTTP request handler for sector-level disk image access."""
 
+    # Keep-alive: every response carries Content-Length, so the connection
+    # stays open for the client's next request.
+    protocol_version = 'HTTP/1.1'
+    timeout = KEEPALIVE_IDLE_S
+    # Headers and body go out as separate small writes; with Nagle on, a
+    # keep-alive client's delayed ACK stalls every response by ~40ms.
+    disable_nagle_algorithm = True
+
     def log_message(self, format, *args):
         """Override to add cleaner logging."""
         print(f"[{self.log_date_time_string()}] {format % args}")
@@ -52,114 +430,211 @@ class SectorHandler(BaseHTTPRequestHandler):
         self.end_headers()
         self.wfile.write(data)
 
+    def _send_range(self, h, offset, length):
+        """Send `length` bytes of image `h` from `offset`, zero-padded past EOF.
+
+        Memory use is constant whatever the range: the image part goes out
+        through sendfile(), and the padding is sliced from _ZEROS.
+        """
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(length))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        avail = min(length, max(0, h.size() - offset))
+        if avail:
+            sent = self.connection.sendfile(_RangeReader(h), offset, avail)
+            if sent != avail:
+                raise OSError(f'Short send: {sent}/{avail}')
+        pad = length - avail
+        while pad:
+            n = min(pad, len(_ZEROS))
+            self.wfile.write(memoryview(_ZEROS)[:n])
+            pad -= n
+
+    def _send_rle(self, h, offset, length):
+        """Send the same range as _send_range, x-dw-rle encoded."""
+        data = h.pread(length, offset) if offset < h.size() else b''
+        if len(data) < length:
+            data += bytes(length - len(data))
+        body = rle_encode(data)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Encoding', RLE_ENCODING)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _wants_rle(self, query):
+        if query.get('enc', [''])[0] == 'rle':
+            return True
+        return RLE_ENCODING in self.headers.get('Accept-Encoding', '').lower()
+
     def _send_error(self, status, message):
         self._send_json({'error': message}, status)
 
     def _get_disk_path(self, filename):
-        """Resolve and validate a disk image filename."""
-        # Security: prevent path traversal
-        safe_name = os.path.basename(filename)
-        path = os.path.join(self.server.disk_dir, safe_name)
-        if not os.path.isfile(path):
+        """Resolve an image name inside the serving directory, or None.
+
+        Names are relative paths (sub-directories only with --recursive) to a
+        .dsk file; '.', '..' and hidden segments are refused, and so is a name
+        that resolves outside the directory (a symlink, or a drive letter).
+        """
+        segs = [s for s in filename.replace('\\', '/').split('/') if s]
+        if not segs or any(s.startswith('.') for s in segs) or not segs[-1].lower().endswith('.dsk'):
             return None
-        return path
+        if len(segs) > 1 and not self.server.index.recursive:
+            return None
+        path = os.path.join(self.server.disk_dir, *segs)
+        return path if _inside(self.server.disk_dir, path) else None
 
-    def _list_disks(self):
-        """List all .dsk files in the serving directory."""
-        disks = []
+    def _open_image(self, filename):
+        """A cached ImageHandle for `filename`, or None after sending a 404."""
+        path = self._get_disk_path(filename)
         try:
-            for entry in os.listdir(self.server.disk_dir):
-                if entry.lower().endswith('.dsk'):
-                    full_path = os.path.join(self.server.disk_dir, entry)
-                    size = os.path.getsize(full_path)
-                    disks.append({
-                        'name': entry,
-                        'size': size,
-                        'total_sectors': size // SECTOR_SIZE
-                    })
+            h = self.server.images.acquire(path) if path else None
         except OSError as e:
-            print(f"Error listing directory: {e}")
-        disks.sort(key=lambda d: d['name'])
-        return disks
+            self._send_error(500, f'Open error: {e}')
+            return None
+        if h is None:
+            self._send_error(404, f'Disk image not found: {filename}')
+        return h
+
+    def _page(self, query):
+        """The slice of the image index selected by ?offset=&limit=, and the total."""
+        disks = self.server.index.images()
+        try:
+            offset = max(0, int(query.get('offset', [0])[0]))
+            limit = int(query.get('limit', [-1])[0])
+        except ValueError:
+            offset, limit = 0, -1
+        end = len(disks) if limit < 0 else offset + limit
+        return disks[offset:end], len(disks), offset
 
     def do_GET(self):
         parsed = urlparse(self.path)
         path = parsed.path.rstrip('/')
         query = parse_qs(parsed.query)
 
-        # GET /info - Server info
+        # GET /info - Server info, one page of disks (or the one named)
         if path == '/info':
-            disks = self._list_disks()
+            if 'name' in query:
+                entry = self.server.index.get(query['name'][0])
+                page, total, offset = ([entry] if entry else []), len(self.server.index.images()), 0
+            else:
+                page, total, offset = self._page(query)
             self._send_json({
                 'name': self.server.server_name,
-                'version': '1.0',
-                'disk_count': len(disks),
-                'disks': disks
+                'version': '1.1',
+                'disk_count': total,
+                'offset': offset,
+                'disks': [_public(d) for d in page]
             })
             return
 
-        # GET /files - List .dsk files
+        # GET /files - List .dsk files, paged; the total is in X-Total-Count
         if path == '/files':
-            disks = self._list_disks()
-            self._send_json([d['name'] for d in disks])
+            page, total, _ = self._page(query)
+            body = json.dumps([d['name'] for d in page]).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('X-Total-Count', str(total))
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        # Image names may be relative paths: /<op>/<name...>[/<lsn>]
+        parts = [unquote(p) for p in path.split('/')]
+
+        # GET /manifest/<filename>?chunk=N&start=I&count=M - Chunk digests
+        if len(parts) >= 3 and parts[1] == 'manifest':
+            try:
+                chunk = int(query.get('chunk', [64])[0])
+                start = int(query.get('start', [0])[0])
+                count = int(query.get('count', [MAX_MANIFEST_COUNT])[0])
+            except ValueError:
+                self._send_error(400, 'Invalid manifest range')
+                return
+            if not 1 <= chunk <= MAX_MANIFEST_CHUNK or start < 0 or not 1 <= count <= MAX_MANIFEST_COUNT:
+                self._send_error(400, f'chunk must be 1-{MAX_MANIFEST_CHUNK}, count 1-{MAX_MANIFEST_COUNT}')
+                return
+            h = self._open_image('/'.join(parts[2:]))
+            if not h:
+                return
+            try:
+                self._send_binary(h.digests(chunk, start, count))
+            except Exception as e:
+                self._send_error(500, f'Read error: {e}')
+            finally:
+                self.server.images.release(h)
             return
 
         # GET /sector/<filename>/<lsn> - Read single sector
-        parts = path.split('/')
-        if len(parts) == 4 and parts[1] == 'sector':
-            filename = parts[2]
+        if len(parts) >= 4 and parts[1] == 'sector':
+            filename = '/'.join(parts[2:-1])
             try:
-                lsn = int(parts[3])
+                lsn = int(parts[-1])
             except ValueError:
                 self._send_error(400, 'Invalid LSN')
                 return
 
-            disk_path = self._get_disk_path(filename)
-            if not disk_path:
-                self._send_error(404, f'Disk image not found: {filename}')
+            h = self._open_image(filename)
+            if not h:
                 return
-
             try:
-                with open(disk_path, 'rb') as f:
-                    f.seek(lsn * SECTOR_SIZE)
-                    data = f.read(SECTOR_SIZE)
-                    if len(data) < SECTOR_SIZE:
-                        data = data + bytes(SECTOR_SIZE - len(data))
-                    self._send_binary(data)
+                data = h.pread(SECTOR_SIZE, lsn * SECTOR_SIZE)
+                if len(data) < SECTOR_SIZE:
+                    data = data + bytes(SECTOR_SIZE - len(data))
+                self._send_binary(data)
             except Exception as e:
                 self._send_error(500, f'Read error: {e}')
+            finally:
+                self.server.images.release(h)
             return
 
         # GET /sectors/<filename>/<lsn>?count=N - Bulk read
-        if len(parts) == 4 and parts[1] == 'sectors':
-            filename = parts[2]
+        if len(parts) >= 4 and parts[1] == 'sectors':
+            filename = '/'.join(parts[2:-1])
             try:
-                start_lsn = int(parts[3])
+                start_lsn = int(parts[-1])
             except ValueError:
                 self._send_error(400, 'Invalid LSN')
                 return
 
-            count = int(query.get('count', [1])[0])
+            try:
+                count = int(query.get('count', [1])[0])
+            except ValueError:
+                self._send_error(400, 'Invalid count')
+                return
             if count < 1:
                 self._send_error(400, 'Count must be at least 1')
                 return
-
-            disk_path = self._get_disk_path(filename)
-            if not disk_path:
-                self._send_error(404, f'Disk image not found: {filename}')
+            if count > self.server.max_count:
+                self._send_error(400, f'Count must be at most {self.server.max_count}')
+                return
+            if start_lsn < 0:
+                self._send_error(400, 'Invalid LSN')
                 return
 
+            h = self._open_image(filename)
+            if not h:
+                return
             try:
-                with open(disk_path, 'rb') as f:
-                    f.seek(start_lsn * SECTOR_SIZE)
-                    data = f.read(count * SECTOR_SIZE)
-                    # Pad if we hit end of file
-                    expected = count * SECTOR_SIZE
-                    if len(data) < expected:
-                        data = data + bytes(expected - len(data))
-                    self._send_binary(data)
+                if self._wants_rle(query):
+                    self._send_rle(h, start_lsn * SECTOR_SIZE, count * SECTOR_SIZE)
+                else:
+                    self._send_range(h, start_lsn * SECTOR_SIZE, count * SECTOR_SIZE)
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True
             except Exception as e:
-                self._send_error(500, f'Bulk read error: {e}')
+                # Headers may be out already: the only safe recovery is to hang up
+                self.log_message('Bulk read error: %s', e)
+                self.close_connection = True
+            finally:
+                self.server.images.release(h)
             return
 
         self._send_error(404, 'Not found')
@@ -167,36 +642,81 @@ class SectorHandler(BaseHTTPRequestHandler):
     def do_PUT(self):
         parsed = urlparse(self.path)
         path = parsed.path.rstrip('/')
-        parts = path.split('/')
+        parts = [unquote(p) for p in path.split('/')]
+        # Any early error response leaves the request body unread, and it
+        # would be parsed as the next request: close unless it is consumed.
+        client_close = self.close_connection
+        self.close_connection = True
+
+        if self.server.read_only:
+            self._send_error(403, 'Server is read-only')
+            return
 
         # PUT /sector/<filename>/<lsn> - Write single sector
-        if len(parts) == 4 and parts[1] == 'sector':
-            filename = parts[2]
+        if len(parts) >= 4 and parts[1] == 'sector':
+            filename = '/'.join(parts[2:-1])
             try:
-                lsn = int(parts[3])
+                lsn = int(parts[-1])
             except ValueError:
                 self._send_error(400, 'Invalid LSN')
                 return
 
-            disk_path = self._get_disk_path(filename)
-            if not disk_path:
-                self._send_error(404, f'Disk image not found: {filename}')
-                return
-
             content_length = int(self.headers.get('Content-Length', 0))
             if content_length != SECTOR_SIZE:
                 self._send_error(400, f'Data must be exactly {SECTOR_SIZE} bytes')
                 return
 
-            data = self.rfile.read(SECTOR_SIZE)
+            h = self._open_image(filename)
+            if not h:
+                return
             try:
-                with open(disk_path, 'r+b') as f:
-                    f.seek(lsn * SECTOR_SIZE)
-                    f.write(data)
-                    f.flush()
+                data = self.rfile.read(SECTOR_SIZE)
+                self.close_connection = client_close
+                h.pwrite(data, lsn * SECTOR_SIZE)
+                self.server.images.touch(h)
                 self._send_json({'status': 'ok'})
             except Exception as e:
                 self._send_error(500, f'Write error: {e}')
+            finally:
+                self.server.images.release(h)
+            return
+
+        # PUT /sectors/<filename>/<lsn> - Write a run of sectors in one request
+        if len(parts) >= 4 and parts[1] == 'sectors':
+            filename = '/'.join(parts[2:-1])
+            try:
+                start_lsn = int(parts[-1])
+            except ValueError:
+                self._send_error(400, 'Invalid LSN')
+                return
+
+            content_length = int(self.headers.get('Content-Length', 0))
+            count = content_length // SECTOR_SIZE
+            if content_length % SECTOR_SIZE or not 1 <= count <= MAX_PUT_SECTORS:
+                self._send_error(400, f'Data must be 1-{MAX_PUT_SECTORS} whole {SECTOR_SIZE}-byte sectors')
+                return
+
+            h = self._open_image(filename)
+            if not h:
+                return
+            try:
+                if start_lsn < 0 or start_lsn + count > h.size() // SECTOR_SIZE:
+                    self._send_error(400, 'Extent beyond end of image')
+                    return
+                data = self.rfile.read(content_length)
+                if len(data) != content_length:
+                    self._send_error(400, 'Truncated body')
+                    return
+                self.close_connection = client_close
+                # One write and one fsync for the whole extent
+                h.pwrite(data, start_lsn * SECTOR_SIZE)
+                os.fsync(h.fd)
+                self.server.images.touch(h)
+                self._send_json({'status': 'ok', 'written': count})
+            except Exception as e:
+                self._send_error(500, f'Bulk write error: {e}')
+            finally:
+                self.server.images.release(h)
             return
 
         self._send_error(404, 'Not found')
@@ -207,6 +727,7 @@ class SectorHandler(BaseHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, PUT, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
         self.end_headers()
 
 
@@ -218,12 +739,20 @@ def main():
 Examples:
     %(prog)s --dir /home/user/disks
     %(prog)s --dir ./images --port 9090 --name "Build Server"
+    %(prog)s --dir /srv/coco-archive --recursive
         """
     )
     parser.add_argument('--dir', default='.', help='Directory containing .dsk files (default: current directory)')
     parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port to listen on (default: {DEFAULT_PORT})')
     parser.add_argument('--name', default='DriveWire Sector Server', help='Server name shown in /info')
     parser.add_argument('--bind', default='0.0.0.0', help='Address to bind to (default: 0.0.0.0)')
+    parser.add_argument('--read-only', action='store_true', help='Reject all PUT (sector write) requests')
+    parser.add_argument('--max-open', type=int, default=DEFAULT_MAX_OPEN,
+                        help=f'Image files kept open between requests (default: {DEFAULT_MAX_OPEN})')
+    parser.add_argument('--max-count', type=int, default=DEFAULT_MAX_COUNT,
+                        help=f'Largest bulk read in sectors (default: {DEFAULT_MAX_COUNT})')
+    parser.add_argument('--recursive', action='store_true',
+                        help='Also serve images in sub-directories, named by relative path')
 
     args = parser.parse_args()
 
@@ -233,37 +762,46 @@ Examples:
         print(f"Error: Directory not found: {disk_dir}")
         sys.exit(1)
 
-    # Count available disk images
-    dsk_files = [f for f in os.listdir(disk_dir) if f.lower().endswith('.dsk')]
+    # Index available disk images
+    index = ImageIndex(disk_dir, args.recursive)
+    index.start()
+    dsk_files = index.images()
 
     print(f"╔═══════════════════════════════════════════════╗")
-    print(f"║  DriveWire Remote Sector Server v1.0          ║")
+    print(f"║  DriveWire Remote Sector Server v1.1          ║")
     print(f"╠═══════════════════════════════════════════════╣")
     print(f"║  Directory: {disk_dir:<34}║")
     print(f"║  Disks:     {len(dsk_files):<34}║")
     print(f"║  Bind:      {args.bind}:{args.port:<26}║")
     print(f"║  Name:      {args.name:<34}║")
+    print(f"║  Writes:    {'disabled' if args.read_only else 'enabled':<34}║")
     print(f"╚═══════════════════════════════════════════════╝")
     print()
 
     if not dsk_files:
         print("Warning: No .dsk files found in the specified directory.")
     else:
-        for f in sorted(dsk_files):
-            size = os.path.getsize(os.path.join(disk_dir, f))
-            print(f"  📀 {f} ({size:,} bytes, {size // SECTOR_SIZE} sectors)")
+        for d in dsk_files[:50]:
+            print(f"  📀 {d['name']} ({d['size']:,} bytes, {d['total_sectors']} sectors)")
+        if len(dsk_files) > 50:
+            print(f"  ... and {len(dsk_files) - 50} more")
         print()
 
-    server = HTTPServer((args.bind, args.port), SectorHandler)
+    server = ThreadingHTTPServer((args.bind, args.port), SectorHandler)
     server.disk_dir = disk_dir
+    server.index = index
     server.server_name = args.name
+    server.read_only = args.read_only
+    server.images = ImageCache(args.max_open, not args.read_only)
+    server.max_count = max(1, args.max_count)
 
     print(f"Listening on {args.bind}:{args.port} ... (Ctrl+C to stop)")
     try:
         server.serve_forever()
     except KeyboardInterrupt:
         print("\nShutting down.")
-        server.server_shutdown()
+        server.server_close()
+        server.images.close_all()
 
 
 if __name__ == '__main__':
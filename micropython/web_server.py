@@ -22,10 +22,10 @@ import utime
 import resilience
 from collections import deque
 try:
-    import usocket
+    import hashlib
 except ImportError:
-    import socket as usocket
-from drivewire import VirtualDrive, MAX_TERMINAL_BUFFER_SIZE, NUM_DRIVES
+    hashlib = None  # No delta clones: every chunk is downloaded
+from drivewire import VirtualDrive, MAX_TERMINAL_BUFFER_SIZE, NUM_DRIVES, SECTOR_SIZE, drop_image_sidecars, rbf_format_sectors
 
 try:
     from typing import Optional, List, Dict, Any, Union
@@ -40,6 +40,18 @@ config = shared_config
 _uploading = False  # Flag to prevent SD polling during uploads
 _creating_disk = False
 _disk_creation_progress = {'state': 'idle', 'written': 0, 'total': 0, 'filename': '', 'error': None}
+BLANK_DISK_FORMATS = ('zero', 'sparse', 'rbf')  # Contents options for /api/files/create ('sparse': undefined)
+MIN_RBF_SECTORS = 16           # Room for LSN 0, bitmap, root FD and directory
+UPLOAD_SLOT_SIZE = 4096        # Upload ring slot: a whole number of 512-byte SD blocks
+UPLOAD_RING_SLOTS = 4          # Slots in flight between the network reader and the SD writer
+_upload_ring = None
+UPLOAD_PART_SUFFIX = '.part'   # Resumable upload data lives here until the final rename
+UPLOAD_MAX_SESSIONS = 4
+UPLOAD_SESSION_IDLE_MS = 30 * 60 * 1000  # Abandoned sessions are dropped after 30 minutes
+UPLOAD_FINGERPRINT_MAX = 64    # Client-supplied content fingerprint, stored per session
+UPLOAD_META_SUFFIX = '.meta'   # <target>.part.meta: the session, so a reboot can resume it
+_upload_sessions_restored = False
+_upload_sessions = {}          # Session id -> {'path', 'part', 'size', 'fingerprint', 'committed', 'touched'}
 
 # Microdot 1.3.4 async bug workaround: Response.write() passes str bodies
 # and generator str chunks to MicroPython's StreamWriter which only accepts bytes.
@@ -111,7 +123,7 @@ async def config_endpoint(request):
             new_config = request.json
             
             update_data = {}
-            for key in ('baud_rate', 'wifi_ssid', 'ntp_server', 'timezone_offset', 'serial_map', 'syslog_server', 'syslog_port', 'wdt_enabled', 'log_level', 'remote_servers'):
+            for key in ('baud_rate', 'wifi_ssid', 'ntp_server', 'timezone_offset', 'serial_map', 'syslog_server', 'syslog_port', 'wdt_enabled', 'log_level', 'remote_servers', 'sector_cache_kb', 'journal_writes', 'skip_free_sectors', 'hydrate_remote', 'remote_writes', 'remote_compress'):
                 if key in new_config:
                     update_data[key] = new_config[key]
                     
@@ -144,6 +156,7 @@ async def config_endpoint(request):
                     await sd_card.remount_sd()
                 except Exception as e:
                     resilience.log(f"SD remount failed: {e}", level=3)
+                request_dsk_reconcile()  # Possibly a different card
 
             # Trigger reload on DriveWire Server if attached
             if hasattr(app, 'dw_server'):
@@ -157,62 +170,254 @@ async def config_endpoint(request):
         finally:
             gc.collect() # Clean up memory after parsing JSON payload
 
+def _dir_entries(path: str):
+    """Yield (name, is_dir, size) for a directory, without a stat per entry where possible."""
+    ilistdir = getattr(os, 'ilistdir', None)
+    if ilistdir is not None:
+        for e in ilistdir(path):
+            yield e[0], e[1] == 0x4000, e[3] if len(e) > 3 else -1
+        return
+    for name in os.listdir(path):
+        try:
+            st = os.stat(path.rstrip('/') + '/' + name)
+        except OSError:
+            continue
+        yield name, bool(st[0] & 0x4000), st[6]
+
+
 def _scan_dsk_dir(base_path: str, depth: int = 0, max_depth: int = 3):
-    """Recursively scan a directory for .dsk files up to max_depth levels deep (yields results)."""
+    """Recursively scan a directory for .dsk files up to max_depth levels deep.
+
+    Yields (path, size). The flash walk skips the /sd mount point, which
+    has its own walk.
+    """
     try:
-        if base_path.startswith('/sd') and not sd_card.is_mounted():
-            return
-        entries = os.listdir(base_path)
         if base_path.startswith('/sd'):
             activity_led.blink()
-        for entry in entries:
+        for entry, is_dir, size in _dir_entries(base_path):
             # Skip hidden files
             if entry.startswith('.'):
                 continue
             full_path = base_path.rstrip('/') + '/' + entry
-            if entry.lower().endswith('.dsk'):
-                yield full_path
-            elif depth < max_depth:
-                # Check if it's a directory
-                try:
-                    s = os.stat(full_path)
-                    if s[0] & 0x4000: # Directory bit
-                        yield from _scan_dsk_dir(full_path, depth + 1, max_depth)
-                except OSError:
-                    pass
+            if is_dir:
+                if depth < max_depth and full_path != '/sd':
+                    yield from _scan_dsk_dir(full_path, depth + 1, max_depth)
+            elif entry.lower().endswith('.dsk'):
+                yield full_path, size
     except OSError:
         pass
 
 
-_dsk_files_cache = None
-_dsk_files_cache_ts = 0
-_DSK_CACHE_TTL_MS = 10000  # 10 second TTL
+# Persisted index of .dsk files: path -> [size, mtime]. Handlers that add or
+# remove images update it in place; reconcile_dsk_index() folds in changes
+# made behind the web UI's back. Listing costs no flash or SD I/O.
+DSK_INDEX_FILE = '.dsk_index'     # One "size mtime path" line per image, on flash
+_DSK_INDEX_TMP = '.dsk_index.tmp'
+DSK_RECONCILE_FIRST_S = 30        # First reconciliation after boot
+DSK_RECONCILE_S = 300             # Then every 5 minutes
+DSK_INDEX_SAVE_DELAY_S = 5        # Handler updates inside this window share one write
+_dsk_index = None
+_dsk_sorted = None                # Sorted paths, rebuilt after a change
+_dsk_index_dirty = False          # In-memory index ahead of the file on flash
+_dsk_save_task = None
+_dsk_reconcile_now = asyncio.Event()
+
+
+def _load_dsk_index() -> bool:
+    """Load the persisted index; False if there is none."""
+    global _dsk_index, _dsk_sorted
+    for path in (DSK_INDEX_FILE, _DSK_INDEX_TMP):
+        try:
+            index = {}
+            with open(path) as f:
+                for line in f:
+                    size, mtime, name = line.rstrip('\n').split(' ', 2)
+                    index[name] = [int(size), int(mtime)]
+            _dsk_index = index
+            _dsk_sorted = None
+            return True
+        except (OSError, ValueError):
+            continue
+    return False
+
+
+def _save_dsk_index():
+    """Write the index to flash (temp file + rename, like config.json)."""
+    global _dsk_index_dirty
+    _dsk_index_dirty = False
+    try:
+        with open(_DSK_INDEX_TMP, 'w') as f:
+            for name, (size, mtime) in _dsk_index.items():
+                f.write(f"{size} {mtime} {name}\n")
+        try:
+            os.remove(DSK_INDEX_FILE)
+        except OSError:
+            pass
+        os.rename(_DSK_INDEX_TMP, DSK_INDEX_FILE)
+    except OSError as e:
+        _dsk_index_dirty = True
+        resilience.log(f"DSK index save failed: {e}", level=2)
+
+
+async def _save_dsk_index_later():
+    global _dsk_save_task
+    try:
+        await asyncio.sleep(DSK_INDEX_SAVE_DELAY_S)
+        if _dsk_index_dirty and _dsk_index is not None:
+            _save_dsk_index()
+    finally:
+        _dsk_save_task = None
+
+
+def _mark_dsk_index_dirty():
+    """Save the index once a burst of handler updates has settled.
+
+    A multi-file delete or upload then costs one flash write, not one per
+    image. Changes lost to a reboot inside the window are picked up by the
+    next reconciliation.
+    """
+    global _dsk_index_dirty, _dsk_save_task
+    _dsk_index_dirty = True
+    if _dsk_save_task is not None:
+        return
+    try:
+        _dsk_save_task = asyncio.create_task(_save_dsk_index_later())
+    except Exception:
+        _save_dsk_index()  # No event loop to defer to
+
+
+def _stat_entry(path: str):
+    """[size, mtime] for a file, or None if it is gone."""
+    try:
+        st = os.stat(path)
+        return [st[6], st[8]]
+    except OSError:
+        return None
+
+
+def _build_dsk_index():
+    """Full scan of flash and SD; only when no persisted index exists."""
+    global _dsk_index, _dsk_sorted
+    index = {}
+    for root in ('/', '/sd'):
+        if root == '/sd' and not sd_card.is_mounted():
+            continue
+        for path, _ in _scan_dsk_dir(root, max_depth=3):
+            entry = _stat_entry(path)
+            if entry:
+                index[path] = entry
+    _dsk_index = index
+    _dsk_sorted = None
+    _save_dsk_index()
+    gc.collect()
+    resilience.log_mem_info("DSK Index Built (Deep Scan)")
+
+
+def refresh_dsk_entry(path: str):
+    """Re-stat one image after a handler created, replaced or removed it."""
+    global _dsk_sorted
+    if not path.lower().endswith('.dsk'):
+        return
+    if _dsk_index is None and not _load_dsk_index():
+        return  # Nothing persisted yet: the first listing scans everything
+    entry = _stat_entry(path)
+    if entry == _dsk_index.get(path):
+        return
+    if entry:
+        _dsk_index[path] = entry
+    else:
+        _dsk_index.pop(path, None)
+    _dsk_sorted = None
+    _mark_dsk_index_dirty()
+
 
 def get_dsk_files():
-    """Find all .dsk files on internal flash and SD card storage (cached 10s)."""
-    global _dsk_files_cache, _dsk_files_cache_ts
-    now = utime.ticks_ms()
-    if _dsk_files_cache is not None and utime.ticks_diff(now, _dsk_files_cache_ts) < _DSK_CACHE_TTL_MS:
-        return _dsk_files_cache
-    
-    # Use a set to efficiently collect unique paths from generator
-    seen = set()
-    
-    # Scan internal flash root (3 levels deep)
-    seen.update(_scan_dsk_dir('/', max_depth=3))
-    
-    # Scan SD card if mounted (3 levels deep)
+    """All indexed .dsk files on internal flash and SD card storage, sorted."""
+    global _dsk_sorted
+    if _dsk_index is None and not _load_dsk_index():
+        _build_dsk_index()
+    if _dsk_sorted is None:
+        _dsk_sorted = sorted(_dsk_index)
+    if sd_card.was_mounted():
+        return _dsk_sorted
+    return [p for p in _dsk_sorted if not p.startswith('/sd/')]
+
+
+def _dsk_work_paused() -> bool:
+    if _uploading or _cloning or _creating_disk:
+        return True
+    dw = getattr(app, 'dw_server', None)
+    return dw is not None and not getattr(dw, 'bus_idle', True)
+
+
+async def _reconcile_dsk_index():
+    """One pass over flash and SD, folding outside changes into the index."""
+    global _dsk_sorted
+    if _dsk_index is None and not _load_dsk_index():
+        _build_dsk_index()
+        return
+    roots = ['/']
     if sd_card.is_mounted():
-        seen.update(_scan_dsk_dir('/sd', max_depth=3))
-        
-    unique = sorted(list(seen))
-    _dsk_files_cache = unique
-    _dsk_files_cache_ts = utime.ticks_ms()
-    
-    # Force GC after potentially heavy directory scan
-    gc.collect()
-    resilience.log_mem_info("DSK Cache Updated (Deep Scan)")
-    return unique
+        roots.append('/sd')
+        # Uploads cut off by a reboot resume or get cleaned up; abandoned ones expire
+        _restore_upload_sessions()
+        _expire_upload_sessions()
+    found = set()
+    changed = False
+    n = 0
+    for root in roots:
+        for path, _ in _scan_dsk_dir(root, max_depth=3):
+            found.add(path)
+            # The listing has no mtime, and an image the CoCo rewrote in place
+            # keeps its size: stat each one so a rewrite isn't missed
+            entry = _stat_entry(path)
+            if entry and entry != _dsk_index.get(path):
+                _dsk_index[path] = entry
+                changed = True
+            n += 1
+            if n % 16 == 0:
+                # Low priority: give way to the CoCo and to SD-heavy handlers
+                resilience.feed_wdt()
+                await asyncio.sleep(0)
+                while _dsk_work_paused():
+                    await asyncio.sleep(1)
+    sd_walked = '/sd' in roots
+    for path in list(_dsk_index):
+        # An unmounted card hides its images from listings; it doesn't delete them
+        if path not in found and (sd_walked or not path.startswith('/sd/')):
+            del _dsk_index[path]
+            changed = True
+    if changed:
+        _dsk_sorted = None
+        _save_dsk_index()
+        resilience.log(f"DSK index reconciled: {len(_dsk_index)} images")
+    elif _dsk_index_dirty:
+        _save_dsk_index()
+
+
+async def reconcile_dsk_index():
+    """Background task: reconcile the .dsk index after boot, then periodically.
+
+    request_dsk_reconcile() (e.g. after an SD remount) starts a pass early.
+    """
+    wait_s = DSK_RECONCILE_FIRST_S
+    while True:
+        try:
+            await asyncio.wait_for_ms(_dsk_reconcile_now.wait(), wait_s * 1000)
+        except asyncio.TimeoutError:
+            pass
+        _dsk_reconcile_now.clear()
+        wait_s = DSK_RECONCILE_S
+        while _dsk_work_paused():
+            await asyncio.sleep(1)
+        try:
+            await _reconcile_dsk_index()
+        except Exception as e:
+            resilience.log(f"DSK index reconcile failed: {e}", level=2)
+
+
+def request_dsk_reconcile():
+    _dsk_reconcile_now.set()
 
 
 def _sanitize_path(path):
@@ -231,17 +436,21 @@ def _sanitize_path(path):
     return None
 
 
-def _get_file_mtime(path):
-    """Get a formatted modification timestamp for a file, or None."""
+def _format_mtime(mtime):
+    """Format epoch seconds (os.stat()[8]) for display, or None."""
     try:
-        st = os.stat(path)
-        # MicroPython os.stat returns mtime at index 8 (seconds since epoch)
-        mtime = st[8]
-        # Convert epoch seconds to a readable string
-        # MicroPython epoch is 2000-01-01, adjust for display
+        # MicroPython epoch is 2000-01-01; localtime() handles the offset
         t = time.localtime(mtime)
         return f"{t[0]:04d}-{t[1]:02d}-{t[2]:02d} {t[3]:02d}:{t[4]:02d}"
-    except (OSError, OverflowError):
+    except (OverflowError, ValueError):
+        return None
+
+
+def _get_file_mtime(path):
+    """Get a formatted modification timestamp for a file, or None."""
+    try:
+        return _format_mtime(os.stat(path)[8])
+    except OSError:
         return None
 
 
@@ -253,17 +462,14 @@ async def files_endpoint(request):
 
 @app.route('/api/files/info')
 async def files_info_endpoint(request):
-    """Return metadata (size, modification time) for all .dsk files."""
+    """Return metadata (size, modification time) for all .dsk files, from the index."""
     resilience.log_mem_info("Files Info Start")
     files = get_dsk_files()
     
     result = {}
     for f in files:
-        try:
-            st = os.stat(f)
-            result[f] = {'size': st[6], 'mtime': _get_file_mtime(f)}
-        except OSError:
-            pass
+        size, mtime = _dsk_index[f]
+        result[f] = {'size': size, 'mtime': _format_mtime(mtime)}
     gc.collect()
     return result
 
@@ -277,7 +483,7 @@ async def sd_status_endpoint(request):
         return {'mounted': True, 'mount_point': '/sd', 'busy': True}
     try:
         info = await sd_card.get_info()
-        info['files_found'] = len([f for f in get_dsk_files() if f.startswith('/sd')])
+        info['files_found'] = sum(1 for f in get_dsk_files() if f.startswith('/sd/'))
         return info
     except ImportError:
         return {'mounted': False, 'mount_point': '/sd', 'error': 'sd_card module not available'}
@@ -323,8 +529,27 @@ def _build_drive_stats():
                 'dir_cache_misses': d.stats.get('dir_cache_misses', 0),
                 'read_hits': d.stats.get('read_hits', 0),
                 'read_misses': d.stats.get('read_misses', 0),
+                'readahead_sectors': d.stats.get('readahead_sectors', 0),
+                'readahead_hits': d.stats.get('readahead_hits', 0),
+                'readahead_waste': d.stats.get('readahead_waste', 0),
+                'wire_bytes': d.stats.get('wire_bytes', 0),
+                'fetch_window': d.stats.get('fetch_window', 0),
+                'hydrate_state': d.stats.get('hydrate_state', 0),
+                'hydrate_chunks': d.stats.get('hydrate_chunks', 0),
+                'hydrate_total': d.stats.get('hydrate_total', 0),
+                'local_reads': d.stats.get('local_reads', 0),
+                'free_skips': d.stats.get('free_skips', 0),
+                'warm_state': d.stats.get('warm_state', 0),
+                'warm_dirs': d.stats.get('warm_dirs', 0),
+                'warm_sectors': d.stats.get('warm_sectors', 0),
+                'flushes': d.stats.get('flushes', 0),
+                'flush_runs': d.stats.get('flush_runs', 0),
+                'flush_bytes': d.stats.get('flush_bytes', 0),
+                'flush_us': d.stats.get('flush_us', 0),
                 'write_count': d.stats['writes'],
                 'dir_cache_size': len(getattr(d, 'directory_cache', {})),
+                'cache_bytes': d.cache.used() * SECTOR_SIZE,
+                'cache_quota_bytes': d.cache.quota * SECTOR_SIZE,
                 'filename': d.filename.split('/')[-1],
                 'full_path': d.filename,
                 'dirty_count': len(d.dirty_sectors),
@@ -441,7 +666,6 @@ async def status_endpoint(request):
 @app.route('/api/files/delete', methods=['POST'])
 async def delete_file_endpoint(request):
     """Delete a file if not currently mounted."""
-    global _dsk_files_cache
     try:
         if not hasattr(app, 'dw_server'):
             return {'error': 'DriveWire Server not attached'}, 500
@@ -467,7 +691,8 @@ async def delete_file_endpoint(request):
         try:
             activity_led.blink()
             os.remove(path)
-            _dsk_files_cache = None  # Invalidate cache
+            drop_image_sidecars(path)
+            refresh_dsk_entry(path)
             return {'status': 'ok'}
         except OSError as e:
             return {'error': f'Delete failed: {e}'}, 500
@@ -530,7 +755,16 @@ async def download_file_endpoint(request):
 
 @app.route('/api/files/create', methods=['POST'])
 async def create_blank_dsk_endpoint(request):
-    """Create a new blank zero-filled .dsk image file."""
+    """Create a new blank .dsk image file.
+
+    `format` picks the contents: 'zero' (default) writes every byte, 'rbf'
+    writes an empty OS-9 file system, and 'sparse' only sizes the file. The
+    last two touch a handful of sectors, so they finish in about a second at
+    any size, but FatFS does not clear the clusters it allocates: sectors
+    they skip hold whatever the card held before. Under 'rbf' those are free
+    in the allocation bitmap; a 'sparse' image has undefined contents and
+    must be formatted before use.
+    """
     global _creating_disk, _disk_creation_progress
     try:
         if _creating_disk:
@@ -552,6 +786,12 @@ async def create_blank_dsk_endpoint(request):
         if size_bytes <= 0:
             return {'error': 'Size must be greater than zero'}, 400
 
+        fmt = body.get('format', 'zero')
+        if fmt not in BLANK_DISK_FORMATS:
+            return {'error': f"Format must be one of: {', '.join(BLANK_DISK_FORMATS)}"}, 400
+        if fmt == 'rbf' and (size_bytes % SECTOR_SIZE or size_bytes < MIN_RBF_SECTORS * SECTOR_SIZE):
+            return {'error': f'RBF disks need a whole number of sectors, at least {MIN_RBF_SECTORS}'}, 400
+
         MAX_DSK_SIZE = 50 * 1024 * 1024  # 50MB - larger than any standard CoCo format
         if size_bytes > MAX_DSK_SIZE:
             return {'error': f'Size exceeds maximum ({MAX_DSK_SIZE // (1024*1024)}MB)'}, 400
@@ -585,17 +825,36 @@ async def create_blank_dsk_endpoint(request):
             'written': 0,
             'total': size_bytes,
             'filename': clean_name,
+            'format': fmt,
             'error': None
         }
         
         async def _do_create_blank_dsk():
-            global _creating_disk, _disk_creation_progress, _dsk_files_cache
+            global _creating_disk, _disk_creation_progress
             try:
                 activity_led.on() # Keep LED solid during heavy SD write operation
                 chunk_size = 4096
                 empty_chunk = bytearray(chunk_size)
                 
+                drop_image_sidecars(target_path)
                 with open(target_path, 'wb') as f:
+                    if fmt != 'zero':
+                        # Seek past the gaps: FAT allocates the clusters without
+                        # writing them. Only the layout and the final sector hit the card.
+                        end = 0
+                        if fmt == 'rbf':
+                            name = clean_name[:-4]
+                            for lsn, data in rbf_format_sectors(size_bytes // SECTOR_SIZE, name):
+                                f.seek(lsn * SECTOR_SIZE)
+                                f.write(data)
+                                end = (lsn + 1) * SECTOR_SIZE
+                                resilience.feed_wdt()
+                                await asyncio.sleep(0)
+                        if end < size_bytes:
+                            tail = min(SECTOR_SIZE, size_bytes - end)
+                            f.seek(size_bytes - tail)
+                            f.write(empty_chunk[:tail])
+                        _disk_creation_progress['written'] = size_bytes
                     while _disk_creation_progress['written'] < size_bytes:
                         to_write = min(chunk_size, size_bytes - _disk_creation_progress['written'])
                         if to_write < chunk_size:
@@ -611,7 +870,6 @@ async def create_blank_dsk_endpoint(request):
                 
                 resilience.log(f"Successfully created blank disk: {target_path}")
                 _disk_creation_progress['state'] = 'complete'
-                _dsk_files_cache = None # Invalidate local file list cache
             except Exception as e:
                 resilience.log(f"Blank disk creation failed: {e}", level=3)
                 _disk_creation_progress['state'] = 'error'
@@ -623,9 +881,11 @@ async def create_blank_dsk_endpoint(request):
             finally:
                 _creating_disk = False
                 activity_led.off()
+                refresh_dsk_entry(target_path)
 
         asyncio.create_task(_do_create_blank_dsk())
-        return {'status': 'accepted', 'filename': clean_name, 'size': size_bytes}, 202
+        return {'status': 'accepted', 'filename': clean_name, 'size': size_bytes, 'format': fmt,
+                'contents_defined': fmt != 'sparse'}, 202
             
     except Exception as e:
         resilience.log(f"Disk creation request error: {e}", level=3)
@@ -638,10 +898,132 @@ async def create_disk_status_endpoint(request):
     """Return the status of an ongoing disk creation."""
     return _disk_creation_progress
 
+def _get_upload_ring():
+    """Slot views over the upload ring, allocated on the first upload and then reused."""
+    global _upload_ring
+    if _upload_ring is None:
+        gc.collect()
+        buf = memoryview(bytearray(UPLOAD_RING_SLOTS * UPLOAD_SLOT_SIZE))
+        _upload_ring = [buf[i * UPLOAD_SLOT_SIZE:(i + 1) * UPLOAD_SLOT_SIZE] for i in range(UPLOAD_RING_SLOTS)]
+    return _upload_ring
+
+async def _read_request_into(stream, view):
+    """Read up to len(view) body bytes straight into `view`; 0 at end of stream."""
+    if hasattr(stream, 'readinto'):
+        return await stream.readinto(view) or 0
+    chunk = await stream.read(len(view))
+    view[:len(chunk)] = chunk
+    return len(chunk)
+
+async def _receive_to_file(stream, path, length, offset=0, mode='wb'):
+    """Copy `length` body bytes from `stream` into `path` at `offset` through the upload ring.
+
+    Returns the number of bytes received and written, short only if the
+    client stopped sending. A failed SD write raises.
+    """
+    ring = _get_upload_ring()
+    lengths = [0] * UPLOAD_RING_SLOTS
+    head = 0    # Slots filled from the network
+    tail = 0    # Slots written to the SD card
+    eof = False
+    data_ready = asyncio.Event()
+    space_free = asyncio.Event()
+    write_error = None
+    received = 0
+    
+    async def sd_writer():
+        nonlocal tail, write_error
+        try:
+            with open(path, mode) as f:
+                if offset:
+                    f.seek(offset)
+                while True:
+                    if tail == head:
+                        activity_led.off()
+                        if eof:
+                            return
+                        data_ready.clear()
+                        await data_ready.wait()
+                        continue
+                    activity_led.on() # Solid LED while flushing network chunks to disk
+                    slot = tail % UPLOAD_RING_SLOTS
+                    n = lengths[slot]
+                    f.write(ring[slot][:n] if n < UPLOAD_SLOT_SIZE else ring[slot])
+                    app.upload_written += n
+                    tail += 1
+                    space_free.set()
+                    # Yield after every slot to let serial loop run
+                    await asyncio.sleep(0)
+        except Exception as e:
+            write_error = e
+            resilience.log(f"SD Background Writer Error: {e}", level=3)
+            space_free.set()
+        finally:
+            activity_led.off()
+
+    # Start the background writer task
+    writer_task = asyncio.create_task(sd_writer())
+    
+    try:
+        remaining = length
+        while remaining > 0:
+            # Wait for the SD writer to hand back a slot
+            while head - tail >= UPLOAD_RING_SLOTS and not write_error:
+                space_free.clear()
+                await space_free.wait()
+            if write_error:
+                raise Exception(f"Background write failed: {write_error}")
+
+            # Fill one whole slot so every SD write covers complete blocks
+            slot = head % UPLOAD_RING_SLOTS
+            want = min(UPLOAD_SLOT_SIZE, remaining)
+            view = ring[slot]
+            got = 0
+            while got < want:
+                n = await _read_request_into(stream, view[got:want])
+                if not n:
+                    break
+                got += n
+                # Feed WDT every read (H14)
+                resilience.feed_wdt()
+            if got:
+                lengths[slot] = got
+                head += 1
+                data_ready.set()
+                received += got
+                remaining -= got
+            if got < want:
+                resilience.log(f"Stream ended early at {received}/{length}", level=2)
+                break
+            
+            if received % (16 * UPLOAD_SLOT_SIZE) == 0:
+                resilience.log(f"Received: {received}/{length} bytes")
+                
+        # Let the writer drain the ring and close the file
+        eof = True
+        data_ready.set()
+        await writer_task
+        
+        if write_error:
+            raise Exception(f"Background write failed at EOF: {write_error}")
+        return received
+    finally:
+        # Cancel/await background task to avoid leaks (H9)
+        writer_task.cancel()
+        try:
+            await writer_task
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            pass
+
 @app.route('/api/files/upload', methods=['POST'])
 async def upload_file_endpoint(request):
     """Handle file upload via streaming POST with X-Filename header."""
-    global _uploading, _dsk_files_cache
+    global _uploading
+    if _uploading:
+        return {'error': 'Another upload is in progress'}, 409
+    target_path = None
     try:
         filename = request.headers.get('X-Filename')
         content_length = request.headers.get('Content-Length')
@@ -698,95 +1080,10 @@ async def upload_file_endpoint(request):
         _uploading = True
         app.upload_total = total_size
         app.upload_written = 0
-        chunk_size = 4096  # Increased chunk size for better async batching
-        bytes_written = 0
-        
-        # Async writing pipeline (without asyncio.Queue since it is missing in uasyncio)
-        write_buffer = deque((), 10)
-        data_ready = asyncio.Event()
-        write_error = None
-        
-        async def sd_writer():
-            nonlocal write_error
-            try:
-                with open(target_path, 'wb') as f:
-                    while True:
-                        await data_ready.wait()
-                        
-                        if write_buffer:
-                            activity_led.on() # Solid LED while flushing network chunks to disk
-                            
-                        while write_buffer:
-                            chunk = write_buffer.popleft()
-                            if chunk is None: # EOF signal
-                                activity_led.off()
-                                return
-                            f.write(chunk)
-                            app.upload_written += len(chunk)
-                            # Yield after every chunk to let serial loop run
-                            await asyncio.sleep(0)
-                            
-                        # Empty buffer, clear event and wait for more data
-                        activity_led.off()
-                        data_ready.clear()
-            except Exception as e:
-                write_error = e
-                resilience.log(f"SD Background Writer Error: {e}", level=3)
-
-        # Start the background writer task
-        writer_task = asyncio.create_task(sd_writer())
         
         try:
-            try:
-                remaining = total_size
-                while remaining > 0:
-                    if write_error:
-                        raise Exception(f"Background write failed: {write_error}")
-                        
-                    read_size = min(chunk_size, remaining)
-                    chunk = await request.stream.read(read_size)
-                    if not chunk:
-                        resilience.log(f"Stream ended early at {bytes_written}/{total_size}", level=2)
-                        break
-                    
-                    # Throttle network read if SD card is falling behind
-                    while len(write_buffer) >= 3 and not write_error:
-                        await asyncio.sleep(0.05)
-                        
-                    # Push off to background writer
-                    write_buffer.append(chunk)
-                    data_ready.set()
-                    
-                    bytes_written += len(chunk)
-                    remaining -= len(chunk)
-                    
-                    # Feed WDT every chunk (H14)
-                    resilience.feed_wdt()
-                    
-                    # Manual memory optimization
-                    if bytes_written % (16 * chunk_size) == 0:
-                        resilience.log(f"Received: {bytes_written}/{total_size} bytes")
-                        gc.collect()
-                        
-                # After receiving all chunks, send EOF marker
-                write_buffer.append(None)
-                data_ready.set()
-                
-                # Wait for the background writer to finish emptying buffer
-                while write_buffer and not write_error:
-                    await asyncio.sleep(0.05) 
-                
-                if write_error:
-                    raise Exception(f"Background write failed at EOF: {write_error}")
-            finally:
-                # Cancel/await background task to avoid leaks (H9)
-                writer_task.cancel()
-                try:
-                    await writer_task
-                except asyncio.CancelledError:
-                    pass
-                except Exception:
-                    pass
+            drop_image_sidecars(target_path)
+            bytes_written = await _receive_to_file(request.stream, target_path, total_size)
         except Exception as e:
             import sys
             print("--- UPLOAD PIPELINE EXCEPTION ---")
@@ -800,18 +1097,18 @@ async def upload_file_endpoint(request):
         if bytes_written != total_size:
             resilience.log(f"Warning: size mismatch! Expected {total_size}, got {bytes_written}", level=2)
         
-        _dsk_files_cache = None  # Invalidate file list cache
         return {'status': 'ok', 'path': target_path, 'size': bytes_written}
     except Exception as e:
         import sys
         print("--- GENERAL UPLOAD EXCEPTION ---")
         sys.print_exception(e)
         _uploading = False
-        _dsk_files_cache = None  # Invalidate cache
         resilience.log(f"General upload error: {e}", level=3)
         return {'error': f'Upload failed: {e}'}, 500
     finally:
         _uploading = False
+        if target_path:
+            refresh_dsk_entry(target_path)
 
 @app.route('/api/files/upload_status', methods=['GET'])
 async def upload_status_endpoint(request):
@@ -821,6 +1118,267 @@ async def upload_status_endpoint(request):
     else:
         return {'written': 0, 'total': 0}
 
+def _upload_target_in_use(target_path):
+    """True if `target_path` is mounted in any drive slot."""
+    if hasattr(app, 'dw_server'):
+        for drive in app.dw_server.drives:
+            if drive and getattr(drive, 'filename', None) == target_path:
+                return True
+    return False
+
+def _drop_upload_session(sid):
+    """Forget upload session `sid` and delete its partial file."""
+    sess = _upload_sessions.pop(sid, None)
+    if sess:
+        for path in (sess['part'], sess['part'] + UPLOAD_META_SUFFIX):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+def _save_upload_session(sid, sess):
+    """Record a session next to its `.part` file so it survives a reboot."""
+    try:
+        with open(sess['part'] + UPLOAD_META_SUFFIX, 'w') as f:
+            json.dump({'session': sid, 'size': sess['size'], 'fingerprint': sess['fingerprint'],
+                       'committed': sess['committed']}, f)
+    except OSError as e:
+        resilience.log(f"Upload session {sid} not saved: {e}", level=2)
+
+def _restore_upload_sessions():
+    """Reload `.part` uploads left behind by a reboot; delete any that cannot resume.
+
+    Runs once, from the first upload request or the first index reconcile
+    with the card mounted. The committed count is capped at the `.part`
+    file's size, so it never claims bytes that did not reach the card.
+    """
+    global _upload_sessions_restored
+    if _upload_sessions_restored:
+        return
+    _upload_sessions_restored = True
+    known = [sess['part'] for sess in _upload_sessions.values()]
+    meta_suffix = UPLOAD_PART_SUFFIX + UPLOAD_META_SUFFIX
+    try:
+        entries = list(_dir_entries('/sd'))
+    except OSError:
+        return
+    names = [e[0] for e in entries]
+    for name, is_dir, size in entries:
+        if is_dir:
+            continue
+        path = '/sd/' + name
+        if name.endswith(meta_suffix):
+            if name[:-len(UPLOAD_META_SUFFIX)] not in names:
+                try:
+                    os.remove(path)   # Metadata whose .part is gone
+                except OSError:
+                    pass
+            continue
+        if not name.endswith(UPLOAD_PART_SUFFIX) or path in known:
+            continue
+        sess = None
+        try:
+            with open(path + UPLOAD_META_SUFFIX) as f:
+                meta = json.load(f)
+            sid = str(meta['session'])
+            total = int(meta['size'])
+            if size < 0:
+                size = os.stat(path)[6]
+            if sid not in _upload_sessions and len(_upload_sessions) < UPLOAD_MAX_SESSIONS:
+                sess = {'path': path[:-len(UPLOAD_PART_SUFFIX)], 'part': path, 'size': total,
+                        'fingerprint': str(meta.get('fingerprint') or ''),
+                        'committed': min(int(meta['committed']), size, total), 'touched': utime.ticks_ms()}
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        if sess is None:
+            resilience.log(f"Removing orphaned upload {path}", level=2)
+            for p in (path, path + UPLOAD_META_SUFFIX):
+                try:
+                    os.remove(p)
+                except OSError:
+                    pass
+            continue
+        _upload_sessions[sid] = sess
+        resilience.log(f"Upload session {sid} restored at {sess['committed']}/{sess['size']}")
+
+def _expire_upload_sessions():
+    """Drop sessions nobody has touched for UPLOAD_SESSION_IDLE_MS."""
+    now = utime.ticks_ms()
+    stale = [sid for sid, sess in _upload_sessions.items()
+             if utime.ticks_diff(now, sess['touched']) > UPLOAD_SESSION_IDLE_MS]
+    for sid in stale:
+        resilience.log(f"Upload session {sid} expired", level=2)
+        _drop_upload_session(sid)
+
+def _parse_content_range(value):
+    """(start, end, total) from 'bytes START-END/TOTAL', or None if malformed."""
+    try:
+        unit, _, spec = value.strip().partition(' ')
+        rng, _, total = spec.partition('/')
+        start, _, end = rng.partition('-')
+        start, end, total = int(start), int(end), int(total)
+    except (AttributeError, ValueError):
+        return None
+    if unit != 'bytes' or not 0 <= start <= end < total:
+        return None
+    return start, end, total
+
+def _finish_upload_session(sid, sess):
+    """Move a complete `.part` file over its target and close the session.
+
+    FAT cannot rename over an existing file, so an old image is removed
+    first; the new one only ever appears whole.
+    """
+    path = sess['path']
+    if _upload_target_in_use(path):
+        return {'error': 'File is currently IN USE. Unmount first.', 'committed': sess['committed']}, 409
+    drop_image_sidecars(path)
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+    os.rename(sess['part'], path)
+    try:
+        os.remove(sess['part'] + UPLOAD_META_SUFFIX)
+    except OSError:
+        pass
+    del _upload_sessions[sid]
+    refresh_dsk_entry(path)
+    resilience.log(f"Upload complete: {path} ({sess['size']} bytes)")
+    return {'status': 'ok', 'path': path, 'size': sess['size']}
+
+@app.route('/api/files/uploads', methods=['POST'])
+async def upload_session_endpoint(request):
+    """Open a resumable upload session for {"filename", "size", "fingerprint"}.
+
+    An unfinished session is resumed only when filename, size and the
+    client's fingerprint of the file contents all match, so a client that
+    gave up can pick up from the committed byte count. Any other upload to
+    the same target discards the old `.part` and starts from zero.
+    """
+    try:
+        body = request.json
+        if not body or 'filename' not in body or 'size' not in body:
+            return {'error': 'Missing filename or size parameter'}, 400
+        try:
+            size = int(body['size'])
+        except (TypeError, ValueError):
+            return {'error': 'Size must be an integer (bytes)'}, 400
+        if size <= 0:
+            return {'error': 'Size must be greater than zero'}, 400
+        fingerprint = str(body.get('fingerprint') or '')[:UPLOAD_FINGERPRINT_MAX]
+
+        clean_name = str(body['filename']).split('/')[-1].split('\\')[-1]
+        if not clean_name.lower().endswith('.dsk'):
+            return {'error': 'Only .dsk files are supported.'}, 400
+        target_path = '/sd/' + clean_name
+        if _upload_target_in_use(target_path):
+            resilience.log(f"Upload rejected: {target_path} is currently MOUNTED", level=3)
+            return {'error': 'File is currently IN USE. Unmount first.'}, 409
+        if not sd_card.is_mounted():
+            return {'error': 'SD Card not mounted'}, 503
+
+        _restore_upload_sessions()
+        _expire_upload_sessions()
+        found = None
+        for sid, sess in _upload_sessions.items():
+            if sess['path'] == target_path:
+                found = sid
+                break
+        if found is not None:
+            sess = _upload_sessions[found]
+            if sess['size'] == size and fingerprint and sess['fingerprint'] == fingerprint:
+                sess['touched'] = utime.ticks_ms()
+                resilience.log(f"Upload session {found} resumed at {sess['committed']}/{size}")
+                return {'session': found, 'filename': clean_name, 'size': size, 'committed': sess['committed']}
+            _drop_upload_session(found)
+        if len(_upload_sessions) >= UPLOAD_MAX_SESSIONS:
+            return {'error': 'Too many unfinished uploads'}, 503
+
+        try:
+            sd_stat = os.statvfs(sd_card._mount_point)
+            if sd_stat[0] * sd_stat[3] < size:
+                return {'error': 'Insufficient SD card space'}, 400
+        except (ValueError, TypeError, OSError):
+            pass # Optional check
+
+        part = target_path + UPLOAD_PART_SUFFIX
+        with open(part, 'wb'):
+            pass
+        sid = ''.join('%02x' % b for b in os.urandom(4))
+        _upload_sessions[sid] = {'path': target_path, 'part': part, 'size': size, 'fingerprint': fingerprint,
+                                 'committed': 0, 'touched': utime.ticks_ms()}
+        _save_upload_session(sid, _upload_sessions[sid])
+        resilience.log(f"Upload session {sid} opened: {target_path} ({size} bytes)")
+        return {'session': sid, 'filename': clean_name, 'size': size, 'committed': 0}, 201
+    except Exception as e:
+        resilience.log(f"Upload session error: {e}", level=3)
+        return {'error': f'Upload session failed: {e}'}, 500
+
+@app.route('/api/files/uploads/<sid>', methods=['GET', 'PUT', 'DELETE'])
+async def upload_chunk_endpoint(request, sid):
+    """Query, extend or abandon a resumable upload session.
+
+    GET returns the bytes committed so far. PUT writes one chunk, given by
+    `Content-Range: bytes START-END/SIZE`, at its offset in the `.part` file.
+    START may repeat committed bytes but not skip past them. The chunk that
+    completes the file renames it into place. DELETE discards the session.
+    """
+    global _uploading
+    if sd_card.was_mounted():
+        _restore_upload_sessions()
+    sess = _upload_sessions.get(sid)
+    if sess is None:
+        return {'error': 'Unknown upload session'}, 404
+    if request.method == 'GET':
+        return {'session': sid, 'size': sess['size'], 'committed': sess['committed']}
+    if request.method == 'DELETE':
+        _drop_upload_session(sid)
+        resilience.log(f"Upload session {sid} cancelled")
+        return {'status': 'cancelled'}
+    if _uploading:
+        return {'error': 'Another upload is in progress'}, 409
+
+    rng = _parse_content_range(request.headers.get('Content-Range'))
+    if rng is None or rng[2] != sess['size']:
+        return {'error': 'Missing or invalid Content-Range header.', 'committed': sess['committed']}, 400
+    start, end, _ = rng
+    length = end - start + 1
+    try:
+        declared = int(request.headers.get('Content-Length'))
+    except (TypeError, ValueError):
+        declared = -1
+    if declared != length:
+        return {'error': 'Content-Length does not match Content-Range.', 'committed': sess['committed']}, 400
+    if start > sess['committed']:
+        return {'error': 'Chunk starts past the committed bytes.', 'committed': sess['committed']}, 416
+
+    # Hold off SD polling only while this chunk is on the wire
+    _uploading = True
+    app.upload_total = sess['size']
+    app.upload_written = start
+    try:
+        got = await _receive_to_file(request.stream, sess['part'], length, start, 'r+b')
+    except Exception as e:
+        resilience.log(f"Upload chunk failed at {start}: {e}", level=3)
+        return {'error': f'Upload chunk failed: {e}', 'committed': sess['committed']}, 500
+    finally:
+        _uploading = False
+
+    if start + got > sess['committed']:
+        sess['committed'] = start + got
+        _save_upload_session(sid, sess)
+    sess['touched'] = utime.ticks_ms()
+    if got < length:
+        return {'error': 'Chunk ended early', 'committed': sess['committed']}, 400
+    if sess['committed'] < sess['size']:
+        return {'session': sid, 'size': sess['size'], 'committed': sess['committed']}
+    try:
+        return _finish_upload_session(sid, sess)
+    except OSError as e:
+        resilience.log(f"Upload finish failed for {sess['path']}: {e}", level=3)
+        return {'error': f'Upload finish failed: {e}', 'committed': sess['committed']}, 500
+
 @app.route('/api/serial/monitor', methods=['POST'])
 async def monitor_chan_endpoint(request):
     if hasattr(app, 'dw_server'):
@@ -845,15 +1403,59 @@ async def monitor_chan_endpoint(request):
 
 _cloning = False
 _clone_progress = {'state': 'idle', 'progress': 0, 'total': 0, 'error': None}
+CLONE_CHUNK_SECTORS = 64    # Sectors per clone request, and per manifest digest
+CLONE_MANIFEST_BATCH = 64   # Digests per manifest request (512 bytes)
+_DIGEST_BYTES = 8           # SHA-256 prefix per chunk, as sector_server sends it
+CLONE_TMP_SUFFIX = '.clone' # Full copy replacing an existing image, renamed in when complete
 
-def stream_remote_info(server_url):
-    """Fetch info from a remote server and yield disk objects one by one.
+async def fetch_chunk_digests(server_url, disk_name, start, buf):
+    """Read remote chunk digests from chunk `start` into `buf`.
+
+    Returns the number of bytes read (short at the end of the image), or -1
+    if the digests could not be fetched: the server has no manifest endpoint,
+    or the request failed (the cause is logged).
+    """
+    count = len(buf) // _DIGEST_BYTES
+    url = f"{server_url}/manifest/{resilience.url_quote(disk_name)}?chunk={CLONE_CHUNK_SECTORS}&start={start}&count={count}"
+    sock = await resilience.open_remote_stream_async(url, keep_alive=True)
+    if not sock:
+        return -1
+    try:
+        return await sock.recv_into(memoryview(buf))
+    except (OSError, asyncio.TimeoutError) as e:
+        resilience.log(f"Manifest read failed at chunk {start}: {repr(e)}", level=2)
+        return -1
+    finally:
+        sock.close()
+
+def _local_chunk_digest(f, lsn, count, view):
+    """Digest of `count` sectors of `f` from `lsn`, hashed like the manifest; None past EOF."""
+    f.seek(lsn * SECTOR_SIZE)
+    h = hashlib.sha256()
+    left = count * SECTOR_SIZE
+    while left:
+        n = f.readinto(view[:min(left, len(view))])
+        if not n:
+            return None
+        h.update(view[:n])
+        left -= n
+    return h.digest()[:_DIGEST_BYTES]
+
+
+async def stream_remote_info(server_url, visit, name=None):
+    """Fetch info from a remote server and pass disk objects one by one to `visit`.
     
     This avoids buffering the entire JSON response which can cause ENOMEM.
+    Reads are non-blocking; the walk stops early once `visit` returns True.
+    With `name`, the server is asked for that one disk (older servers
+    ignore the filter and list everything).
     """
     gc.collect()
     resilience.feed_wdt()
-    sock = resilience.open_remote_stream(server_url.rstrip('/') + '/info')
+    url = server_url.rstrip('/') + '/info'
+    if name:
+        url += '?name=' + resilience.url_quote(name, safe='')
+    sock = await resilience.open_remote_stream_async(url)
     if not sock:
         return
     
@@ -869,7 +1471,7 @@ def stream_remote_info(server_url):
         escape = False
 
         while True:
-            chunk = sock.recv(128)
+            chunk = await sock.recv(128)
             if not chunk:
                 break
             resilience.feed_wdt()
@@ -918,9 +1520,11 @@ def stream_remote_info(server_url):
                     depth -= 1
                     if depth == 1:
                         try:
-                            yield json.loads(buffer)
+                            disk = json.loads(buffer)
                         except Exception:
-                            pass
+                            disk = None
+                        if disk is not None and visit(disk):
+                            return
                         buffer = bytearray()
                 elif b_val == ord(']'):
                     depth -= 1
@@ -1038,8 +1642,9 @@ async def remote_test_endpoint(request):
             return {'error': 'Missing URL'}, 400
         
         gc.collect()
-        # Single socket: open once, reuse for both validation and streaming
-        sock = resilience.open_remote_stream(url + '/info')
+        # Single socket: open once, reuse for both validation and streaming.
+        # limit=0: only disk_count is shown, not thousands of entries.
+        sock = resilience.open_remote_stream(url + '/info?limit=0')
         if not sock:
             return {'status': 'error', 'message': 'Cannot reach remote server'}, 502
 
@@ -1084,33 +1689,37 @@ async def remote_clone_endpoint(request):
         if not remote_url or not disk_name:
             return {'error': 'Missing remote_url or disk_name'}, 400
 
-        # Sanitize disk_name: strip directory components, reject traversal
+        # Sanitize disk_name: a relative path on the server, no traversal
         # Note: disk_name is a remote identifier, NOT a local path — do not use _sanitize_path()
-        disk_name = disk_name.split('/')[-1].split('\\')[-1]
-        if not disk_name or any(seg == '..' for seg in disk_name.split('/')) or not disk_name.endswith('.dsk'):
+        disk_name = disk_name.replace('\\', '/').strip('/')
+        if not disk_name or any(seg in ('', '.', '..') for seg in disk_name.split('/')) or not disk_name.endswith('.dsk'):
              return {'error': 'Invalid disk name'}, 400
              
         if local_path:
             local_path = _sanitize_path(local_path)
         else:
-            local_path = _sanitize_path('/sd/' + disk_name)
+            local_path = _sanitize_path('/sd/' + disk_name.split('/')[-1])
             
         if not local_path or not local_path.endswith('.dsk'):
              return {'error': 'Invalid local path (must be .dsk)'}, 400
 
         # Check if the target clone path is currently in use
         for drive in app.dw_server.drives:
-            if drive and hasattr(drive, 'filename') and drive.filename == local_path:
+            if drive and (getattr(drive, 'filename', None) == local_path or
+                          getattr(drive, 'local_path', None) == local_path):
                 return {'error': 'Local target is currently IN USE. Unmount first.'}, 409
 
         # Check SD card space
         try:
             # Find the disk using streaming parser to avoid buffering massive /info
-            total_sectors = 0
-            for d in stream_remote_info(remote_url):
-                if d['name'] == disk_name:
-                    total_sectors = d.get('total_sectors', 0)
-                    break
+            found = []
+            def _match(d):
+                if d.get('name') == disk_name:
+                    found.append(d.get('total_sectors', 0))
+                    return True
+                return False
+            await stream_remote_info(remote_url, _match, disk_name)
+            total_sectors = found[0] if found else 0
             
             if total_sectors == 0:
                 return {'error': f'Disk {disk_name} not found on remote server'}, 404
@@ -1129,58 +1738,95 @@ async def remote_clone_endpoint(request):
 
         # Start clone in background
         _cloning = True
-        _clone_progress = {'state': 'downloading', 'progress': 0, 'total': total_sectors, 'error': None}
+        _clone_progress = {'state': 'downloading', 'progress': 0, 'total': total_sectors, 'error': None,
+                           'wire_bytes': 0, 'reused': 0}
 
         async def _do_clone():
-            global _cloning, _clone_progress, _dsk_files_cache
+            global _cloning, _clone_progress
+            existed = True  # Never delete a file this clone did not create
+            delta = False
+            target = local_path  # File being written; a temp copy when replacing an image
             try:
                 activity_led.on()
                 
-                # Resolve remote host IP once to avoid repeated getaddrinfo calls
-                host_url = remote_url.split('://', 1)[1] if '://' in remote_url else remote_url
-                host = host_url.split('/')[0]
-                port = 80
-                if ':' in host:
-                    host, port_str = host.rsplit(':', 1)
-                    port = int(port_str)
-                
-                resilience.log(f"Resolving {host}:{port} for clone...")
-                remote_addr = usocket.getaddrinfo(host, port)[0][-1]
+                # One pooled keep-alive connection carries every chunk, so the
+                # host is resolved and connected once
                 resilience.log_mem_info("Clone Start (Single Stream)")
 
                 # Request sectors in sequential chunks of up to 64 to comply with standard
-                CHUNK_SECTORS = 64
                 buffer = bytearray(4096)  # 4KB read/write buffer
                 view = memoryview(buffer)
-                
-                with open(local_path, 'wb') as f:
+                enc = '&enc=rle' if config.get('remote_compress', False) else ''
+                quoted_name = resilience.url_quote(disk_name)
+
+                # An existing copy no larger than the remote image is updated in
+                # place: only chunks whose digest differs from the server's
+                # manifest are downloaded. Anything else is copied in full.
+                try:
+                    local_size = os.stat(local_path)[6]
+                except OSError:
+                    local_size = 0
+                    existed = False
+                delta = hashlib is not None and 0 < local_size <= total_sectors * SECTOR_SIZE
+                digests = bytearray(CLONE_MANIFEST_BATCH * _DIGEST_BYTES) if delta else None
+                have = 0
+
+                if delta:
+                    drop_image_sidecars(local_path)
+                elif existed:
+                    # Replaced only once the new copy is complete, so a failed
+                    # clone leaves the user's image and its journal untouched
+                    target = local_path + CLONE_TMP_SUFFIX
+                with open(target, 'r+b' if delta else 'wb') as f:
                     lsn = 0
+                    chunk = 0
                     while lsn < total_sectors:
-                        count = min(CHUNK_SECTORS, total_sectors - lsn)
-                        url = f"{remote_url}/sectors/{disk_name}/{lsn}?count={count}"
+                        count = min(CLONE_CHUNK_SECTORS, total_sectors - lsn)
+                        chunk += 1
+                        if delta:
+                            i = (chunk - 1) % CLONE_MANIFEST_BATCH
+                            if not i:
+                                have = await fetch_chunk_digests(remote_url, disk_name, chunk - 1, digests)
+                                if have < 0:
+                                    # Once more: a failed request is not the same as no manifest
+                                    have = await fetch_chunk_digests(remote_url, disk_name, chunk - 1, digests)
+                                if have < 0:
+                                    # Only this batch is copied in full; the next one asks again
+                                    resilience.log(f"Clone: no digests for chunks {chunk - 1}-{chunk + CLONE_MANIFEST_BATCH - 2}, "
+                                                   f"copying them in full", level=1)
+                                    have = 0
+                            d = i * _DIGEST_BYTES
+                            if delta and d + _DIGEST_BYTES <= have and \
+                                    _local_chunk_digest(f, lsn, count, view) == digests[d:d + _DIGEST_BYTES]:
+                                lsn += count
+                                _clone_progress['reused'] += count
+                                _clone_progress['progress'] = lsn
+                                resilience.feed_wdt()
+                                await asyncio.sleep(0)
+                                continue
+                            f.seek(lsn * SECTOR_SIZE)
+                        url = f"{remote_url}/sectors/{quoted_name}/{lsn}?count={count}{enc}"
                         
-                        sock = resilience.open_remote_stream(url, addr=remote_addr)
+                        sock = await resilience.open_remote_stream_async(url, keep_alive=True)
                         if not sock:
                             raise Exception(f"Failed to open clone stream at LSN {lsn}")
                         
                         try:
                             expected_bytes = count * 256
+                            if 0 <= sock.length < expected_bytes and not sock.rle:
+                                raise Exception(f"Short chunk at LSN {lsn}: server sent {sock.length}/{expected_bytes} bytes")
+                            if sock.length >= 0:
+                                _clone_progress['wire_bytes'] += sock.length
                             read_bytes = 0
                             while read_bytes < expected_bytes:
                                 to_read = min(4096, expected_bytes - read_bytes)
-                                # Read with recv() rather than readinto(): the raw
-                                # lwIP socket's readinto did not deliver the body
+                                # recv_into() is built on recv() rather than the raw
+                                # lwIP readinto, which did not deliver the body
                                 # on-device (same root cause as remote sector reads,
-                                # defect #2). recv is capped to the bytes still
-                                # needed for this block so it never overruns `view`.
-                                pos = 0
-                                while pos < to_read:
-                                    chunk = sock.recv(to_read - pos)
-                                    if not chunk:
-                                        break
-                                    view[pos:pos + len(chunk)] = chunk
-                                    pos += len(chunk)
-                                    resilience.feed_wdt()
+                                # defect #2). It fills exactly `to_read` bytes,
+                                # expanding run-length records when the body is encoded.
+                                pos = await sock.recv_into(view[:to_read])
+                                resilience.feed_wdt()
 
                                 if pos < to_read:
                                     raise Exception(f"Stream ended early at LSN {lsn + (read_bytes // 256)} (got {pos}/{to_read})")
@@ -1200,6 +1846,13 @@ async def remote_clone_endpoint(request):
                             resilience.log_mem_info(f"Cloning {lsn}/{total_sectors}")
                             gc.collect()
 
+                if target != local_path:
+                    drop_image_sidecars(local_path)
+                    os.remove(local_path)
+                    existed = False
+                    tmp, target = target, local_path  # A failed rename keeps the new copy
+                    os.rename(tmp, local_path)
+
                 activity_led.off()
                 _clone_progress['state'] = 'swapping'
 
@@ -1221,20 +1874,27 @@ async def remote_clone_endpoint(request):
                 else:
                     _clone_progress['state'] = 'complete'
 
-                resilience.log(f"Clone complete: {disk_name} -> {local_path}")
-                _dsk_files_cache = None  # Invalidate cache
+                resilience.log(f"Clone complete: {disk_name} -> {local_path} ({_clone_progress['wire_bytes']} bytes received)")
             except Exception as e:
                 resilience.log(f"Clone error: {e}", level=3)
                 _clone_progress['state'] = 'error'
                 _clone_progress['error'] = str(e)
                 activity_led.off()
-                # Cleanup partial file
-                try:
-                    os.remove(local_path)
-                except OSError:
-                    pass
+                if delta:
+                    # The user's own image was being updated: keep it, since a
+                    # second clone resyncs only the chunks that still differ
+                    _clone_progress['error'] = f"{e} (local copy kept; clone again to finish)"
+                else:
+                    # Cleanup partial file
+                    try:
+                        os.remove(target)
+                    except OSError:
+                        pass
+                    if existed:
+                        _clone_progress['error'] = f"{e} (local copy unchanged)"
             finally:
                 _cloning = False
+                refresh_dsk_entry(local_path)
                 gc.collect()
 
         asyncio.create_task(_do_clone())
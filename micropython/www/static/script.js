@@ -509,6 +509,76 @@ function initFilesTab() {
     fileInput.onchange = () => handleFileUpload(fileInput.files);
 }
 
+// Resumable uploads: the file goes up in Content-Range chunks. After a
+// failed chunk the Pico is asked how much it committed, and sending resumes
+// from there. Giving up leaves the session open, so uploading the same file
+// (same contents fingerprint) again continues where it stopped.
+const UPLOAD_CHUNK_BYTES = 256 * 1024;
+const UPLOAD_MAX_RETRIES = 5;
+
+// Identifies the file contents, so an abandoned upload is only resumed by
+// the same file and not by another image of the same name and size. FNV-1a
+// over the first and last 64KB plus the modification time: crypto.subtle
+// is unavailable over plain HTTP.
+async function uploadFingerprint(file) {
+    const span = 64 * 1024;
+    let h = 0x811c9dc5;
+    for (const part of [file.slice(0, span), file.slice(Math.max(0, file.size - span))]) {
+        const bytes = new Uint8Array(await part.arrayBuffer());
+        for (let i = 0; i < bytes.length; i++) {
+            h = Math.imul(h ^ bytes[i], 0x01000193) >>> 0;
+        }
+    }
+    return `${file.lastModified}-${file.size}-${h.toString(16)}`;
+}
+
+async function uploadResumable(file, onProgress) {
+    const fingerprint = await uploadFingerprint(file);
+    let res = await fetch('/api/files/uploads', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ filename: file.name, size: file.size, fingerprint: fingerprint })
+    });
+    let data = await res.json();
+    if (!res.ok) throw data.error || `HTTP ${res.status}`;
+    const url = `/api/files/uploads/${data.session}`;
+    let committed = data.committed;
+    let failures = 0;
+
+    while (true) {
+        onProgress(committed, file.size);
+        const end = Math.min(committed + UPLOAD_CHUNK_BYTES, file.size);
+        res = null;
+        data = {};
+        try {
+            res = await fetch(url, {
+                method: 'PUT',
+                headers: { 'Content-Range': `bytes ${committed}-${end - 1}/${file.size}` },
+                body: file.slice(committed, end)
+            });
+            data = await res.json();
+        } catch (e) {
+            console.warn('Upload chunk failed, will resume', e);
+        }
+        if (res && res.ok) {
+            if (data.status === 'ok') return data;
+            committed = data.committed;
+            failures = 0;
+            continue;
+        }
+        // Client errors other than a range mismatch will not fix themselves
+        if (res && res.status < 500 && res.status !== 400 && res.status !== 416) {
+            throw data.error || `HTTP ${res.status}`;
+        }
+        if (++failures > UPLOAD_MAX_RETRIES) throw 'NETWORK ERROR (RETRIES EXHAUSTED)';
+        await new Promise(r => setTimeout(r, 1000 * failures));
+
+        const status = await fetch(url).catch(() => null);
+        if (status && status.status === 404) throw 'UPLOAD SESSION LOST';
+        if (status && status.ok) committed = (await status.json()).committed;
+    }
+}
+
 async function handleFileUpload(files) {
     if (!files || files.length === 0) return;
     console.log("Upload started: pausing background polling");
@@ -542,79 +612,11 @@ async function handleFileUpload(files) {
         }
 
         try {
-            const xhr = new XMLHttpRequest();
-            let uploadPollTimeoutId; // Use a single ID for setTimeout
-
-            const promise = new Promise((resolve, reject) => {
-                // Remove xhr.upload.onprogress to avoid browser TCP buffering jumps
-
-                // Poll for progress using recursive setTimeout to avoid overlapping requests
-                let pollInFlight = false;
-                let uploadDone = false;
-                const pollUploadStatus = async () => {
-                    if (uploadDone || pollInFlight) return;
-                    pollInFlight = true;
-                    try {
-                        const response = await fetch('/api/files/upload_status');
-                        if (response.ok) {
-                            const data = await response.json();
-                            if (data.total > 0) {
-                                const pct = (data.written / data.total) * 100;
-                                progressBar.style.width = pct + '%';
-                                statusEl.textContent = `UPLOADING: ${Math.round(pct)}% (${Math.round(data.written / 1024)}KB / ${Math.round(data.total / 1024)}KB)`;
-
-                                if (data.written >= data.total) {
-                                    clearTimeout(uploadPollTimeoutId);
-                                    // The XHR onload will handle the final resolve/reject
-                                    return;
-                                }
-                            }
-                        }
-                    } catch (e) {
-                        // Ignore polling errors, let the XHR error handler deal with fatal network issues
-                        console.warn("Upload status poll failed", e);
-                    } finally {
-                        pollInFlight = false;
-                        uploadPollTimeoutId = setTimeout(pollUploadStatus, 1000); // Schedule next poll
-                    }
-                };
-
-                // Start initial poll
-                uploadPollTimeoutId = setTimeout(pollUploadStatus, 1000);
-
-
-                xhr.onload = () => {
-                    uploadDone = true;
-                    clearTimeout(uploadPollTimeoutId);
-                    if (xhr.status === 200) {
-                        try {
-                            const data = JSON.parse(xhr.responseText);
-                            resolve(data);
-                        } catch (e) {
-                            reject('INVALID SERVER RESPONSE');
-                        }
-                    } else {
-                        try {
-                            const data = JSON.parse(xhr.responseText);
-                            reject(data.error || `HTTP ${xhr.status}`);
-                        } catch (e) {
-                            reject(`HTTP ${xhr.status}`);
-                        }
-                    }
-                };
-
-                xhr.onerror = () => {
-                    uploadDone = true;
-                    clearTimeout(uploadPollTimeoutId);
-                    reject('NETWORK ERROR');
-                };
+            await uploadResumable(file, (done, total) => {
+                const pct = (done / total) * 100;
+                progressBar.style.width = pct + '%';
+                statusEl.textContent = `UPLOADING: ${Math.round(pct)}% (${Math.round(done / 1024)}KB / ${Math.round(total / 1024)}KB)`;
             });
-
-            xhr.open('POST', '/api/files/upload');
-            xhr.setRequestHeader('X-Filename', file.name);
-            xhr.send(file);
-
-            await promise;
             statusEl.textContent = `SAVED ${file.name} OK`;
             statusEl.className = 'status success';
         } catch (e) {
@@ -1106,6 +1108,7 @@ function hideCreateDiskModal() {
 async function submitCreateDisk() {
     const nameInput = document.getElementById('new-disk-name').value.trim();
     const sizeInput = document.getElementById('new-disk-size').value;
+    const formatInput = document.getElementById('new-disk-format').value;
     const btn = document.getElementById('btn-create-submit');
 
     if (!nameInput) {
@@ -1122,7 +1125,7 @@ async function submitCreateDisk() {
         const response = await fetch('/api/files/create', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ filename: nameInput, size: sizeInput })
+            body: JSON.stringify({ filename: nameInput, size: sizeInput, format: formatInput })
         });
 
         if (!response.ok) {
@@ -1317,7 +1320,7 @@ function showCloneModal(serverUrl, diskName, serverName, driveNum) {
     const infoEl = document.getElementById('clone-info');
     infoEl.textContent = `CLONE "${diskName}" FROM ${serverName || serverUrl} TO LOCAL SD CARD`;
 
-    document.getElementById('clone-local-name').value = diskName;
+    document.getElementById('clone-local-name').value = diskName.split('/').pop();
 
     // Dynamically build drive dropdown showing current assignments
     const sel = document.getElementById('clone-drive-num');